@@ -0,0 +1,128 @@
+"""
+Benchmark of the generalized Marcum Q function
+
+Compares ``roc.marcum.marcumq`` in both modes against the previous
+``1 - scipy.stats.distributions.ncx2.cdf`` path, for speed and for the
+error relative to ``scipy.stats.ncx2.sf``. ``cdf`` mode, the one of the
+detection models, must match the previous path at a lower cost.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_marcumq
+
+---
+
+- Copyright (C) 2018 - PRESENT  radarsimx.com
+- E-mail: info@radarsimx.com
+- Website: https://radarsimx.com
+
+::
+
+    ██████╗  █████╗ ██████╗  █████╗ ██████╗ ███████╗██╗███╗   ███╗██╗  ██╗
+    ██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔════╝██║████╗ ████║╚██╗██╔╝
+    ██████╔╝███████║██║  ██║███████║██████╔╝███████╗██║██╔████╔██║ ╚███╔╝
+    ██╔══██╗██╔══██║██║  ██║██╔══██║██╔══██╗╚════██║██║██║╚██╔╝██║ ██╔██╗
+    ██║  ██║██║  ██║██████╔╝██║  ██║██║  ██║███████║██║██║ ╚═╝ ██║██╔╝ ██╗
+    ╚═╝  ╚═╝╚═╝  ╚═╝╚═════╝ ╚═╝  ╚═╝╚═╝  ╚═╝╚══════╝╚═╝╚═╝     ╚═╝╚═╝  ╚═╝
+
+"""
+
+import argparse
+import time
+
+import numpy as np
+from scipy.stats import distributions, ncx2
+
+from roc.marcum import marcumq
+
+
+def scipy_marcumq(a, x, m=1):
+    """
+    Previous implementation of ``roc.tools.marcumq``
+    """
+    return 1 - distributions.ncx2.cdf(df=m * 2, nc=a**2, x=x**2)
+
+
+def cases(size, seed=0):
+    """
+    Benchmark inputs, ``(name, a, x, m)``
+
+    :param int size: Number of elements per case
+    :param int seed: Seed of the random inputs
+
+    :return: Benchmark cases
+    :rtype: list
+    """
+    rng = np.random.default_rng(seed)
+    nsnr = 10 ** (np.linspace(-10, 30, size) / 10)
+    a_m1 = np.sqrt(2 * nsnr)
+    result = [
+        ("Pd curve, Pfa 1e-6, m 1", a_m1, np.sqrt(2 * 13.8155), 1),
+        ("Pd curve, Pfa 1e-12, m 1", a_m1, np.sqrt(2 * 27.631), 1),
+    ]
+    for a_max in [3, 30, 300]:
+        a = rng.uniform(0, a_max, size)
+        x = np.abs(a + rng.normal(0, 3, size))
+        m = rng.integers(1, 51, size)
+        result.append((f"random, a < {a_max}, m <= 50", a, x, m))
+    x = np.sqrt(2 * 13.8155) + np.linspace(2, 12, size)
+    result.append(("upper tail, m 1", np.ones(size), x, 1))
+    return result
+
+
+def timed(func, repeat):
+    """
+    Best wall time of ``repeat`` calls and the last result
+    """
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def main():
+    """
+    Print the timings and errors of every case
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=20000, help="elements per case")
+    parser.add_argument("--repeat", type=int, default=3, help="timed calls per case")
+    args = parser.parse_args()
+
+    print(f"{'case':<28}{'method':<12}{'time [ms]':>11}{'max abs':>11}{'max rel':>11}")
+    for name, a, x, m in cases(args.size):
+        ref = ncx2.sf(x**2, 2 * np.asarray(m), a**2)
+        methods = [
+            ("scipy", lambda a=a, x=x, m=m: scipy_marcumq(a, x, m)),
+            ("accurate", lambda a=a, x=x, m=m: marcumq(a, x, m, mode="accurate")),
+            ("cdf", lambda a=a, x=x, m=m: marcumq(a, x, m, mode="cdf")),
+        ]
+        for method, func in methods:
+            elapsed, value = timed(func, args.repeat)
+            error = np.abs(value - ref)
+            relative = np.max(error[ref > 0] / ref[ref > 0], initial=0)
+            print(
+                f"{name:<28}{method:<12}{elapsed * 1e3:>11.2f}"
+                f"{np.max(error):>11.1e}{relative:>11.1e}"
+            )
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        scipy_marcumq(3.0, 4.0)
+    middle = time.perf_counter()
+    for _ in range(1000):
+        marcumq(3.0, 4.0)
+    end = time.perf_counter()
+    for _ in range(1000):
+        marcumq(3.0, 4.0, mode="accurate")
+    print(
+        f"scalar call [us]: scipy {(middle - start) * 1e3:.1f}, "
+        f"cdf {(end - middle) * 1e3:.1f}, "
+        f"accurate {(time.perf_counter() - end) * 1e3:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Benchmark suite of the ROC kernels and solvers
+
+Covers the Swerling 0 to 4 kernels on both sides of their branch cuts,
+the Marcum Q function, ``roc_pd`` and ``roc_snr`` with scalar and array
+inputs, and the integration gain workload of the app at N = 1024.
+Results are written as JSON, and compared against a previous run with
+``--compare``, which exits with status 1 when a case is slower than the
+baseline by more than ``--threshold``.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_roc --output before.json
+    python -m benchmarks.bench_roc --compare before.json
+
+---
+
+- Copyright (C) 2018 - PRESENT  radarsimx.com
+- E-mail: info@radarsimx.com
+- Website: https://radarsimx.com
+
+::
+
+    ██████╗  █████╗ ██████╗  █████╗ ██████╗ ███████╗██╗███╗   ███╗██╗  ██╗
+    ██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔════╝██║████╗ ████║╚██╗██╔╝
+    ██████╔╝███████║██║  ██║███████║██████╔╝███████╗██║██╔████╔██║ ╚███╔╝
+    ██╔══██╗██╔══██║██║  ██║██╔══██║██╔══██╗╚════██║██║██║╚██╔╝██║ ██╔██╗
+    ██║  ██║██║  ██║██████╔╝██║  ██║██║  ██║███████║██║██║ ╚═╝ ██║██╔╝ ██╗
+    ╚═╝  ╚═╝╚═╝  ╚═╝╚═════╝ ╚═╝  ╚═╝╚═╝  ╚═╝╚══════╝╚═╝╚═╝     ╚═╝╚═╝  ╚═╝
+
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+
+import numpy as np
+import scipy
+
+from roc.cache import threshold_cache
+from roc.marcum import marcumq
+from roc.tools import (
+    integration_gain,
+    pd_swerling0,
+    pd_swerling1,
+    pd_swerling2,
+    pd_swerling3,
+    pd_swerling4,
+    roc_pd,
+    roc_pd_adaptive,
+    roc_snr,
+    threshold,
+)
+
+KERNELS = {
+    "swerling0": pd_swerling0,
+    "swerling1": pd_swerling1,
+    "swerling2": pd_swerling2,
+    "swerling3": pd_swerling3,
+    "swerling4": pd_swerling4,
+}
+
+# Both sides of the branch cuts, 50 for Swerling 0 and 4, 1 and 2 for
+# Swerling 1 and 3
+NPULSES = [1, 2, 3, 10, 49, 50, 51, 200]
+
+
+def cases():
+    """
+    Benchmark cases
+
+    :return: ``{name: (setup, func)}``, ``setup`` runs untimed before
+        every repeat of ``func``
+    :rtype: dict
+    """
+    result = {}
+    snr_array = np.linspace(-10, 30, 1000)
+
+    for name, kernel in KERNELS.items():
+        for npulses in NPULSES:
+            thred = threshold(1e-6, npulses)
+            snr_lin = 10 ** (snr_array / 10)
+            result[f"kernel.{name}.n{npulses}.array"] = (
+                None,
+                lambda k=kernel, n=npulses, s=snr_lin, t=thred: k(n, s, t),
+            )
+            result[f"kernel.{name}.n{npulses}.scalar"] = (
+                None,
+                lambda k=kernel, n=npulses, t=thred: k(n, 10.0, t),
+            )
+
+    a_var = np.sqrt(2 * 10 ** (snr_array / 10))
+    result["marcumq.array"] = (None, lambda: marcumq(a_var, 5.0))
+    result["marcumq.scalar"] = (None, lambda: marcumq(3.0, 4.0))
+
+    pfa = np.logspace(-10, 0, 1000)[1:]
+    for stype in ["Coherent"] + [f"Swerling {idx}" for idx in range(5)]:
+        key = stype.lower().replace(" ", "")
+        result[f"roc_pd.{key}.pfa_curve"] = (
+            threshold_cache.clear,
+            lambda s=stype: roc_pd(pfa, 10.0, 16, s),
+        )
+        result[f"roc_pd.{key}.pfa_adaptive"] = (
+            threshold_cache.clear,
+            lambda s=stype: roc_pd_adaptive(10.0, 16, s),
+        )
+        result[f"roc_pd.{key}.scalar"] = (
+            threshold_cache.clear,
+            lambda s=stype: roc_pd(1e-6, 10.0, 16, s),
+        )
+        result[f"roc_snr.{key}.grid"] = (
+            threshold_cache.clear,
+            lambda s=stype: roc_snr(
+                [1e-8, 1e-6, 1e-4], [0.5, 0.9, 0.99], [1, 10, 100], s
+            ),
+        )
+        result[f"roc_snr.{key}.scalar"] = (
+            threshold_cache.clear,
+            lambda s=stype: roc_snr(1e-6, 0.9, 10, s),
+        )
+
+    result["gain_plot.n1024"] = (
+        threshold_cache.clear,
+        lambda: integration_gain(1e-4, 0.5, 1024, ["Swerling 1", "Swerling 3"]),
+    )
+    return result
+
+
+def run(selected, repeat, min_time):
+    """
+    Time the selected cases
+
+    :param dict selected: Cases, see ``cases``
+    :param int repeat: Number of timed repeats
+    :param float min_time: Smallest duration of one repeat in seconds
+
+    :return: ``{name: {"best", "median", "number", "repeat"}}``, times of
+        one call in seconds
+    :rtype: dict
+    """
+    result = {}
+    for name, (setup, func) in selected.items():
+        timer = timeit.Timer(func, setup=setup or "pass")
+        number = 1
+        while True:
+            elapsed = timer.timeit(number)
+            if elapsed >= min_time or number >= 10**6:
+                break
+            number *= 2 if elapsed * 10 > min_time else 10
+        times = np.array(timer.repeat(repeat, number)) / number
+        result[name] = {
+            "best": float(np.min(times)),
+            "median": float(np.median(times)),
+            "number": number,
+            "repeat": repeat,
+        }
+        print(f"{name:<40}{result[name]['best'] * 1e3:>12.4f} ms", flush=True)
+    return result
+
+
+def compare(results, baseline, threshold_ratio):
+    """
+    Compare the best times against a baseline run
+
+    :param dict results: Results of ``run``
+    :param dict baseline: Results of a previous run
+    :param float threshold_ratio: Relative slowdown flagged as a regression
+
+    :return: Names of the regressed cases
+    :rtype: list
+    """
+    regressions = []
+    print(f"\n{'case':<40}{'baseline ms':>12}{'current ms':>12}{'ratio':>8}")
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        ratio = current["best"] / baseline[name]["best"]
+        flag = ""
+        if ratio > 1 + threshold_ratio:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        elif ratio < 1 / (1 + threshold_ratio):
+            flag = "  faster"
+        print(
+            f"{name:<40}{baseline[name]['best'] * 1e3:>12.4f}"
+            f"{current['best'] * 1e3:>12.4f}{ratio:>8.2f}{flag}"
+        )
+    return regressions
+
+
+def main():
+    """
+    Command line entry point
+    """
+    parser = argparse.ArgumentParser(description="ROC benchmark suite")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file of a previous run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown flagged as a regression (default 0.1)",
+    )
+    parser.add_argument("--filter", default="", help="only cases containing this")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repeats")
+    parser.add_argument(
+        "--min-time", type=float, default=0.05, help="seconds per repeat"
+    )
+    args = parser.parse_args()
+
+    selected = {name: case for name, case in cases().items() if args.filter in name}
+    results = run(selected, args.repeat, args.min_time)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Startup benchmark of the app and the ROC package
+
+Imports each module in fresh interpreters, reports the median import
+time and checks it against a budget. Also checks that the modules
+meant to load lazily (scipy, the kernels, the plotly templates) are
+not imported by the app at startup. Exits with status 1 when a budget
+or a lazy import is broken.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --budget roc_app=1.5
+
+---
+
+- Copyright (C) 2018 - PRESENT  radarsimx.com
+- E-mail: info@radarsimx.com
+- Website: https://radarsimx.com
+
+::
+
+    ██████╗  █████╗ ██████╗  █████╗ ██████╗ ███████╗██╗███╗   ███╗██╗  ██╗
+    ██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔════╝██║████╗ ████║╚██╗██╔╝
+    ██████╔╝███████║██║  ██║███████║██████╔╝███████╗██║██╔████╔██║ ╚███╔╝
+    ██╔══██╗██╔══██║██║  ██║██╔══██║██╔══██╗╚════██║██║██║╚██╔╝██║ ██╔██╗
+    ██║  ██║██║  ██║██████╔╝██║  ██║██║  ██║███████║██║██║ ╚═╝ ██║██╔╝ ██╗
+    ╚═╝  ╚═╝╚═╝  ╚═╝╚═════╝ ╚═╝  ╚═╝╚═╝  ╚═╝╚══════╝╚═╝╚═╝     ╚═╝╚═╝  ╚═╝
+
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+import numpy as np
+
+# Import time budgets in seconds, most of the app is the import of Dash
+BUDGETS = {
+    "roc": 0.05,
+    "roc.cache": 0.3,
+    "roc.tools": 0.8,
+    "roc_app": 2.5,
+}
+
+# Modules that must not be imported at startup, they load on first use
+LAZY = {
+    "roc": ["numpy", "scipy"],
+    "roc_app": ["scipy.special", "roc.tools", "roc.parallel", "plotly.io"],
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = [name for name in {lazy!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "loaded": loaded}}))
+"""
+
+
+def measure(module, repeat):
+    """
+    Import a module in fresh interpreters
+
+    :param str module: Module name
+    :param int repeat: Number of interpreters
+
+    :return: Import times in seconds and the lazy modules that were loaded
+    :rtype: tuple
+    """
+    code = _PROBE.format(module=module, lazy=LAZY.get(module, []))
+    times = []
+    loaded = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        times.append(result["seconds"])
+        loaded = result["loaded"]
+    return times, loaded
+
+
+def main():
+    """
+    Command line entry point
+    """
+    parser = argparse.ArgumentParser(description="Startup benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="interpreters")
+    parser.add_argument(
+        "--budget",
+        action="append",
+        default=[],
+        metavar="MODULE=SECONDS",
+        help="override or add a budget",
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS)
+    for item in args.budget:
+        module, seconds = item.split("=")
+        budgets[module] = float(seconds)
+
+    results = {}
+    failed = False
+    print(f"{'module':<16}{'median s':>10}{'budget s':>10}")
+    for module, budget in budgets.items():
+        times, loaded = measure(module, args.repeat)
+        median = float(np.median(times))
+        results[module] = {"median": median, "budget": budget, "loaded": loaded}
+        flag = ""
+        if median > budget:
+            flag += "  OVER BUDGET"
+        if loaded:
+            flag += "  EAGER " + ", ".join(loaded)
+        failed |= bool(flag)
+        print(f"{module:<16}{median:>10.3f}{budget:>10.3f}{flag}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
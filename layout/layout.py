@@ -27,6 +27,7 @@
 
 """
 
+import functools
 import uuid
 
 from dash import dcc
@@ -34,8 +35,6 @@ from dash import html
 
 import dash_bootstrap_components as dbc
 
-import plotly.io as pio
-
 colorscales = [
     "Blackbody",
     "Bluered",
@@ -185,64 +184,157 @@ sidebar_gain = dbc.Row(
             dbc.Row(id="minsnr-container", children=[]),
             color="primary",
             type="grow",
+            delay_show=500,
         ),
     ]
 )
 
-layout_card = [
-    dbc.Row(
-        [
-            dbc.Col(
-                html.Div(id="sidebar"),
-                width=3,
-            ),
-            dbc.Col(
-                dbc.Spinner(
-                    dcc.Graph(
-                        id="scatter",
-                        figure={
-                            "data": [
-                                {
-                                    "mode": "lines",
-                                    "type": "scatter",
-                                    "x": [],
-                                    "y": [],
-                                }
-                            ],
-                            "layout": {
-                                "template": pio.templates["plotly"],
-                                "uirevision": "no_change",
-                                "xaxis": {"title": "Number of Channels"},
-                                "yaxis": {"title": "Integration Gain (dB)"},
+sidebar_heatmap = dbc.Row(
+    [
+        html.H2("Detectability", className="mb-3"),
+        html.Label(
+            "Probability of detection (Pd) over SNR and number of channels, "
+            "or minimal SNR over Pd and number of channels.",
+            className="mb-3",
+        ),
+        dbc.RadioItems(
+            id="heatmap-quantity",
+            options=[
+                {"label": "Pd", "value": "pd"},
+                {"label": "Minimal SNR", "value": "snr"},
+            ],
+            value="pd",
+            inline=True,
+            className="mb-3",
+        ),
+        dbc.InputGroup(
+            [
+                dbc.InputGroupText("Pfa"),
+                dbc.Input(
+                    id="heatmap-pfa",
+                    type="number",
+                    value=0.000001,
+                    min=0.0000000001,
+                    max=0.1,
+                    step=0.0000000001,
+                ),
+                dbc.Tooltip(
+                    "Probability of false alarm",
+                    target="heatmap-pfa",
+                    placement="top",
+                ),
+            ],
+            className="mb-3",
+        ),
+        dbc.InputGroup(
+            [
+                dbc.InputGroupText("Target"),
+                dbc.Select(
+                    id="heatmap-integration",
+                    options=[{"label": i, "value": i} for i in INTEGRATION],
+                    value="Swerling 1",
+                ),
+                dbc.Tooltip(
+                    "Target model",
+                    target="heatmap-integration",
+                    placement="top",
+                ),
+            ],
+            className="mb-3",
+        ),
+        dbc.FormText("N, maximal number of channels"),
+        dcc.Slider(
+            id="heatmap-channels",
+            min=1,
+            max=1024,
+            step=1,
+            value=1024,
+            marks=None,
+            tooltip={
+                "always_visible": True,
+                "placement": "bottom",
+            },
+        ),
+        dbc.FormText("Color scale", className="mt-3"),
+        dcc.Dropdown(
+            id="heatmap-colorscale",
+            options=[{"label": i, "value": i} for i in colorscales],
+            value="Viridis",
+            clearable=False,
+        ),
+    ]
+)
+
+
+@functools.lru_cache(maxsize=None)
+def get_card():
+    """
+    Get the card with the tabs and the graph, built on first use.
+
+    The Plotly template of the graph is loaded here rather than at import,
+    and the figure updates of the callbacks do not repeat it.
+
+    Returns:
+    dbc.Card: Card with the tabs, the sidebar and the graph.
+    """
+    # pylint: disable=import-outside-toplevel
+    import plotly.io as pio
+
+    layout_card = [
+        dbc.Row(
+            [
+                dbc.Col(
+                    html.Div(id="sidebar"),
+                    width=3,
+                ),
+                dbc.Col(
+                    dbc.Spinner(
+                        dcc.Graph(
+                            id="scatter",
+                            figure={
+                                "data": [
+                                    {
+                                        "mode": "lines",
+                                        "type": "scatter",
+                                        "x": [],
+                                        "y": [],
+                                    }
+                                ],
+                                "layout": {
+                                    "template": pio.templates["plotly"],
+                                    "uirevision": "no_change",
+                                    "xaxis": {"title": "Number of Channels"},
+                                    "yaxis": {"title": "Integration Gain (dB)"},
+                                },
                             },
-                        },
-                        style={"height": "90vh"},
+                            style={"height": "90vh"},
+                        ),
+                        color="primary",
+                        type="grow",
+                        delay_show=500,
                     ),
-                    color="primary",
-                    type="grow",
+                    width=9,
                 ),
-                width=9,
+            ]
+        )
+    ]
+
+    return dbc.Card(
+        [
+            dbc.CardHeader(
+                dbc.Tabs(
+                    [
+                        dbc.Tab(label="Pd vs. Pfa", tab_id="tab-1"),
+                        dbc.Tab(label="Integration Gain", tab_id="tab-2"),
+                        dbc.Tab(label="Detectability", tab_id="tab-3"),
+                    ],
+                    id="card-tabs",
+                    active_tab="tab-1",
+                )
             ),
+            dbc.CardBody(html.Div(id="card-content", children=layout_card)),
         ]
     )
-]
-
-
-card = dbc.Card(
-    [
-        dbc.CardHeader(
-            dbc.Tabs(
-                [
-                    dbc.Tab(label="Pd vs. Pfa", tab_id="tab-1"),
-                    dbc.Tab(label="Integration Gain", tab_id="tab-2"),
-                ],
-                id="card-tabs",
-                active_tab="tab-1",
-            )
-        ),
-        dbc.CardBody(html.Div(id="card-content", children=layout_card)),
-    ]
-)
 
 
 def get_app_layout():
@@ -252,6 +344,8 @@ def get_app_layout():
     Returns:
     dbc.Container: Dash Bootstrap container containing the layout elements.
     - dcc.Store: Dash Core Component for storing session ID data.
+    - dcc.Store: View and traces the graph shows, echoed to the callbacks that patch it.
+    - dcc.Interval: Polls the background integration gain job.
     - dbc.Row: Dash Bootstrap row containing a column with a card
       (assumed to be defined elsewhere as 'card_gain').
     - html.Hr: Dash HTML Horizontal Rule for visual separation.
@@ -260,7 +354,9 @@ def get_app_layout():
     return dbc.Container(
         [
             dcc.Store(id="session-id", data=str(uuid.uuid4())),
-            dbc.Row([dbc.Col(card)], className="my-2"),
+            dcc.Store(id="figure-keys"),
+            dcc.Interval(id="gain-interval", interval=300, disabled=True),
+            dbc.Row([dbc.Col(get_card())], className="my-2"),
             html.Hr(),
             dcc.Markdown("v1.0 | Powered by [Dash](https://plotly.com/dash/)"),
             html.Div(id="hidden", style= {'display': 'none'})
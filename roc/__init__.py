@@ -0,0 +1,84 @@
+"""
+Receiver operating characteristic (ROC) analysis of radar detection
+
+The submodules are imported on first access (PEP 562), so ``import roc``
+does not load scipy. Importing a submodule explicitly works as usual.
+
+This file can be imported as a module and contains the following
+functions:
+
+* prewarm - Import the kernels and evaluate each signal type once, in a
+            background thread
+
+---
+
+- Copyright (C) 2018 - PRESENT  radarsimx.com
+- E-mail: info@radarsimx.com
+- Website: https://radarsimx.com
+
+::
+
+    ██████╗  █████╗ ██████╗  █████╗ ██████╗ ███████╗██╗███╗   ███╗██╗  ██╗
+    ██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔════╝██║████╗ ████║╚██╗██╔╝
+    ██████╔╝███████║██║  ██║███████║██████╔╝███████╗██║██╔████╔██║ ╚███╔╝
+    ██╔══██╗██╔══██║██║  ██║██╔══██║██╔══██╗╚════██║██║██║╚██╔╝██║ ██╔██╗
+    ██║  ██║██║  ██║██████╔╝██║  ██║██║  ██║███████║██║██║ ╚═╝ ██║██╔╝ ██╗
+    ╚═╝  ╚═╝╚═╝  ╚═╝╚═════╝ ╚═╝  ╚═╝╚═╝  ╚═╝╚══════╝╚═╝╚═╝     ╚═╝╚═╝  ╚═╝
+
+"""
+
+import importlib
+import threading
+
+_SUBMODULES = (
+    "api",
+    "cache",
+    "cli",
+    "jobs",
+    "marcum",
+    "metrics",
+    "montecarlo",
+    "parallel",
+    "sweep",
+    "tables",
+    "tools",
+)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES))
+
+
+def _prewarm():
+    """
+    Import the kernels and evaluate every signal type once
+    """
+    tools = importlib.import_module(f"{__name__}.tools")
+    for stype in ["Coherent", "Real"] + [f"Swerling {idx}" for idx in range(6)]:
+        tools.roc_pd([1e-6, 1e-3], 10.0, [1, 64], stype)
+        tools.roc_snr(1e-6, 0.9, 64, stype)
+    importlib.import_module(f"{__name__}.tables").load_tables()
+
+
+def prewarm(background=True):
+    """
+    Import the kernels and evaluate each signal type once, so the first
+    request does not pay for the imports and the lazily built tables
+
+    :param bool background: Run in a daemon thread (default is True)
+
+    :return: The thread if ``background``, else ``None``
+    :rtype: threading.Thread or None
+    """
+    if not background:
+        _prewarm()
+        return None
+    thread = threading.Thread(target=_prewarm, name="roc-prewarm", daemon=True)
+    thread.start()
+    return thread
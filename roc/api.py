@@ -0,0 +1,194 @@
+"""
+Batched JSON API of the ROC tools
+
+This file can be imported as a module and contains the following
+functions:
+
+* install - Serve the API on a Flask server
+
+Endpoints, under ``/api/v1`` by default:
+
+* ``POST /pd`` - Pd of arrays of ``pfa``, ``snr`` (dB), ``npulses`` and
+  ``stype``
+* ``POST /snr`` - Minimal SNR of arrays of ``pfa``, ``pd``, ``npulses``
+  and ``stype``
+* ``GET /models`` - Signal types
+
+Every request is one vectorized pass, the queries are grouped by signal
+type and number of pulses as by ``roc.cli.evaluate``. The fields of the
+JSON body are arrays of one length, or scalars broadcast against them::
+
+    {"pfa": [1e-6, 1e-4], "pd": 0.9, "npulses": [1, 16], "stype": "Swerling 1"}
+
+The response is ``{"snr": [...]}``, ``null`` where there is no solution.
+With ``?format=npy`` it is the result as a ``.npy`` binary array, of
+``"dtype": "f4"`` or ``"f8"`` (default) given in the body. The kernels
+and their caches are the ones of the process, shared with the app.
+
+---
+
+- Copyright (C) 2018 - PRESENT  radarsimx.com
+- E-mail: info@radarsimx.com
+- Website: https://radarsimx.com
+
+::
+
+    ██████╗  █████╗ ██████╗  █████╗ ██████╗ ███████╗██╗███╗   ███╗██╗  ██╗
+    ██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔════╝██║████╗ ████║╚██╗██╔╝
+    ██████╔╝███████║██║  ██║███████║██████╔╝███████╗██║██╔████╔██║ ╚███╔╝
+    ██╔══██╗██╔══██║██║  ██║██╔══██║██╔══██╗╚════██║██║██║╚██╔╝██║ ██╔██╗
+    ██║  ██║██║  ██║██████╔╝██║  ██║██║  ██║███████║██║██║ ╚═╝ ██║██╔╝ ██╗
+    ╚═╝  ╚═╝╚═╝  ╚═╝╚═════╝ ╚═╝  ╚═╝╚═╝  ╚═╝╚══════╝╚═╝╚═╝     ╚═╝╚═╝  ╚═╝
+
+"""
+
+import io
+import math
+import os
+
+import numpy as np
+
+from roc.cli import MAX_NPULSES, evaluate
+from roc.metrics import metrics, timed
+
+# Largest number of queries of one request
+MAX_QUERIES = int(os.environ.get("ROC_API_MAX_QUERIES", "1000000"))
+
+STYPES = ["Coherent", "Real"] + [f"Swerling {idx}" for idx in range(6)]
+
+
+class _BadRequest(Exception):
+    """
+    Invalid request, answered with its message and ``status``
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _queries(body, value):
+    """
+    Broadcast columns of a request body
+
+    :param dict body: JSON body
+    :param str value: ``snr`` or ``pd``, the input next to ``pfa``
+
+    :raises _BadRequest: if a field is missing, not numeric, a signal type
+        is not a string, a number of pulses is not an integer in range, the
+        fields do not broadcast, or there are too many queries
+
+    :return: Columns for ``roc.cli.evaluate``
+    :rtype: dict
+    """
+    if not isinstance(body, dict):
+        raise _BadRequest("the body must be a JSON object")
+    for name in ("pfa", value):
+        if name not in body:
+            raise _BadRequest(f"missing field {name}")
+    stype = body.get("stype", "Coherent")
+    if not isinstance(stype, str) and not (
+        isinstance(stype, list) and all(isinstance(item, str) for item in stype)
+    ):
+        raise _BadRequest("stype must be a string or a list of strings")
+
+    try:
+        pfa = np.asarray(body["pfa"], dtype=float)
+        val = np.asarray(body[value], dtype=float)
+        npulses = np.asarray(body.get("npulses", 1), dtype=float)
+        stype = np.asarray(stype, dtype=object)
+    except (TypeError, ValueError) as err:
+        raise _BadRequest(f"invalid value: {err}") from err
+
+    if any(arg.ndim > 1 for arg in (pfa, val, npulses, stype)):
+        raise _BadRequest("fields must be scalars or 1-D arrays")
+    try:
+        shape = np.broadcast_shapes(pfa.shape, val.shape, npulses.shape, stype.shape)
+    except ValueError as err:
+        raise _BadRequest("fields have different lengths") from err
+    if int(np.prod(shape)) > MAX_QUERIES:
+        raise _BadRequest(f"more than {MAX_QUERIES} queries", status=413)
+
+    unknown = set(np.ravel(stype).tolist()) - set(STYPES)
+    if unknown:
+        raise _BadRequest(f"unknown signal type {sorted(map(str, unknown))[0]!r}")
+    if not np.all(
+        (npulses >= 1) & (npulses <= MAX_NPULSES) & (npulses == np.rint(npulses))
+    ):
+        raise _BadRequest(f"npulses must be integers from 1 to {MAX_NPULSES}")
+
+    pfa, val, npulses, stype = (
+        np.array(np.broadcast_to(arg, shape).ravel())
+        for arg in (pfa, val, npulses, stype)
+    )
+    columns = {
+        "pfa": pfa,
+        "pd": val if value == "pd" else np.full(pfa.shape, np.nan),
+        # ``evaluate`` solves the SNR of the rows without one
+        "snr": val if value == "snr" else np.full(pfa.shape, np.nan),
+        "npulses": npulses.astype(np.int64),
+        "stype": stype,
+    }
+    return columns
+
+
+def install(server, prefix="/api/v1", workers=1):
+    """
+    Serve the API on a Flask server
+
+    :param flask.Flask server: Flask server
+    :param str prefix: URL prefix of the endpoints (default is ``/api/v1``)
+    :param int workers: Worker processes of a request, see
+        ``roc.cli.evaluate`` (default is 1, in the request thread)
+    """
+    # pylint: disable=import-outside-toplevel
+    from flask import Blueprint, Response, jsonify, request
+
+    blueprint = Blueprint("roc_api", __name__, url_prefix=prefix)
+
+    def respond(name, values, dtype):
+        if request.args.get("format") == "npy":
+            buffer = io.BytesIO()
+            np.save(buffer, values.astype(dtype))
+            return Response(buffer.getvalue(), mimetype="application/octet-stream")
+        # Shortest repr of the floats, 8 digits for f4, and null for the
+        # unsolved cells, NaN is not JSON
+        spec = ".8g" if dtype == "f4" else ""
+        items = ",".join(
+            format(item, spec) if math.isfinite(item) else "null"
+            for item in values.tolist()
+        )
+        return Response(f'{{"{name}":[{items}]}}', mimetype="application/json")
+
+    def handle(value, result):
+        try:
+            body = request.get_json(force=True, silent=True)
+            columns = _queries(body, value)
+            dtype = body.get("dtype", "f8")
+            if dtype not in ("f4", "f8"):
+                raise _BadRequest("dtype must be f4 or f8")
+            method = body.get("method", "exact")
+            if method not in ("exact", "table"):
+                raise _BadRequest("method must be exact or table")
+        except _BadRequest as err:
+            return jsonify(error=str(err)), err.status
+
+        metrics.inc("roc_api_queries_total", columns["pfa"].size, endpoint=result)
+        evaluate(columns, workers=workers, method=method)
+        return respond(result, columns[result], dtype)
+
+    @timed("api_pd")
+    def pd_view():
+        return handle("snr", "pd")
+
+    @timed("api_snr")
+    def snr_view():
+        return handle("pd", "snr")
+
+    def models_view():
+        return jsonify(stype=STYPES)
+
+    blueprint.add_url_rule("/pd", "pd", pd_view, methods=["POST"])
+    blueprint.add_url_rule("/snr", "snr", snr_view, methods=["POST"])
+    blueprint.add_url_rule("/models", "models", models_view)
+    server.register_blueprint(blueprint)
@@ -0,0 +1,345 @@
+"""
+Caches for radar system analysis
+
+This file can be imported as a module and contains the following
+classes:
+
+* LRUCache - Bounded, thread-safe least recently used cache
+* ThresholdCache - Memoized detection threshold ``threshold(pfa, npulses)``
+
+and the process-wide ``threshold_cache`` used by ``roc.tools.threshold``
+
+---
+
+- Copyright (C) 2018 - PRESENT  radarsimx.com
+- E-mail: info@radarsimx.com
+- Website: https://radarsimx.com
+
+::
+
+    ██████╗  █████╗ ██████╗  █████╗ ██████╗ ███████╗██╗███╗   ███╗██╗  ██╗
+    ██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔════╝██║████╗ ████║╚██╗██╔╝
+    ██████╔╝███████║██║  ██║███████║██████╔╝███████╗██║██╔████╔██║ ╚███╔╝
+    ██╔══██╗██╔══██║██║  ██║██╔══██║██╔══██╗╚════██║██║██║╚██╔╝██║ ██╔██╗
+    ██║  ██║██║  ██║██████╔╝██║  ██║██║  ██║███████║██║██║ ╚═╝ ██║██╔╝ ██╗
+    ╚═╝  ╚═╝╚═╝  ╚═╝╚═════╝ ╚═╝  ╚═╝╚═╝  ╚═╝╚══════╝╚═╝╚═╝     ╚═╝╚═╝  ╚═╝
+
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe least recently used cache
+
+    :param int maxsize:
+        Maximal number of entries (default is 128)
+    :param float ttl:
+        Time to live of the entries in seconds, expired entries count as
+        misses (default is None, no expiry)
+    """
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """
+        Look up a key and mark it as most recently used
+
+        :param key: Hashable key
+        :param default: Value returned when ``key`` is missing
+
+        :return: Cached value or ``default``
+        """
+        with self._lock:
+            if key in self._data:
+                value, expiry = self._data[key]
+                if expiry is None or time.monotonic() < expiry:
+                    self._data.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._data[key]
+            self._misses += 1
+            return default
+
+    def put(self, key, value):
+        """
+        Store a value, evicting the least recently used entries if full
+
+        :param key: Hashable key
+        :param value: Value to cache
+        """
+        expiry = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expiry)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def resize(self, maxsize):
+        """
+        Change the maximal number of entries
+
+        :param int maxsize: Maximal number of entries
+        """
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def cache_info(self):
+        """
+        Cache statistics
+
+        :return: Hits, misses, maximal size and current size
+        :rtype: CacheInfo
+        """
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._data))
+
+    def clear(self):
+        """
+        Remove all the entries and reset the statistics
+        """
+        with self._lock:
+            self._data.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+def _gammaincinv(a, y):
+    """
+    ``scipy.special.gammaincinv``, imported on first use so that the
+    caches can be imported without scipy
+    """
+    # pylint: disable=import-outside-toplevel,no-name-in-module
+    from scipy.special import gammaincinv
+
+    return gammaincinv(a, y)
+
+
+class ThresholdCache:
+    """
+    Memoized detection threshold ``gammaincinv(npulses, 1 - pfa)``
+
+    Scalar lookups go through a bounded LRU cache. Array lookups are
+    vectorized, they are answered from the optional dense table for the
+    Pfa decades and numbers of pulses it covers, then from a bounded,
+    array-backed least recently used store of the distinct
+    (pfa, npulses) pairs already computed, and the remaining distinct
+    pairs are computed in one call and stored.
+
+    :param int maxsize:
+        Maximal number of entries of the LRU cache and of the pair store
+        each (default is 4096)
+    :param bool table:
+        Precompute the dense table (default is False), see ``build_table``
+    """
+
+    def __init__(self, maxsize=4096, table=False):
+        self._lru = LRUCache(maxsize)
+        self._lock = threading.Lock()
+        self._table = None
+        # Pair store, ``pfa + 1j * npulses`` keys sorted by Pfa then number
+        # of pulses, with their thresholds and last use
+        self._keys = np.zeros(0, dtype=complex)
+        self._values = np.zeros(0)
+        self._stamps = np.zeros(0, dtype=np.int64)
+        self._clock = 0
+        self._hits = 0
+        self._misses = 0
+        if table:
+            self.build_table()
+
+    def __call__(self, pfa, npulses):
+        """
+        Detection threshold
+
+        :param pfa:
+            Probability of false alarm
+        :type pfa: float or numpy.ndarray
+        :param npulses:
+            Number of pulses for integration
+        :type npulses: int or numpy.ndarray
+
+        :return: Threshold ratio with the broadcast shape of the inputs
+        :rtype: float or numpy.ndarray
+        """
+        if np.ndim(pfa) == 0 and np.ndim(npulses) == 0:
+            key = (float(pfa), float(npulses))
+            thred = self._lru.get(key)
+            if thred is None:
+                thred = float(_gammaincinv(key[1], 1 - key[0]))
+                self._lru.put(key, thred)
+            return thred
+
+        return self._lookup(*np.broadcast_arrays(np.asarray(pfa), np.asarray(npulses)))
+
+    def _lookup(self, pfa, npulses):
+        """
+        Vectorized lookup, dense table first, then the pair store, then the
+        distinct missing pairs are computed and stored
+        """
+        thred = np.zeros(pfa.shape)
+        miss = np.ones(pfa.shape, dtype=bool)
+        hits = 0
+
+        table = self._table
+        if table is not None:
+            exponents, values = table
+            with np.errstate(divide="ignore", invalid="ignore"):
+                exponent = np.rint(-np.log10(pfa))
+            hit = (
+                (pfa == 10.0**-exponent)
+                & np.isin(exponent, exponents)
+                & (npulses == np.rint(npulses))
+                & (npulses >= 1)
+                & (npulses <= values.shape[1])
+            )
+            thred[hit] = values[
+                np.searchsorted(exponents, exponent[hit]),
+                npulses[hit].astype(int) - 1,
+            ]
+            miss = ~hit
+            hits = int(np.sum(hit))
+
+        # Distinct pairs, sorted as the keys of the store
+        pairs, inverse = np.unique(
+            pfa[miss] + 1j * npulses[miss].astype(float), return_inverse=True
+        )
+        with self._lock:
+            idx = np.searchsorted(self._keys, pairs)
+            found = idx < self._keys.size
+            found[found] = self._keys[idx[found]] == pairs[found]
+            values = np.zeros(pairs.shape)
+            values[found] = self._values[idx[found]]
+            self._clock += 1
+            self._stamps[idx[found]] = self._clock
+            self._hits += hits + int(np.sum(found))
+
+        new = ~found
+        if np.any(new):
+            values[new] = _gammaincinv(pairs.imag[new], 1 - pairs.real[new])
+            # A NaN Pfa is no usable key, NaN never equals itself
+            self._store(pairs[new], values[new])
+        thred[miss] = values[inverse.ravel()]
+
+        return thred
+
+    def _store(self, pairs, values):
+        """
+        Insert computed pairs into the store, evicting the least recently
+        used ones beyond ``maxsize``
+        """
+        keep = ~np.isnan(pairs) & ~np.isnan(values)
+        pairs, values = pairs[keep], values[keep]
+        with self._lock:
+            self._misses += int(keep.size)
+            # Pairs of a concurrent lookup may have been stored meanwhile
+            idx = np.searchsorted(self._keys, pairs)
+            known = idx < self._keys.size
+            known[known] = self._keys[idx[known]] == pairs[known]
+            idx = idx[~known]
+            keys = np.insert(self._keys, idx, pairs[~known])
+            values = np.insert(self._values, idx, values[~known])
+            stamps = np.insert(self._stamps, idx, self._clock)
+
+            excess = keys.size - self._lru.maxsize
+            if excess > 0:
+                drop = np.argsort(stamps, kind="stable")[:excess]
+                keep = np.ones(keys.size, dtype=bool)
+                keep[drop] = False
+                keys, values, stamps = keys[keep], values[keep], stamps[keep]
+            self._keys, self._values, self._stamps = keys, values, stamps
+
+    def build_table(self, max_npulses=4096, exponents=range(1, 13)):
+        """
+        Precompute the dense table of thresholds
+
+        :param int max_npulses:
+            The table covers 1 to ``max_npulses`` pulses (default is 4096)
+        :param exponents:
+            Pfa decades ``10 ** -exponent`` covered by the table
+            (default is 1e-1 to 1e-12)
+        :type exponents: list or range
+        """
+        exponents = np.sort(np.array(exponents, dtype=float))
+        values = _gammaincinv(
+            np.arange(1, max_npulses + 1)[np.newaxis, :],
+            1 - 10.0 ** -exponents[:, np.newaxis],
+        )
+        # Swapped in as one tuple, so lookups never see a partial table
+        self._table = (exponents, values)
+
+    def drop_table(self):
+        """
+        Release the dense table
+        """
+        self._table = None
+
+    def resize(self, maxsize):
+        """
+        Change the maximal number of entries of the LRU cache and of the
+        pair store
+
+        :param int maxsize: Maximal number of entries
+        """
+        self._lru.resize(maxsize)
+        with self._lock:
+            if self._keys.size > maxsize:
+                keep = np.sort(np.argsort(self._stamps, kind="stable")[-maxsize:])
+                if maxsize == 0:
+                    keep = keep[:0]
+                self._keys = self._keys[keep]
+                self._values = self._values[keep]
+                self._stamps = self._stamps[keep]
+
+    def cache_info(self):
+        """
+        Cache statistics, the LRU cache and the vectorized path combined.
+        Table and pair store hits count as hits, distinct computed pairs as
+        misses
+
+        :return: Hits, misses, maximal size and current size of the LRU
+            cache and the pair store
+        :rtype: CacheInfo
+        """
+        info = self._lru.cache_info()
+        with self._lock:
+            return CacheInfo(
+                info.hits + self._hits,
+                info.misses + self._misses,
+                info.maxsize,
+                info.currsize + self._keys.size,
+            )
+
+    def clear(self):
+        """
+        Remove all the LRU and pair store entries and reset the statistics,
+        the dense table is kept
+        """
+        self._lru.clear()
+        with self._lock:
+            self._keys = np.zeros(0, dtype=complex)
+            self._values = np.zeros(0)
+            self._stamps = np.zeros(0, dtype=np.int64)
+            self._hits = 0
+            self._misses = 0
+
+
+threshold_cache = ThresholdCache()
@@ -0,0 +1,407 @@
+"""
+Batch evaluation of ROC scenarios from the command line
+
+This script requires that 'numpy' and 'scipy' be installed within the
+Python environment you are running this script in.
+
+Scenarios are read from a CSV file with a header row. ``pfa`` is
+required, ``npulses`` (default 1) and ``stype`` (default ``Coherent``)
+are optional. Rows with an ``snr`` value, in dB, get their Pd computed,
+the other rows have their minimal SNR solved for their ``pd``. Rows with
+an unknown signal type, or a number of pulses that is not an integer from
+1 to ``MAX_NPULSES``, get ``nan`` and are counted in the summary. The file
+is read in chunks, and the rows of a chunk are grouped by signal type and
+number of pulses, so each group is one vectorized ``roc_pd_nd`` or
+``roc_snr_nd`` call, spread over worker processes with ``--workers``.
+Results are written as CSV, the input columns with ``pd`` and ``snr``
+filled in, or as a structured ``.npy`` array::
+
+    python -m roc scenarios.csv --output results.csv --workers 4
+
+This file can be imported as a module and contains the following
+functions:
+
+* read_scenarios - Generator of the scenarios of a CSV file, in chunks
+* evaluate - Pd or minimal SNR of a chunk of scenarios
+* main - Command line entry point
+
+---
+
+- Copyright (C) 2018 - PRESENT  radarsimx.com
+- E-mail: info@radarsimx.com
+- Website: https://radarsimx.com
+
+::
+
+    ██████╗  █████╗ ██████╗  █████╗ ██████╗ ███████╗██╗███╗   ███╗██╗  ██╗
+    ██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔════╝██║████╗ ████║╚██╗██╔╝
+    ██████╔╝███████║██║  ██║███████║██████╔╝███████╗██║██╔████╔██║ ╚███╔╝
+    ██╔══██╗██╔══██║██║  ██║██╔══██║██╔══██╗╚════██║██║██║╚██╔╝██║ ██╔██╗
+    ██║  ██║██║  ██║██████╔╝██║  ██║██║  ██║███████║██║██║ ╚═╝ ██║██╔╝ ██╗
+    ╚═╝  ╚═╝╚═╝  ╚═╝╚═════╝ ╚═╝  ╚═╝╚═╝  ╚═╝╚══════╝╚═╝╚═╝     ╚═╝╚═╝  ╚═╝
+
+"""
+
+import argparse
+import csv
+import sys
+import time
+import warnings
+
+import numpy as np
+
+# Rows read, evaluated and written at a time
+CHUNK_SIZE = 2**16
+
+# Smallest group handed to a worker process on its own
+_MIN_PIECE = 2**12
+
+# Largest number of pulses of a scenario
+MAX_NPULSES = np.iinfo(np.int32).max
+
+# Fields of the ``.npy`` output
+NPY_DTYPE = np.dtype(
+    [
+        ("pfa", np.float64),
+        ("pd", np.float64),
+        ("snr", np.float64),
+        ("npulses", np.int64),
+        ("stype", "U10"),
+    ]
+)
+
+
+def _column(rows, idx, default, dtype):
+    """
+    One column of a chunk of CSV rows, empty cells take ``default``
+    """
+    if idx is None:
+        return np.full(len(rows), default, dtype=dtype)
+    return np.array(
+        [row[idx].strip() or default if idx < len(row) else default for row in rows],
+        dtype=dtype,
+    )
+
+
+def read_scenarios(file, chunk_size=CHUNK_SIZE):
+    """
+    Read the scenarios of a CSV file in chunks
+
+    :param file: Text file object of the CSV file, positioned at the header
+    :param int chunk_size: Number of rows of a chunk (default is
+        ``CHUNK_SIZE``)
+
+    :raises ValueError: if the header has no ``pfa`` column, or a value
+        is not a number
+
+    :return: Generator of ``(header, rows, columns)``, the header and the
+        raw rows of the chunk, and a dict of the ``pfa``, ``pd``, ``snr``
+        and ``npulses`` arrays and ``stype`` list, ``nan`` for the missing
+        Pd and SNR, ``npulses`` is 0 where the value is not an integer from
+        1 to ``MAX_NPULSES``
+    :rtype: generator
+    """
+    reader = csv.reader(file)
+    header = [name.strip() for name in next(reader, [])]
+    if "pfa" not in header:
+        raise ValueError("the scenarios have no pfa column")
+    index = {
+        name: header.index(name) if name in header else None for name in NPY_DTYPE.names
+    }
+
+    def columns(rows):
+        npulses = _column(rows, index["npulses"], "1", float)
+        # Flagged rather than truncated, ``evaluate`` skips these rows
+        npulses[
+            ~((npulses >= 1) & (npulses <= MAX_NPULSES) & (npulses == np.rint(npulses)))
+        ] = 0
+        return {
+            "pfa": _column(rows, index["pfa"], "nan", float),
+            "pd": _column(rows, index["pd"], "nan", float),
+            "snr": _column(rows, index["snr"], "nan", float),
+            "npulses": npulses.astype(np.int64),
+            "stype": _column(rows, index["stype"], "Coherent", object),
+        }
+
+    rows = []
+    for row in reader:
+        if not row:
+            continue
+        rows.append(row)
+        if len(rows) == chunk_size:
+            yield header, rows, columns(rows)
+            rows = []
+    if rows:
+        yield header, rows, columns(rows)
+
+
+def _task(kind, stype, npulses, pfa, value, method):
+    """
+    Evaluate one group of scenarios, in a worker process or not
+
+    :return: Pd or minimal SNR, ``nan`` for an unknown signal type
+    :rtype: numpy.ndarray
+    """
+    # pylint: disable=import-outside-toplevel
+    from roc.tools import roc_pd_nd, roc_snr_nd
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if kind == "pd":
+            val = roc_pd_nd(pfa, value, npulses, stype, method=method)
+        else:
+            val = roc_snr_nd(pfa, value, npulses, stype, method=method)
+    if val is None:
+        return np.full(pfa.shape, np.nan)
+    return val
+
+
+def evaluate(columns, workers=1, method="exact"):
+    """
+    Compute the Pd of the scenarios with an SNR and the minimal SNR of the
+    others, in place
+
+    Rows are grouped by kind, signal type and number of pulses, each group
+    is evaluated in one call, split over the worker processes when it is
+    large enough. Rows with 0 pulses, an invalid number of pulses in
+    ``read_scenarios``, get ``nan``.
+
+    :param dict columns: Columns of ``read_scenarios``, ``pd`` and ``snr``
+        are updated
+    :param int workers: Number of worker processes (default is 1, in the
+        calling process)
+    :param str method: ``exact`` (default) or ``table``, see ``roc_pd``
+
+    :return: Number of rows with an unknown signal type and a valid number
+        of pulses
+    :rtype: int
+    """
+    solve = np.isnan(columns["snr"])
+    stypes, stype_idx = np.unique(columns["stype"].astype(str), return_inverse=True)
+    npulses = columns["npulses"]
+    valid = npulses >= 1
+    columns["pd"][~valid & ~solve] = np.nan
+
+    order = np.lexsort((npulses, stype_idx, solve))
+    order = order[valid[order]]
+    keys = np.stack([solve[order], stype_idx[order], npulses[order]])
+    bounds = np.flatnonzero(np.any(np.diff(keys, axis=1) != 0, axis=0)) + 1
+
+    pieces = []
+    for group in np.split(order, bounds) if order.size else []:
+        row = group[0]
+        kind = "snr" if solve[row] else "pd"
+        value = columns["pd"] if solve[row] else columns["snr"]
+        n_pieces = max(min(workers, group.size // _MIN_PIECE), 1)
+        for piece in np.array_split(group, n_pieces):
+            args = (
+                kind,
+                str(stypes[stype_idx[row]]),
+                int(npulses[row]),
+                columns["pfa"][piece],
+                value[piece],
+                method,
+            )
+            pieces.append((kind, piece, args))
+
+    if workers > 1 and len(pieces) > 1:
+        # pylint: disable=import-outside-toplevel
+        from roc.parallel import executor
+
+        pool = executor(workers)
+        futures = [pool.submit(_task, *args) for _, _, args in pieces]
+        results = [future.result() for future in futures]
+    else:
+        results = [_task(*args) for _, _, args in pieces]
+
+    for (kind, piece, _), result in zip(pieces, results):
+        columns[kind][piece] = result
+
+    return int(np.sum(~_known(stypes)[stype_idx] & valid))
+
+
+def _known(stypes):
+    """
+    Mask of the signal types with a model
+
+    :param numpy.ndarray stypes: Signal types
+
+    :return: True where the signal type is known
+    :rtype: numpy.ndarray
+    """
+    # pylint: disable=import-outside-toplevel
+    from roc.tools import _NON_FLUCTUATING, _SWERLING_KERNELS
+
+    known = [item in _NON_FLUCTUATING or item in _SWERLING_KERNELS for item in stypes]
+    return np.asarray(known, dtype=bool)
+
+
+class _CsvWriter:
+    """
+    Input rows with their ``pd`` and ``snr`` cells filled in
+    """
+
+    def __init__(self, file):
+        self.writer = csv.writer(file, lineterminator="\n")
+        self.file = file
+        self.index = None
+
+    def write(self, header, rows, columns):
+        if self.index is None:
+            out_header = header + [name for name in ("pd", "snr") if name not in header]
+            self.index = [out_header.index("pd"), out_header.index("snr")]
+            self.writer.writerow(out_header)
+        width = max(self.index) + 1
+        pd = [format(value, ".10g") for value in columns["pd"]]
+        snr = [format(value, ".10g") for value in columns["snr"]]
+        for row, pd_item, snr_item in zip(rows, pd, snr):
+            row = row + [""] * (width - len(row))
+            row[self.index[0]] = pd_item
+            row[self.index[1]] = snr_item
+            self.writer.writerow(row)
+
+    def close(self):
+        if self.file is sys.stdout:
+            self.file.flush()
+        else:
+            self.file.close()
+
+
+class _NpyWriter:
+    """
+    Structured ``NPY_DTYPE`` rows in a memory-mapped ``.npy`` file
+    """
+
+    def __init__(self, path, total):
+        self.out = np.lib.format.open_memmap(
+            path, mode="w+", dtype=NPY_DTYPE, shape=(total,)
+        )
+        self.start = 0
+
+    def write(self, header, rows, columns):
+        del header
+        block = self.out[self.start : self.start + len(rows)]
+        for name in NPY_DTYPE.names:
+            block[name] = columns[name]
+        self.start += len(rows)
+
+    def close(self):
+        self.out.flush()
+
+
+def _count_rows(path, exact):
+    """
+    Number of rows of a CSV file, header excluded
+
+    :param str path: CSV file
+    :param bool exact: Parse the file, otherwise count its lines, which
+        is faster but includes the blank lines
+    """
+    if exact:
+        with open(path, newline="", encoding="utf-8") as file:
+            return max(sum(1 for row in csv.reader(file) if row) - 1, 0)
+    with open(path, "rb") as file:
+        return max(
+            sum(block.count(b"\n") for block in iter(lambda: file.read(2**20), b""))
+            - 1,
+            0,
+        )
+
+
+def main(argv=None):
+    """
+    Command line entry point
+
+    Parameters: -
+        argv (list): Arguments (default is ``sys.argv[1:]``)
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m roc",
+        description="Pd or minimal SNR of the scenarios of a CSV file",
+    )
+    parser.add_argument("input", help="scenario CSV file, - for stdin")
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        help="CSV file, or .npy file for a structured array (default stdout)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="worker processes (default 1, 0 for the number of CPUs)",
+    )
+    parser.add_argument("--method", choices=["exact", "table"], default="exact")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=CHUNK_SIZE,
+        help=f"rows evaluated at a time (default {CHUNK_SIZE})",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="no progress on stderr"
+    )
+    args = parser.parse_args(argv)
+
+    # pylint: disable=import-outside-toplevel
+    from roc.parallel import resolve_workers
+
+    workers = resolve_workers(args.workers or None)
+    to_npy = args.output.endswith(".npy")
+    if to_npy and args.input == "-":
+        parser.error("the .npy output needs an input file, not stdin")
+
+    total = _count_rows(args.input, to_npy) if args.input != "-" else None
+    # pylint: disable=consider-using-with
+    source = sys.stdin
+    if args.input != "-":
+        source = open(args.input, newline="", encoding="utf-8")
+    if to_npy:
+        writer = _NpyWriter(args.output, total)
+    elif args.output == "-":
+        writer = _CsvWriter(sys.stdout)
+    else:
+        writer = _CsvWriter(open(args.output, "w", newline="", encoding="utf-8"))
+
+    start = time.perf_counter()
+    done = unknown = invalid = unsolved = 0
+    try:
+        for header, rows, columns in read_scenarios(source, args.chunk_size):
+            solve = np.isnan(columns["snr"])
+            unknown += evaluate(columns, workers, args.method)
+            valid = columns["npulses"] >= 1
+            invalid += int(np.sum(~valid))
+            # Unknown signal types and invalid numbers of pulses are counted
+            # apart, not as unsolved
+            stypes, stype_idx = np.unique(
+                columns["stype"].astype(str), return_inverse=True
+            )
+            solve &= _known(stypes)[stype_idx] & valid
+            unsolved += int(np.sum(solve & np.isnan(columns["snr"])))
+            writer.write(header, rows, columns)
+            done += len(rows)
+            if not args.quiet:
+                elapsed = time.perf_counter() - start
+                of_total = (
+                    f"/{total} ({100 * done / max(total, 1):.0f}%)" if total else ""
+                )
+                sys.stderr.write(
+                    f"\r{done}{of_total} rows, {done / max(elapsed, 1e-9):.0f} rows/s"
+                )
+                sys.stderr.flush()
+    except ValueError as err:
+        parser.exit(2, f"\nerror: {err}\n")
+    finally:
+        writer.close()
+        if source is not sys.stdin:
+            source.close()
+
+    if not args.quiet:
+        elapsed = time.perf_counter() - start
+        sys.stderr.write(
+            f"\n{done} rows in {elapsed:.2f} s, {unsolved} unsolved, "
+            f"{unknown} with an unknown signal type, "
+            f"{invalid} with an invalid number of pulses\n"
+        )
+    return 0
@@ -0,0 +1,177 @@
+"""
+Background jobs with partial results
+
+This file can be imported as a module and contains the following
+classes:
+
+* JobManager - Runs generator functions in worker threads, one job per
+               key, and keeps their latest partial result
+
+---
+
+- Copyright (C) 2018 - PRESENT  radarsimx.com
+- E-mail: info@radarsimx.com
+- Website: https://radarsimx.com
+
+::
+
+    ██████╗  █████╗ ██████╗  █████╗ ██████╗ ███████╗██╗███╗   ███╗██╗  ██╗
+    ██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔════╝██║████╗ ████║╚██╗██╔╝
+    ██████╔╝███████║██║  ██║███████║██████╔╝███████╗██║██╔████╔██║ ╚███╔╝
+    ██╔══██╗██╔══██║██║  ██║██╔══██║██╔══██╗╚════██║██║██║╚██╔╝██║ ██╔██╗
+    ██║  ██║██║  ██║██████╔╝██║  ██║██║  ██║███████║██║██║ ╚═╝ ██║██╔╝ ██╗
+    ╚═╝  ╚═╝╚═╝  ╚═╝╚═════╝ ╚═╝  ╚═╝╚═╝  ╚═╝╚══════╝╚═╝╚═╝     ╚═╝╚═╝  ╚═╝
+
+"""
+
+import itertools
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from roc.cache import LRUCache
+
+logger = logging.getLogger("roc.jobs")
+
+JobState = namedtuple("JobState", ["generation", "version", "done", "result", "error"])
+
+
+class _Job:
+    """
+    State of one submitted job
+    """
+
+    def __init__(self, generation, meta):
+        self.generation = generation
+        self.meta = meta
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        self.version = 0
+        self.done = False
+        self.result = None
+        self.error = None
+
+    def state(self):
+        """
+        Snapshot of the job
+        """
+        with self.lock:
+            return JobState(
+                self.generation, self.version, self.done, self.result, self.error
+            )
+
+
+class JobManager:
+    """
+    Runs generator functions in worker threads, one job per key
+
+    Every value the generator yields replaces the partial result of the
+    job. Submitting a new job for a key cancels the previous one, which
+    stops at its next yield, so superseded work is dropped early.
+
+    :param int max_workers:
+        Maximal number of jobs running at the same time (default is 2)
+    :param int maxsize:
+        Maximal number of keys kept, least recently used first out
+        (default is 1024)
+    """
+
+    def __init__(self, max_workers=2, maxsize=1024):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="roc-job"
+        )
+        self._jobs = LRUCache(maxsize)
+        self._lock = threading.Lock()
+        self._generation = itertools.count(1)
+        self._closed = threading.Event()
+
+    def submit(self, key, func, *args, meta=None, **kwargs):
+        """
+        Run ``func(*args, **kwargs)`` in the background for ``key``
+
+        :param key: Hashable key, for example a session id
+        :param callable func: Generator function yielding partial results
+        :param meta: Arbitrary data stored with the job, see ``meta``
+
+        :return: Generation of the new job, increasing over all the keys
+        :rtype: int
+        """
+        with self._lock:
+            previous = self._jobs.get(key)
+            if previous is not None:
+                previous.cancelled.set()
+            job = _Job(next(self._generation), meta)
+            self._jobs.put(key, job)
+
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job.generation
+
+    def _run(self, job, func, args, kwargs):
+        """
+        Consume the generator of a job until it ends or is cancelled
+        """
+        try:
+            for result in func(*args, **kwargs):
+                if job.cancelled.is_set() or self._closed.is_set():
+                    return
+                with job.lock:
+                    job.result = result
+                    job.version += 1
+        except Exception as err:  # pylint: disable=broad-except
+            logger.exception("Job %d failed", job.generation)
+            with job.lock:
+                job.error = err
+        finally:
+            with job.lock:
+                job.done = True
+
+    def cancel(self, key):
+        """
+        Cancel the job of a key, its last partial result is kept
+
+        :param key: Hashable key
+        """
+        job = self._jobs.get(key)
+        if job is not None:
+            job.cancelled.set()
+
+    def poll(self, key):
+        """
+        Latest state of the job of a key
+
+        :param key: Hashable key
+
+        :return: Generation, number of partial results so far, whether the
+            job has ended, latest partial result and exception raised by
+            the job, ``None`` if no job was submitted for ``key``
+        :rtype: JobState or None
+        """
+        job = self._jobs.get(key)
+        if job is None:
+            return None
+        return job.state()
+
+    def meta(self, key):
+        """
+        Data stored with the job of a key
+
+        :param key: Hashable key
+
+        :return: ``meta`` passed to ``submit``, ``None`` if no job was
+            submitted for ``key``
+        """
+        job = self._jobs.get(key)
+        if job is None:
+            return None
+        return job.meta
+
+    def shutdown(self, wait=True):
+        """
+        Cancel all the jobs, running ones stop at their next yield, and
+        stop the worker threads. No job can be submitted afterwards
+
+        :param bool wait: Wait for the running jobs to stop (default is True)
+        """
+        self._closed.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,288 @@
+"""
+Instrumentation of the hot paths
+
+This file can be imported as a module and contains the following
+classes and functions:
+
+* Metrics - Thread-safe registry of counters, timings, caches and slow
+            calls, rendered as Prometheus text or JSON
+* metrics - Process-wide registry, disabled with ``ROC_METRICS=0``
+* timed - Decorator recording the wall time of a function in ``metrics``,
+          and logging its slow calls (``ROC_SLOW_CALL`` seconds)
+* install - Serve ``metrics`` on a Flask server
+
+---
+
+- Copyright (C) 2018 - PRESENT  radarsimx.com
+- E-mail: info@radarsimx.com
+- Website: https://radarsimx.com
+
+::
+
+    ██████╗  █████╗ ██████╗  █████╗ ██████╗ ███████╗██╗███╗   ███╗██╗  ██╗
+    ██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔════╝██║████╗ ████║╚██╗██╔╝
+    ██████╔╝███████║██║  ██║███████║██████╔╝███████╗██║██╔████╔██║ ╚███╔╝
+    ██╔══██╗██╔══██║██║  ██║██╔══██║██╔══██╗╚════██║██║██║╚██╔╝██║ ██╔██╗
+    ██║  ██║██║  ██║██████╔╝██║  ██║██║  ██║███████║██║██║ ╚═╝ ██║██╔╝ ██╗
+    ╚═╝  ╚═╝╚═╝  ╚═╝╚═════╝ ╚═╝  ╚═╝╚═╝  ╚═╝╚══════╝╚═╝╚═╝     ╚═╝╚═╝  ╚═╝
+
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger("roc.slow")
+
+# Longest repr of one argument kept in the slow call log
+_MAX_REPR = 200
+
+
+def _escape(value):
+    """
+    Prometheus label value
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    """
+    Prometheus label set of a sorted ``((name, value), ...)`` tuple
+    """
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters, timings, caches and slow calls
+
+    Counters and timings are keyed on a name and keyword labels, caches
+    are read through their ``cache_info`` when the metrics are rendered.
+
+    :param bool enabled:
+        Record the counters and timings (default is True)
+    :param float slow:
+        Calls of ``timed`` functions longer than this, in seconds, are
+        logged with their arguments to the ``roc.slow`` logger (default
+        is None, no slow call log)
+    :param int maxslow:
+        Number of slow calls kept for the JSON output (default is 100)
+    """
+
+    def __init__(self, enabled=True, slow=None, maxslow=100):
+        self.enabled = enabled
+        self.slow = slow
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timings = {}
+        self._caches = {}
+        self._slow_calls = deque(maxlen=maxslow)
+
+    def inc(self, name, value=1, **labels):
+        """
+        Add to a counter
+
+        :param str name: Counter name
+        :param value: Increment (default is 1)
+        :param labels: Label values of the counter
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """
+        Record a duration
+
+        :param str name: Timing name
+        :param float seconds: Duration in seconds
+        :param labels: Label values of the timing
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            count, total, peak = self._timings.get(key, (0, 0.0, 0.0))
+            self._timings[key] = (count + 1, total + seconds, max(peak, seconds))
+
+    def record_slow(self, name, seconds, args, kwargs):
+        """
+        Log a slow call with its arguments
+
+        :param str name: Function name
+        :param float seconds: Duration in seconds
+        :param tuple args: Positional arguments of the call
+        :param dict kwargs: Keyword arguments of the call
+        """
+        inputs = [repr(arg)[:_MAX_REPR] for arg in args] + [
+            f"{key}={value!r}"[:_MAX_REPR] for key, value in kwargs.items()
+        ]
+        entry = {
+            "name": name,
+            "seconds": seconds,
+            "time": time.time(),
+            "inputs": inputs,
+        }
+        with self._lock:
+            self._slow_calls.append(entry)
+        logger.warning("%s took %.3f s: %s", name, seconds, ", ".join(inputs))
+
+    def register_cache(self, name, cache):
+        """
+        Report the statistics of a cache
+
+        :param str name: Cache name
+        :param cache: Object with a ``cache_info`` method returning
+            ``roc.cache.CacheInfo``
+        """
+        with self._lock:
+            self._caches[name] = cache
+
+    def reset(self):
+        """
+        Reset the counters, timings and slow calls, the caches are kept
+        """
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+            self._slow_calls.clear()
+
+    def snapshot(self):
+        """
+        Current values
+
+        :return: ``counters``, ``timings``, ``caches`` and ``slow`` calls,
+            JSON serializable
+        :rtype: dict
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            timings = dict(self._timings)
+            caches = dict(self._caches)
+            slow_calls = list(self._slow_calls)
+
+        result = {"counters": [], "timings": [], "caches": {}, "slow": slow_calls}
+        for (name, labels), value in sorted(counters.items()):
+            result["counters"].append(
+                {"name": name, "labels": dict(labels), "value": value}
+            )
+        for (name, labels), (count, total, peak) in sorted(timings.items()):
+            result["timings"].append(
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": count,
+                    "sum": total,
+                    "max": peak,
+                }
+            )
+        for name, cache in sorted(caches.items()):
+            info = cache.cache_info()
+            lookups = info.hits + info.misses
+            result["caches"][name] = dict(
+                info._asdict(), hit_rate=info.hits / lookups if lookups else None
+            )
+        return result
+
+    def prometheus(self):
+        """
+        Current values in the Prometheus text exposition format
+
+        :return: Metrics text
+        :rtype: str
+        """
+        snapshot = self.snapshot()
+        # Samples grouped per metric family, as the format requires
+        families = {}
+
+        def add(name, kind, labels, value, suffix=""):
+            if name not in families:
+                families[name] = [f"# TYPE {name} {kind}"]
+            families[name].append(f"{name}{suffix}{_labels(labels)} {value}")
+
+        for item in snapshot["counters"]:
+            add(item["name"], "counter", sorted(item["labels"].items()), item["value"])
+        for item in snapshot["timings"]:
+            labels = sorted(item["labels"].items())
+            add(item["name"], "summary", labels, item["count"], suffix="_count")
+            add(item["name"], "summary", labels, item["sum"], suffix="_sum")
+            add(f"{item['name']}_max", "gauge", labels, item["max"])
+        for name, info in snapshot["caches"].items():
+            labels = [("cache", name)]
+            add("roc_cache_hits_total", "counter", labels, info["hits"])
+            add("roc_cache_misses_total", "counter", labels, info["misses"])
+            add("roc_cache_size", "gauge", labels, info["currsize"])
+            add("roc_cache_maxsize", "gauge", labels, info["maxsize"])
+        return "\n".join(line for lines in families.values() for line in lines) + "\n"
+
+
+metrics = Metrics(
+    enabled=os.environ.get("ROC_METRICS", "1") != "0",
+    slow=float(os.environ.get("ROC_SLOW_CALL", "0")) or None,
+)
+
+
+def timed(name, registry=None):
+    """
+    Decorator recording the wall time of every call as
+    ``roc_callback_seconds{callback=name}``, exceptions included
+
+    Calls longer than the ``slow`` threshold of the registry are logged
+    with their arguments.
+
+    :param str name: Label of the function
+    :param Metrics registry: Registry (default is ``metrics``)
+
+    :return: Decorator
+    :rtype: callable
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            reg = metrics if registry is None else registry
+            if not reg.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                reg.observe("roc_callback_seconds", elapsed, callback=name)
+                if reg.slow is not None and elapsed > reg.slow:
+                    reg.record_slow(name, elapsed, args, kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def install(server, path="/metrics", registry=None):
+    """
+    Serve the metrics on a Flask server
+
+    Prometheus text by default, JSON with ``?format=json``.
+
+    :param flask.Flask server: Flask server
+    :param str path: URL of the endpoint (default is ``/metrics``)
+    :param Metrics registry: Registry (default is ``metrics``)
+    """
+    # pylint: disable=import-outside-toplevel
+    from flask import Response, request
+
+    reg = metrics if registry is None else registry
+
+    def metrics_view():
+        if request.args.get("format") == "json":
+            return Response(json.dumps(reg.snapshot()), mimetype="application/json")
+        return Response(reg.prometheus(), mimetype="text/plain; version=0.0.4")
+
+    server.add_url_rule(path, "roc_metrics", metrics_view)
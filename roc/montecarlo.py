@@ -0,0 +1,348 @@
+"""
+Monte Carlo simulation of the Swerling target models
+
+This script requires that 'numpy' and 'scipy' be installed within the
+Python environment you are running this script in.
+
+Targets of the Swerling 0 to 4 models are simulated in complex Gaussian
+noise of unit power per pulse, with square-law noncoherent integration of
+``npulses`` pulses, and detected against the thresholds of
+``roc.tools.threshold``. The estimates are independent of the analytic
+kernels of ``roc.tools`` and serve to check them.
+
+With the total signal energy ``E`` of the integrated pulses, twice the
+integrated statistic is noncentral chi-square with ``2 npulses`` degrees
+of freedom and noncentrality ``2 E``, however ``E`` is spread over the
+pulses. The ``sum`` method draws it as ``(Z + sqrt(2 E))^2 + chi2(2 npulses
+- 1)``, three random numbers per trial whatever the number of pulses, with
+``E = npulses * snr * u`` and ``u`` the unit mean fluctuation of the model:
+
+* Swerling 0 and 5 - ``u = 1``
+* Swerling 1 - ``u ~ Gamma(1, 1)``, scan to scan
+* Swerling 2 - ``u ~ Gamma(npulses, 1 / npulses)``, pulse to pulse
+* Swerling 3 - ``u ~ Gamma(2, 1 / 2)``, scan to scan
+* Swerling 4 - ``u ~ Gamma(2 npulses, 1 / (2 npulses))``, pulse to pulse
+
+The ``pulses`` method simulates every pulse and noise sample instead, to
+check the ``sum`` method itself. Trials run in chunks, each with its own
+random stream spawned from one ``numpy.random.SeedSequence``, so results
+are reproducible and do not depend on the number of worker processes.
+
+This file can be imported as a module and contains the following
+functions:
+
+* pd_montecarlo - Monte Carlo estimate of the probability of detection
+                  (Pd) with its Wilson confidence interval
+* wilson_interval - Wilson score interval of a binomial proportion
+
+It also runs as a script, which checks ``roc.tools.roc_pd`` against the
+simulation around the branch switches of the kernels.
+
+---
+
+- Copyright (C) 2018 - PRESENT  radarsimx.com
+- E-mail: info@radarsimx.com
+- Website: https://radarsimx.com
+
+::
+
+    ██████╗  █████╗ ██████╗  █████╗ ██████╗ ███████╗██╗███╗   ███╗██╗  ██╗
+    ██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔════╝██║████╗ ████║╚██╗██╔╝
+    ██████╔╝███████║██║  ██║███████║██████╔╝███████╗██║██╔████╔██║ ╚███╔╝
+    ██╔══██╗██╔══██║██║  ██║██╔══██║██╔══██╗╚════██║██║██║╚██╔╝██║ ██╔██╗
+    ██║  ██║██║  ██║██████╔╝██║  ██║██║  ██║███████║██║██║ ╚═╝ ██║██╔╝ ██╗
+    ╚═╝  ╚═╝╚═╝  ╚═╝╚═════╝ ╚═╝  ╚═╝╚═╝  ╚═╝╚══════╝╚═╝╚═╝     ╚═╝╚═╝  ╚═╝
+
+"""
+
+import argparse
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+from scipy.special import ndtri  # pylint: disable=no-name-in-module
+
+from roc.tools import roc_pd, threshold
+
+# Trials of one chunk, each chunk holds ``(trials, len(snr))`` statistics
+CHUNK_SIZE = 2**14
+
+# Shape of the gamma distributed fluctuation, ``None`` for a constant
+# target, and whether it applies per pulse
+_FLUCTUATION = {
+    "Swerling 0": (None, False),
+    "Swerling 1": (1, False),
+    "Swerling 2": (1, True),
+    "Swerling 3": (2, False),
+    "Swerling 4": (2, True),
+    "Swerling 5": (None, False),
+}
+
+MonteCarloResult = namedtuple(
+    "MonteCarloResult",
+    ["pd", "lower", "upper", "detections", "trials", "seconds", "samples_per_second"],
+)
+MonteCarloResult.__doc__ = """
+Monte Carlo estimate of the probability of detection (Pd)
+
+:param pd: Estimated Pd
+:param lower: Lower end of the confidence interval
+:param upper: Upper end of the confidence interval
+:param detections: Number of detections
+:param int trials: Number of trials per cell
+:param float seconds: Wall time of the simulation
+:param float samples_per_second: Simulated (trial, SNR) samples per second
+"""
+
+
+def wilson_interval(detections, trials, confidence=0.95):
+    """
+    Wilson score interval of a binomial proportion
+
+    :param detections: Number of successes
+    :type detections: int or numpy.ndarray
+    :param int trials: Number of trials
+    :param float confidence: Confidence level (default is 0.95)
+
+    :return: Lower and upper ends of the interval
+    :rtype: tuple
+    """
+    z_var = ndtri(0.5 + confidence / 2)
+    ratio = np.asarray(detections) / trials
+    denom = 1 + z_var**2 / trials
+    center = (ratio + z_var**2 / (2 * trials)) / denom
+    half = (
+        z_var
+        * np.sqrt(ratio * (1 - ratio) / trials + z_var**2 / (4 * trials**2))
+        / denom
+    )
+    return center - half, center + half
+
+
+def _statistic_sum(stype, npulses, snr, size, rng):
+    """
+    Integrated statistics of ``size`` trials from the total signal energy
+
+    :return: Statistics of ``(size, len(snr))``
+    :rtype: numpy.ndarray
+    """
+    shape, per_pulse = _FLUCTUATION[stype]
+    if shape is None:
+        fluctuation = np.ones((size, 1))
+    else:
+        shape = shape * npulses if per_pulse else shape
+        fluctuation = rng.gamma(shape, 1 / shape, (size, 1))
+    z_var = rng.standard_normal((size, 1))
+    rest = rng.chisquare(2 * npulses - 1, (size, 1))
+
+    stat = np.sqrt((2 * npulses) * snr * fluctuation)
+    stat += z_var
+    stat **= 2
+    stat += rest
+    stat /= 2
+    return stat
+
+
+def _statistic_pulses(stype, npulses, snr, size, rng):
+    """
+    Integrated statistics of ``size`` trials, pulse by pulse
+
+    :return: Statistics of ``(size, len(snr))``
+    :rtype: numpy.ndarray
+    """
+    shape, per_pulse = _FLUCTUATION[stype]
+    if shape is None:
+        fluctuation = np.ones((size, 1))
+    else:
+        fluctuation = rng.gamma(shape, 1 / shape, (size, npulses if per_pulse else 1))
+    # Circular noise, the phase of the target does not matter
+    noise = rng.standard_normal((size, npulses)) + 1j * rng.standard_normal(
+        (size, npulses)
+    )
+    noise /= np.sqrt(2)
+
+    stat = np.empty((size, snr.size))
+    for s_idx, snr_item in enumerate(snr):
+        stat[:, s_idx] = np.sum(
+            np.abs(np.sqrt(snr_item * fluctuation) + noise) ** 2, axis=1
+        )
+    return stat
+
+
+def _chunk(stype, npulses, snr, thred, size, seed, method):
+    """
+    Detections of one chunk of trials, in a worker process or not
+
+    :return: Number of statistics above each threshold, of
+        ``(len(thred), len(snr))``
+    :rtype: numpy.ndarray
+    """
+    rng = np.random.default_rng(seed)
+    statistic = _statistic_pulses if method == "pulses" else _statistic_sum
+    stat = statistic(stype, npulses, snr, size, rng)
+    stat.sort(axis=0)
+    return np.stack(
+        [
+            size - np.searchsorted(stat[:, s_idx], thred, side="right")
+            for s_idx in range(snr.size)
+        ],
+        axis=1,
+    )
+
+
+def pd_montecarlo(
+    pfa,
+    snr,
+    npulses=1,
+    stype="Swerling 1",
+    trials=100000,
+    seed=None,
+    confidence=0.95,
+    method="sum",
+    workers=1,
+    chunk_size=CHUNK_SIZE,
+    thred=None,
+):
+    """
+    Estimate the probability of detection (Pd) by Monte Carlo simulation
+
+    The same trials are shared by all the thresholds and, for the ``sum``
+    method, all the SNR values, so the estimates along a ROC curve are
+    smooth.
+
+    :param pfa:
+        Probability of false alarm (Pfa), sets the threshold
+    :type pfa: float or numpy.1darray
+    :param snr:
+        Signal to noise ratio in decibel (dB)
+    :type snr: float or numpy.1darray
+    :param int npulses:
+        Number of pulses for integration (default is 1)
+    :param str stype:
+        Signal type, ``Swerling 0`` to ``Swerling 5`` (default is
+        ``Swerling 1``)
+    :param int trials:
+        Number of trials of every (Pfa, SNR) cell (default is 100000)
+    :param seed:
+        Seed of the random streams (default is None, fresh entropy)
+    :type seed: int or numpy.random.SeedSequence
+    :param float confidence:
+        Confidence level of the interval (default is 0.95)
+    :param str method:
+        ``sum`` (default) draws the integrated statistic directly, ``pulses``
+        simulates every pulse
+    :param int workers:
+        Number of worker processes (default is 1, in the calling process)
+    :param int chunk_size:
+        Number of trials of a chunk (default is ``CHUNK_SIZE``)
+    :param thred:
+        Detection thresholds, replacing the ones of ``pfa`` (default is
+        None, ``roc.tools.threshold(pfa, npulses)``)
+    :type thred: float or numpy.1darray
+
+    :return: Estimates shaped as by ``roc_pd``. ``None`` if ``stype`` is
+        not a Swerling model
+    :rtype: MonteCarloResult
+    """
+    if stype not in _FLUCTUATION:
+        return None
+
+    npulses = int(npulses)
+    snr = 10.0 ** (np.ravel(np.asarray(snr, dtype=float)) / 10.0)
+    if thred is None:
+        thred = threshold(np.ravel(np.asarray(pfa, dtype=float)), npulses)
+    thred = np.ravel(np.asarray(thred, dtype=float))
+
+    sizes = [chunk_size] * (trials // chunk_size)
+    if trials % chunk_size:
+        sizes.append(trials % chunk_size)
+    seeds = (
+        seed
+        if isinstance(seed, np.random.SeedSequence)
+        else np.random.SeedSequence(seed)
+    ).spawn(len(sizes))
+    args = [
+        (stype, npulses, snr, thred, size, seed_item, method)
+        for size, seed_item in zip(sizes, seeds)
+    ]
+
+    start = time.perf_counter()
+    if workers > 1 and len(args) > 1:
+        # pylint: disable=import-outside-toplevel
+        from roc.parallel import executor
+
+        pool = executor(workers)
+        results = [pool.submit(_chunk, *item) for item in args]
+        detections = sum(future.result() for future in results)
+    else:
+        detections = sum(_chunk(*item) for item in args)
+    seconds = time.perf_counter() - start
+
+    lower, upper = wilson_interval(detections, trials, confidence)
+    shape = [size for size in (thred.size, snr.size) if size > 1]
+    return MonteCarloResult(
+        np.reshape(detections / trials, shape)[()],
+        np.reshape(lower, shape)[()],
+        np.reshape(upper, shape)[()],
+        np.reshape(detections, shape)[()],
+        trials,
+        seconds,
+        trials * snr.size / seconds,
+    )
+
+
+def _check(trials, seed, workers, confidence):
+    """
+    Compare ``roc_pd`` with the simulation over ROC curves of every model
+    around the branch switches of the kernels
+
+    :return: Number of (Pfa, SNR) cells and of cells where ``roc_pd`` is
+        outside of the confidence interval
+    :rtype: tuple
+    """
+    pfa = np.logspace(-6, -2, 5)
+    snr = np.linspace(-5, 20, 26)
+    seeds = np.random.SeedSequence(seed).spawn(5 * 7)
+    total = outside = 0
+    print(f"{'model':<12}{'N':>5}{'outside':>9}{'max |err|':>11}{'samples/s':>12}")
+    for s_idx, stype in enumerate(f"Swerling {idx}" for idx in range(5)):
+        for n_idx, npulses in enumerate([1, 2, 3, 10, 49, 50, 51]):
+            result = pd_montecarlo(
+                pfa,
+                snr,
+                npulses,
+                stype,
+                trials=trials,
+                seed=seeds[s_idx * 7 + n_idx],
+                confidence=confidence,
+                workers=workers,
+            )
+            exact = roc_pd(pfa, snr, npulses, stype)
+            miss = (exact < result.lower) | (exact > result.upper)
+            total += miss.size
+            outside += int(np.sum(miss))
+            print(
+                f"{stype:<12}{npulses:>5}{int(np.sum(miss)):>9}"
+                f"{np.max(np.abs(exact - result.pd)):>11.2e}"
+                f"{result.samples_per_second:>12.3g}"
+            )
+    return total, outside
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check the Swerling kernels against a Monte Carlo simulation"
+    )
+    parser.add_argument("--trials", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--confidence", type=float, default=0.999)
+    args = parser.parse_args()
+
+    checked, missed = _check(args.trials, args.seed, args.workers, args.confidence)
+    print(
+        f"{missed} of {checked} cells outside of the {args.confidence:.1%} "
+        f"intervals, {(1 - args.confidence) * checked:.1f} expected"
+    )
+    sys.exit(1 if missed > max(3 * (1 - args.confidence) * checked, 3) else 0)
@@ -0,0 +1,387 @@
+"""
+Process pool evaluation of ROC grids
+
+This script requires that 'numpy' and 'scipy' be installed within the
+Python environment you are running this script in.
+
+The (stype, pfa, snr or pd, npulses) grid is split into blocks of similar
+cost, estimated per signal type and number of pulses. A block is a run of
+(pfa, snr or pd) cells over a contiguous range of the numbers of pulses,
+evaluated in one broadcast call, so the batching of ``roc_pd_nd`` and
+``roc_snr_nd`` over the numbers of pulses is kept. Blocks run on a process
+pool when every worker gets enough work to pay for the pickling of the
+blocks, results are assembled by position, so the output does not depend
+on the completion order. Small workloads and ``workers=1`` run in the
+calling process, in one broadcast call per signal type.
+
+This file can be imported as a module and contains the following
+functions:
+
+* roc_pd_parallel - ``roc_pd`` over a process pool
+* roc_snr_parallel - ``roc_snr`` over a process pool
+* iter_integration_gain_parallel - Integration gain curves of several
+                                   signal types, one process each
+* resolve_workers - Number of worker processes, ``ROC_WORKERS`` by default
+* executor - Process-wide pool of a number of workers
+* shutdown - Stop the process pools
+
+---
+
+- Copyright (C) 2018 - PRESENT  radarsimx.com
+- E-mail: info@radarsimx.com
+- Website: https://radarsimx.com
+
+::
+
+    ██████╗  █████╗ ██████╗  █████╗ ██████╗ ███████╗██╗███╗   ███╗██╗  ██╗
+    ██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔════╝██║████╗ ████║╚██╗██╔╝
+    ██████╔╝███████║██║  ██║███████║██████╔╝███████╗██║██╔████╔██║ ╚███╔╝
+    ██╔══██╗██╔══██║██║  ██║██╔══██║██╔══██╗╚════██║██║██║╚██╔╝██║ ██╔██╗
+    ██║  ██║██║  ██║██████╔╝██║  ██║██║  ██║███████║██║██║ ╚═╝ ██║██╔╝ ██╗
+    ╚═╝  ╚═╝╚═╝  ╚═╝╚═════╝ ╚═╝  ╚═╝╚═╝  ╚═╝╚══════╝╚═╝╚═╝     ╚═╝╚═╝  ╚═╝
+
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from roc.tools import (
+    _NON_FLUCTUATING,
+    _SWERLING_KERNELS,
+    integration_gain,
+    roc_pd_nd,
+    roc_snr_nd,
+)
+
+# Relative cost of one Pd evaluation, the series kernels grow with the
+# number of pulses below their branch cut
+_PD_COST = {
+    "Coherent": 1,
+    "Real": 1,
+    "Swerling 0": 4,
+    "Swerling 1": 3,
+    "Swerling 2": 2,
+    "Swerling 3": 3,
+    "Swerling 4": 4,
+    "Swerling 5": 4,
+}
+_SERIES_NPULSES = {"Swerling 0": 50, "Swerling 4": 49, "Swerling 5": 50}
+
+# Pd evaluations of one minimal SNR inversion, on average
+_SNR_EVALUATIONS = 12
+
+# Cost of one block, about 50 ms of work
+_CHUNK_COST = 2**20
+
+# Smallest work of one worker process for the pool to be used, the
+# workloads below run in the calling process
+_MIN_WORKER_COST = 4 * _CHUNK_COST
+
+_EXECUTORS = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+
+def resolve_workers(workers):
+    """
+    Number of worker processes, ``ROC_WORKERS`` or the CPU count by default
+    """
+    if workers is None:
+        workers = int(os.environ.get("ROC_WORKERS", os.cpu_count() or 1))
+    return max(int(workers), 1)
+
+
+def executor(workers):
+    """
+    Process-wide pool of ``workers`` processes
+
+    Workers are spawned rather than forked, which is safe from the
+    threads of a web server.
+    """
+    with _EXECUTORS_LOCK:
+        if workers not in _EXECUTORS:
+            _EXECUTORS[workers] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _EXECUTORS[workers]
+
+
+def shutdown():
+    """
+    Stop the process pools, they are started again on demand
+    """
+    with _EXECUTORS_LOCK:
+        for pool in _EXECUTORS.values():
+            pool.shutdown(cancel_futures=True)
+        _EXECUTORS.clear()
+
+
+atexit.register(shutdown)
+
+
+def _cost(stype, npulses):
+    """
+    Estimated cost of one Pd evaluation
+
+    :param str stype: Signal type
+    :param int npulses: Number of pulses
+
+    :return: Cost in units of a ``Coherent`` evaluation
+    :rtype: float
+    """
+    if stype in _SERIES_NPULSES and npulses <= _SERIES_NPULSES[stype]:
+        return _PD_COST[stype] + npulses
+    return _PD_COST[stype]
+
+
+def _pd_task(stype, pfa, snr, npulses):
+    """
+    One block of ``roc_pd_parallel``
+    """
+    return roc_pd_nd(pfa, snr, npulses, stype)
+
+
+def _snr_task(stype, pfa, pd, npulses):
+    """
+    One block of ``roc_snr_parallel``
+    """
+    return roc_snr_nd(pfa, pd, npulses, stype)
+
+
+def _blocks(cost, cells):
+    """
+    Blocks of a (cells, npulses) grid of one signal type
+
+    The numbers of pulses are split into contiguous ranges of at most
+    ``_CHUNK_COST`` per cell, and the cells into runs that keep a block
+    within ``_CHUNK_COST``.
+
+    :param numpy.ndarray cost: Cost of one cell for each number of pulses
+    :param int cells: Number of (pfa, snr or pd) cells
+
+    :return: ``(cell, pulses, cost)`` of each block, the slices of the
+        cells and of the numbers of pulses and the cost of the block
+    :rtype: list
+    """
+    blocks = []
+    n_start = 0
+    while n_start < cost.size:
+        n_stop = n_start + max(
+            int(np.searchsorted(np.cumsum(cost[n_start:]), _CHUNK_COST, "right")), 1
+        )
+        range_cost = float(np.sum(cost[n_start:n_stop]))
+        step = max(int(_CHUNK_COST // range_cost), 1)
+        for start in range(0, cells, step):
+            stop = min(start + step, cells)
+            blocks.append(
+                (
+                    slice(start, stop),
+                    slice(n_start, n_stop),
+                    range_cost * (stop - start),
+                )
+            )
+        n_start = n_stop
+    return blocks
+
+
+def _evaluate(task, evaluations, pfa, value, npulses, stype, workers):
+    """
+    Evaluate ``task`` over the (stype, pfa, value, npulses) grid in blocks
+
+    :param callable task: ``task(stype, pfa, value, npulses)``, broadcast
+        over the axes of its arrays
+    :param int evaluations: Pd evaluations per cell
+    :param numpy.ndarray pfa: Probability of false alarm, 1-D
+    :param numpy.ndarray value: SNR or Pd, 1-D
+    :param numpy.ndarray npulses: Number of pulses, 1-D
+    :param list stype: Signal types
+    :param int workers: Number of worker processes
+
+    :return: Values of ``(len(stype), len(pfa), len(value), len(npulses))``
+    :rtype: numpy.ndarray
+    """
+    pfa_cells = np.repeat(pfa, value.size)[:, np.newaxis]
+    value_cells = np.tile(value, pfa.size)[:, np.newaxis]
+    cells = pfa_cells.shape[0]
+
+    blocks = []
+    for s_idx, stype_item in enumerate(stype):
+        cost = evaluations * np.array(
+            [_cost(stype_item, n_item) for n_item in npulses], dtype=float
+        )
+        blocks += [(s_idx,) + block for block in _blocks(cost, cells)]
+
+    out = np.zeros((len(stype), cells, npulses.size))
+    total = sum(block[-1] for block in blocks)
+    workers = min(workers, len(blocks))
+
+    def args(s_idx, cell, pulses):
+        return (
+            stype[s_idx],
+            pfa_cells[cell],
+            value_cells[cell],
+            npulses[np.newaxis, pulses],
+        )
+
+    if workers <= 1 or total < workers * _MIN_WORKER_COST:
+        # One broadcast call per signal type, as by ``roc_pd`` and ``roc_snr``
+        for s_idx, stype_item in enumerate(stype):
+            out[s_idx] = task(
+                stype_item,
+                pfa[:, np.newaxis, np.newaxis],
+                value[np.newaxis, :, np.newaxis],
+                npulses[np.newaxis, np.newaxis, :],
+            ).reshape(cells, npulses.size)
+    else:
+        pool = executor(workers)
+        futures = {
+            pool.submit(task, *args(s_idx, cell, pulses)): (s_idx, cell, pulses)
+            for s_idx, cell, pulses, _ in blocks
+        }
+        for future in as_completed(futures):
+            s_idx, cell, pulses = futures[future]
+            out[s_idx, cell, pulses] = future.result()
+
+    return out.reshape(len(stype), pfa.size, value.size, npulses.size)
+
+
+def _parallel(task, evaluations, pfa, value, npulses, stype, workers):
+    """
+    Shared front end of ``roc_pd_parallel`` and ``roc_snr_parallel``
+    """
+    stype_list = [stype] if isinstance(stype, str) else list(stype)
+    for stype_item in stype_list:
+        if stype_item not in _NON_FLUCTUATING and stype_item not in _SWERLING_KERNELS:
+            return None
+
+    axes = [
+        np.ravel(np.asarray(pfa, dtype=float)),
+        np.ravel(np.asarray(value, dtype=float)),
+        np.ravel(npulses),
+    ]
+    out = _evaluate(task, evaluations, *axes, stype_list, resolve_workers(workers))
+
+    shape = [np.size(axis) for axis in axes if np.size(axis) > 1]
+    if isinstance(stype, str):
+        return np.reshape(out[0], shape)[()]
+    return np.reshape(out, [len(stype_list)] + shape)
+
+
+def roc_pd_parallel(pfa, snr, npulses=1, stype="Coherent", workers=None):
+    """
+    Calculate probability of detection (Pd) in receiver operating
+    characteristic (ROC) over a process pool
+
+    Same results as ``roc.tools.roc_pd``.
+
+    :param pfa:
+        Probability of false alarm (Pfa)
+    :type pfa: float or numpy.1darray
+    :param snr:
+        Signal to noise ratio in decibel (dB)
+    :type snr: float or numpy.1darray
+    :param npulses:
+        Number of pulses for integration (default is 1)
+    :type npulses: int or numpy.1darray
+    :param stype:
+        Signal type (default is ``Coherent``), see ``roc_pd``, or a list
+        of signal types
+    :type stype: str or list
+    :param int workers:
+        Number of worker processes (default is the ``ROC_WORKERS``
+        environment variable, or the number of CPUs)
+
+    :return: probability of detection (Pd), shaped as by ``roc_pd``, with
+        a leading axis for the signal types if ``stype`` is a list.
+        ``None`` if a signal type is unknown
+    :rtype: float or numpy.ndarray
+    """
+    return _parallel(_pd_task, 1, pfa, snr, npulses, stype, workers)
+
+
+def roc_snr_parallel(pfa, pd, npulses=1, stype="Coherent", workers=None):
+    """
+    Calculate the minimal SNR for certain probability of detection (Pd)
+    and probability of false alarm (Pfa) over a process pool
+
+    Same results as ``roc.tools.roc_snr``.
+
+    :param pfa:
+        Probability of false alarm (Pfa)
+    :type pfa: float or numpy.1darray
+    :param pd:
+         Probability of detection (Pd)
+    :type pd: float or numpy.1darray
+    :param npulses:
+        Number of pulses for integration (default is 1)
+    :type npulses: int or numpy.1darray
+    :param stype:
+        Signal type (default is ``Coherent``), see ``roc_snr``, or a list
+        of signal types
+    :type stype: str or list
+    :param int workers:
+        Number of worker processes (default is the ``ROC_WORKERS``
+        environment variable, or the number of CPUs)
+
+    :return: Minimal signal to noise ratio in decibel (dB), shaped as by
+        ``roc_snr``, with a leading axis for the signal types if ``stype``
+        is a list. ``None`` if a signal type is unknown
+    :rtype: float or numpy.ndarray
+    """
+    return _parallel(_snr_task, _SNR_EVALUATIONS, pfa, pd, npulses, stype, workers)
+
+
+def iter_integration_gain_parallel(pfa, pd, npulses, stype, workers=None):
+    """
+    Calculate the non-coherent integration gain curves of several signal
+    types, one worker process each
+
+    Same interface as ``roc.tools.iter_integration_gain`` with a list of
+    signal types, the curves arrive whole, as their signal type completes.
+
+    :param float pfa:
+        Probability of false alarm (Pfa)
+    :param float pd:
+         Probability of detection (Pd)
+    :param npulses:
+        Maximal number of pulses ``N``, or a 1-D array of increasing
+        numbers of pulses
+    :type npulses: int or numpy.1darray
+    :param list stype:
+        Signal types, see ``roc_snr``
+    :param int workers:
+        Number of worker processes (default is the ``ROC_WORKERS``
+        environment variable, or the number of CPUs)
+
+    :return: Generator of ``(solved, gain, snr)``, 2-D arrays of
+        ``(len(stype), len(npulses))``, ``nan`` for the signal types that
+        are not complete yet
+    :rtype: generator
+    """
+    if np.isscalar(npulses):
+        npulses = np.arange(1, npulses + 1)
+    npulses = np.ravel(npulses)
+
+    solved = np.zeros((len(stype), npulses.size), dtype=bool)
+    gain = np.full((len(stype), npulses.size), np.nan)
+    snr = np.full((len(stype), npulses.size), np.nan)
+
+    pool = executor(resolve_workers(workers))
+    futures = {
+        pool.submit(integration_gain, pfa, pd, npulses, stype_item): s_idx
+        for s_idx, stype_item in enumerate(stype)
+    }
+    try:
+        for future in as_completed(futures):
+            s_idx = futures[future]
+            gain[s_idx], snr[s_idx] = future.result()
+            solved[s_idx] = True
+            yield solved.copy(), gain.copy(), snr.copy()
+    finally:
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,329 @@
+"""
+Chunked evaluation of large ROC grids
+
+This script requires that 'numpy' and 'scipy' be installed within the
+Python environment you are running this script in.
+
+The (stype, pfa, snr, npulses) grid is walked in row-major order, in
+blocks of about ``block_size`` cells. Blocks are aligned to the grid, a
+block holds whole rows of Pfa or a run of SNR values of a single Pfa, so
+each one is a single broadcast ``roc_pd_nd`` call and the memory in use
+is bounded by the block, not by the grid.
+
+This file can be imported as a module and contains the following
+functions:
+
+* iter_roc_pd - Generator of the Pd blocks of a grid, optionally written
+                into an output array
+* sweep_roc_pd - Pd of a grid written block by block into a
+                 memory-mapped ``.npy`` file, resumable after an
+                 interruption
+
+---
+
+- Copyright (C) 2018 - PRESENT  radarsimx.com
+- E-mail: info@radarsimx.com
+- Website: https://radarsimx.com
+
+::
+
+    ██████╗  █████╗ ██████╗  █████╗ ██████╗ ███████╗██╗███╗   ███╗██╗  ██╗
+    ██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔════╝██║████╗ ████║╚██╗██╔╝
+    ██████╔╝███████║██║  ██║███████║██████╔╝███████╗██║██╔████╔██║ ╚███╔╝
+    ██╔══██╗██╔══██║██║  ██║██╔══██║██╔══██╗╚════██║██║██║╚██╔╝██║ ██╔██╗
+    ██║  ██║██║  ██║██████╔╝██║  ██║██║  ██║███████║██║██║ ╚═╝ ██║██╔╝ ██╗
+    ╚═╝  ╚═╝╚═╝  ╚═╝╚═════╝ ╚═╝  ╚═╝╚═╝  ╚═╝╚══════╝╚═╝╚═╝     ╚═╝╚═╝  ╚═╝
+
+"""
+
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from roc.tools import _NON_FLUCTUATING, _SWERLING_KERNELS, roc_pd_nd
+
+# Cells of one block, 8 MB of float64
+BLOCK_SIZE = 2**20
+
+# Version of the progress file format
+_PROGRESS_VERSION = 1
+
+Block = namedtuple("Block", ["start", "stop", "total", "index", "pd"])
+Block.__doc__ = """
+One evaluated block of a grid
+
+:param int start: Flat index of the first cell of the block
+:param int stop: Flat index after the last cell of the block
+:param int total: Number of cells of the grid
+:param tuple index: Slices of the block in the
+    ``(stype, pfa, snr, npulses)`` grid
+:param numpy.ndarray pd: Pd of the block, shaped by ``index``
+"""
+
+
+def _axes(pfa, snr, npulses, stype):
+    """
+    Grid axes, ``None`` if a signal type is unknown
+    """
+    stype = [stype] if isinstance(stype, str) else list(stype)
+    for stype_item in stype:
+        if stype_item not in _NON_FLUCTUATING and stype_item not in _SWERLING_KERNELS:
+            return None
+    return (
+        np.ravel(np.asarray(pfa, dtype=float)),
+        np.ravel(np.asarray(snr, dtype=float)),
+        np.ravel(npulses),
+        stype,
+    )
+
+
+def _blocks(shape, block_size):
+    """
+    Blocks of a ``(stype, pfa, snr, npulses)`` grid in row-major order
+
+    :param tuple shape: Shape of the grid
+    :param int block_size: Target number of cells of a block, a block
+        holds all the numbers of pulses of at least one (Pfa, SNR) pair
+
+    :return: Generator of ``(start, stop, index)``
+    :rtype: generator
+    """
+    n_stype, n_pfa, n_snr, n_pulses = shape
+    row = n_snr * n_pulses
+    start = 0
+    for s_idx in range(n_stype):
+        if row <= block_size:
+            step = max(block_size // max(row, 1), 1)
+            for p_idx in range(0, n_pfa, step):
+                p_end = min(p_idx + step, n_pfa)
+                stop = start + (p_end - p_idx) * row
+                yield start, stop, (
+                    slice(s_idx, s_idx + 1),
+                    slice(p_idx, p_end),
+                    slice(0, n_snr),
+                    slice(0, n_pulses),
+                )
+                start = stop
+        else:
+            step = max(block_size // max(n_pulses, 1), 1)
+            for p_idx in range(n_pfa):
+                for q_idx in range(0, n_snr, step):
+                    q_end = min(q_idx + step, n_snr)
+                    stop = start + (q_end - q_idx) * n_pulses
+                    yield start, stop, (
+                        slice(s_idx, s_idx + 1),
+                        slice(p_idx, p_idx + 1),
+                        slice(q_idx, q_end),
+                        slice(0, n_pulses),
+                    )
+                    start = stop
+
+
+def _iter_blocks(axes, block_size, start, out, dtype):
+    """
+    Evaluate the blocks of a grid from the flat index ``start`` on
+    """
+    pfa, snr, npulses, stype = axes
+    shape = (len(stype), pfa.size, snr.size, npulses.size)
+    total = int(np.prod(shape))
+    for b_start, b_stop, index in _blocks(shape, block_size):
+        if b_stop <= start:
+            continue
+        _, p_slice, q_slice, n_slice = index
+        target = None if out is None else out[index][0]
+        pd = roc_pd_nd(
+            pfa[p_slice, np.newaxis, np.newaxis],
+            snr[np.newaxis, q_slice, np.newaxis],
+            npulses[np.newaxis, np.newaxis, n_slice],
+            stype[index[0].start],
+            out=target,
+            dtype=dtype,
+        )
+        yield Block(b_start, b_stop, total, index, pd[np.newaxis])
+
+
+def iter_roc_pd(
+    pfa, snr, npulses=1, stype="Coherent", block_size=BLOCK_SIZE, out=None, dtype=None
+):
+    """
+    Calculate probability of detection (Pd) over a
+    ``(stype, pfa, snr, npulses)`` grid, one block at a time
+
+    Blocks are computed as they are consumed, stopping the iteration
+    stops the evaluation.
+
+    :param pfa:
+        Probability of false alarm (Pfa)
+    :type pfa: float or numpy.1darray
+    :param snr:
+        Signal to noise ratio in decibel (dB)
+    :type snr: float or numpy.1darray
+    :param npulses:
+        Number of pulses for integration (default is 1)
+    :type npulses: int or numpy.1darray
+    :param stype:
+        Signal type (default is ``Coherent``), see ``roc_pd``, or a list
+        of signal types
+    :type stype: str or list
+    :param int block_size:
+        Target number of cells of a block (default is ``BLOCK_SIZE``)
+    :param numpy.ndarray out:
+        Array of ``(len(stype), len(pfa), len(snr), len(npulses))`` the
+        blocks are written to, a ``numpy.memmap`` for example (default is
+        None, every block is a new array)
+    :param dtype:
+        Data type of the new blocks, ignored with ``out`` (default is
+        None, float64)
+
+    :raises ValueError: if the shape of ``out`` differs from the grid
+
+    :return: Generator of ``Block``, the ``pd`` of a block is a view of
+        ``out`` if given. ``None`` if a signal type is unknown
+    :rtype: generator
+    """
+    axes = _axes(pfa, snr, npulses, stype)
+    if axes is None:
+        return None
+
+    shape = (len(axes[3]), axes[0].size, axes[1].size, axes[2].size)
+    if out is not None and out.shape != shape:
+        raise ValueError(f"out has shape {out.shape}, the grid has shape {shape}")
+
+    return _iter_blocks(axes, int(block_size), 0, out, dtype)
+
+
+def _fingerprint(axes, dtype):
+    """
+    Digest of a grid and its output data type
+    """
+    pfa, snr, npulses, stype = axes
+    digest = hashlib.sha256()
+    for axis in (pfa, snr, np.asarray(npulses, dtype=float)):
+        digest.update(np.ascontiguousarray(axis).tobytes())
+        digest.update(b"|")
+    digest.update("\n".join(stype).encode())
+    digest.update(np.dtype(dtype).str.encode())
+    return digest.hexdigest()
+
+
+def _write_progress(path, progress):
+    """
+    Replace the progress file atomically
+    """
+    temp = f"{path}.tmp"
+    with open(temp, "w", encoding="utf-8") as file:
+        json.dump(progress, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp, path)
+
+
+def sweep_roc_pd(
+    path,
+    pfa,
+    snr,
+    npulses=1,
+    stype="Coherent",
+    block_size=BLOCK_SIZE,
+    dtype=np.float64,
+    resume=True,
+):
+    """
+    Calculate probability of detection (Pd) over a
+    ``(stype, pfa, snr, npulses)`` grid into a memory-mapped ``.npy`` file
+
+    The blocks are written in place into the file, which is created with
+    the full shape of the grid. After each block the file is flushed and
+    the number of completed cells is recorded in ``<path>.progress``, so
+    an interrupted sweep continues where it stopped when it is started
+    again with the same grid. The result reads back with
+    ``numpy.load(path, mmap_mode="r")``.
+
+    :param str path:
+        Output ``.npy`` file
+    :param pfa:
+        Probability of false alarm (Pfa)
+    :type pfa: float or numpy.1darray
+    :param snr:
+        Signal to noise ratio in decibel (dB)
+    :type snr: float or numpy.1darray
+    :param npulses:
+        Number of pulses for integration (default is 1)
+    :type npulses: int or numpy.1darray
+    :param stype:
+        Signal type (default is ``Coherent``), see ``roc_pd``, or a list
+        of signal types
+    :type stype: str or list
+    :param int block_size:
+        Target number of cells of a block (default is ``BLOCK_SIZE``),
+        a resumed sweep keeps the block size it was started with
+    :param dtype:
+        Data type of the file (default is float64)
+    :param bool resume:
+        Continue a sweep of the same grid found at ``path`` (default is
+        True), otherwise start over
+
+    :raises ValueError: if ``resume`` and ``path`` holds a sweep of another
+        grid or data type
+    :raises FileExistsError: if ``resume`` and ``path`` exists without a
+        progress file, it was not written by ``sweep_roc_pd``
+
+    :return: Generator of the newly computed ``Block``, empty if the
+        sweep is already complete. ``None`` if a signal type is unknown
+    :rtype: generator
+    """
+    axes = _axes(pfa, snr, npulses, stype)
+    if axes is None:
+        return None
+
+    shape = (len(axes[3]), axes[0].size, axes[1].size, axes[2].size)
+    dtype = np.dtype(dtype)
+    progress_path = f"{path}.progress"
+    progress = {
+        "version": _PROGRESS_VERSION,
+        "fingerprint": _fingerprint(axes, dtype),
+        "shape": list(shape),
+        "dtype": dtype.str,
+        "block_size": int(block_size),
+        "done": 0,
+    }
+
+    if resume and os.path.exists(path):
+        if not os.path.exists(progress_path):
+            raise FileExistsError(f"{path} exists and has no progress file")
+        with open(progress_path, encoding="utf-8") as file:
+            previous = json.load(file)
+        if previous.get("fingerprint") != progress["fingerprint"]:
+            raise ValueError(f"{path} holds a sweep of another grid or data type")
+        progress = previous
+
+    return _sweep(path, progress_path, axes, progress)
+
+
+def _sweep(path, progress_path, axes, progress):
+    """
+    Generator behind ``sweep_roc_pd``
+    """
+    shape = tuple(progress["shape"])
+    if progress["done"] > 0:
+        out = np.lib.format.open_memmap(path, mode="r+")
+    else:
+        out = np.lib.format.open_memmap(
+            path, mode="w+", dtype=np.dtype(progress["dtype"]), shape=shape
+        )
+        _write_progress(progress_path, progress)
+
+    try:
+        for block in _iter_blocks(
+            axes, progress["block_size"], progress["done"], out, None
+        ):
+            out.flush()
+            progress["done"] = block.stop
+            _write_progress(progress_path, progress)
+            yield block
+    finally:
+        out.flush()
+        del out
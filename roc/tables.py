@@ -0,0 +1,479 @@
+"""
+Precomputed ROC lookup tables
+
+This script requires that 'numpy' and 'scipy' be installed within the
+Python environment you are running this script in.
+
+The tables hold the minimal SNR over (stype, npulses, log10 pfa, probit pd)
+and the Pd over (stype, npulses, log10 pfa, snr), on regular grids in
+every axis but the number of pulses, which is a list of exact values.
+They are saved as versioned ``.npy`` files next to a JSON metadata file,
+and loaded with memory mapping, so every process of a server shares the
+same pages.
+
+Build them once with::
+
+    python -m roc.tables [directory]
+
+This file can be imported as a module and contains the following
+functions and classes:
+
+* RocTables - Memory-mapped tables with cubic interpolation
+* build_tables - Compute and save the tables
+* load_tables - Process-wide tables used by ``method="table"``
+
+---
+
+- Copyright (C) 2018 - PRESENT  radarsimx.com
+- E-mail: info@radarsimx.com
+- Website: https://radarsimx.com
+
+::
+
+    ██████╗  █████╗ ██████╗  █████╗ ██████╗ ███████╗██╗███╗   ███╗██╗  ██╗
+    ██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔════╝██║████╗ ████║╚██╗██╔╝
+    ██████╔╝███████║██║  ██║███████║██████╔╝███████╗██║██╔████╔██║ ╚███╔╝
+    ██╔══██╗██╔══██║██║  ██║██╔══██║██╔══██╗╚════██║██║██║╚██╔╝██║ ██╔██╗
+    ██║  ██║██║  ██║██████╔╝██║  ██║██║  ██║███████║██║██║ ╚═╝ ██║██╔╝ ██╗
+    ╚═╝  ╚═╝╚═╝  ╚═╝╚═════╝ ╚═╝  ╚═╝╚═╝  ╚═╝╚══════╝╚═╝╚═╝     ╚═╝╚═╝  ╚═╝
+
+"""
+
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+from scipy.special import erfc, erfcinv  # pylint: disable=no-name-in-module
+
+# Layout version of the files, bumped on any incompatible change
+TABLE_VERSION = 1
+
+# Directory searched by ``load_tables`` when ``ROC_TABLE_DIR`` is not set
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(__file__), "data")
+
+# Signal types answered from the table of another signal type
+_ALIASES = {"Swerling 5": "Swerling 0"}
+
+# Largest probit stored, Pd within about 1e-16 of 0 or 1
+_PROBIT_MAX = 8.2
+
+# Smallest distance between the probits of Pd and Pfa answered from the
+# SNR table, the minimal SNR drops steeply as Pd approaches Pfa
+_MIN_SEPARATION = 1.5
+
+# Fractions of a cell where the interpolation error is measured, in each
+# interpolated axis
+_ERROR_SAMPLES = (0.25, 0.5, 0.75)
+
+# Factor applied to the largest measured error to make it a bound, the
+# error between the samples is up to 1.2 times larger
+_ERROR_MARGIN = 1.5
+
+_TABLES = {}
+_TABLES_LOCK = threading.Lock()
+
+
+def _probit(pd):
+    """
+    Inverse of the standard normal distribution function
+    """
+    return -np.sqrt(2) * erfcinv(2 * pd)
+
+
+def _inv_probit(z_var):
+    """
+    Standard normal distribution function
+    """
+    return erfc(-z_var / np.sqrt(2)) / 2
+
+
+def _file_names(version):
+    """
+    Names of the metadata, SNR table and Pd table files of a version
+    """
+    return (
+        f"roc_tables_v{version}.json",
+        f"roc_snr_v{version}.npy",
+        f"roc_pd_v{version}.npy",
+    )
+
+
+def _grid(start, stop, step):
+    """
+    Regular grid description, ``stop`` is included when on the grid
+    """
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    return {"start": float(start), "step": float(step), "count": count}
+
+
+def _grid_points(grid):
+    """
+    Points of a regular grid description
+    """
+    return grid["start"] + grid["step"] * np.arange(grid["count"])
+
+
+def _cubic(grid, coord):
+    """
+    First node and weights of the 4 point Lagrange stencil on a regular grid
+
+    The stencil is centered on the interval of ``coord`` and shifted inside
+    the grid at the edges.
+
+    :param dict grid: Regular grid description
+    :param numpy.ndarray coord: Coordinates inside the grid
+
+    :return: ``(first, weights)``, the index of the first node and the
+        weights of the 4 nodes along a trailing axis
+    :rtype: tuple
+    """
+    pos = (coord - grid["start"]) / grid["step"]
+    first = np.clip(np.floor(pos).astype(int) - 1, 0, grid["count"] - 4)
+    s_var = (pos - first)[..., np.newaxis]
+    weights = np.concatenate(
+        [
+            -(s_var - 1) * (s_var - 2) * (s_var - 3) / 6,
+            s_var * (s_var - 2) * (s_var - 3) / 2,
+            -s_var * (s_var - 1) * (s_var - 3) / 2,
+            s_var * (s_var - 1) * (s_var - 2) / 6,
+        ],
+        axis=-1,
+    )
+    return first, weights
+
+
+def _inside(grid, coord):
+    """
+    Coordinates covered by a regular grid
+    """
+    stop = grid["start"] + grid["step"] * (grid["count"] - 1)
+    return (coord >= grid["start"] - 1e-9) & (coord <= stop + 1e-9)
+
+
+class RocTables:
+    """
+    Memory-mapped ROC tables with cubic interpolation
+
+    :param str directory:
+        Directory of the table files
+    :param int version:
+        Layout version of the files (default is ``TABLE_VERSION``)
+
+    :raises FileNotFoundError: if the files of ``version`` are missing
+    :raises ValueError: if the metadata does not match ``version``
+    """
+
+    def __init__(self, directory, version=TABLE_VERSION):
+        meta_name, snr_name, pd_name = _file_names(version)
+        with open(os.path.join(directory, meta_name), encoding="utf-8") as file:
+            self.meta = json.load(file)
+        if self.meta.get("version") != version:
+            raise ValueError(
+                f"table version {self.meta.get('version')} does not match {version}"
+            )
+
+        self.directory = directory
+        self.snr_table = np.load(os.path.join(directory, snr_name), mmap_mode="r")
+        self.pd_table = np.load(os.path.join(directory, pd_name), mmap_mode="r")
+        self._stype = {name: idx for idx, name in enumerate(self.meta["stype"])}
+        self._npulses = np.array(self.meta["npulses"])
+
+    @property
+    def error_snr(self):
+        """
+        Bound of the interpolation error of the minimal SNR in dB, see
+        ``build_tables``
+        """
+        return self.meta["error_snr"]
+
+    @property
+    def error_pd(self):
+        """
+        Bound of the interpolation error of the Pd, see ``build_tables``
+        """
+        return self.meta["error_pd"]
+
+    def _locate(self, npulses, stype):
+        """
+        Table indices of the number of pulses and of the signal type
+
+        :return: ``(n_idx, s_idx, found)``
+        :rtype: tuple
+        """
+        s_idx = self._stype.get(_ALIASES.get(stype, stype), -1)
+        n_idx = np.clip(
+            np.searchsorted(self._npulses, npulses), 0, self._npulses.size - 1
+        )
+        found = (self._npulses[n_idx] == npulses) & (s_idx >= 0)
+        return n_idx, s_idx, found
+
+    def _interpolate(self, table, s_idx, n_idx, grid_1, coord_1, grid_2, coord_2):
+        """
+        Bicubic interpolation of ``table[s_idx, n_idx]`` over two regular
+        grids, 1-D inputs
+        """
+        first_1, weights_1 = _cubic(grid_1, coord_1)
+        first_2, weights_2 = _cubic(grid_2, coord_2)
+
+        val = np.zeros(np.shape(coord_1))
+        for off_1 in range(4):
+            row = np.zeros(np.shape(coord_1))
+            for off_2 in range(4):
+                row += (
+                    table[s_idx, n_idx, first_1 + off_1, first_2 + off_2]
+                    * weights_2[:, off_2]
+                )
+            val += row * weights_1[:, off_1]
+        return val
+
+    def snr(self, pfa, pd, npulses, stype):
+        """
+        Interpolated minimal SNR
+
+        :param numpy.ndarray pfa: Probability of false alarm (Pfa)
+        :param numpy.ndarray pd: Probability of detection (Pd)
+        :param numpy.ndarray npulses: Number of pulses for integration
+        :param str stype: Signal type, see ``roc.tools.roc_snr``
+
+        :return: ``(snr, inside)``, the minimal SNR in dB with the
+            broadcast shape of the inputs and the mask of the cells
+            covered by the table, ``nan`` outside. Pd too close to Pfa,
+            see ``_MIN_SEPARATION``, is outside
+        :rtype: tuple
+        """
+        pfa, pd, npulses = np.broadcast_arrays(pfa, pd, npulses)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            coord_1 = np.log10(pfa).ravel()
+            coord_2 = _probit(pd).ravel()
+            separation = coord_2 - _probit(pfa).ravel()
+        n_idx, s_idx, inside = self._locate(npulses.ravel(), stype)
+        inside &= (
+            _inside(self.meta["log_pfa"], coord_1)
+            & _inside(self.meta["probit_pd"], coord_2)
+            & (separation >= _MIN_SEPARATION)
+        )
+
+        snr = np.full(inside.shape, np.nan)
+        snr[inside] = self._interpolate(
+            self.snr_table,
+            s_idx,
+            n_idx[inside],
+            self.meta["log_pfa"],
+            coord_1[inside],
+            self.meta["probit_pd"],
+            coord_2[inside],
+        )
+        # Cells next to an unsolved grid point
+        inside &= np.isfinite(snr)
+        return snr.reshape(pd.shape), inside.reshape(pd.shape)
+
+    def pd(self, pfa, snr, npulses, stype):
+        """
+        Interpolated probability of detection
+
+        :param numpy.ndarray pfa: Probability of false alarm (Pfa)
+        :param numpy.ndarray snr: Signal to noise ratio in dB
+        :param numpy.ndarray npulses: Number of pulses for integration
+        :param str stype: Signal type, see ``roc.tools.roc_pd``
+
+        :return: ``(pd, inside)``, the Pd with the broadcast shape of the
+            inputs and the mask of the cells covered by the table, ``nan``
+            outside
+        :rtype: tuple
+        """
+        pfa, snr, npulses = np.broadcast_arrays(pfa, snr, npulses)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            coord_1 = np.log10(pfa).ravel()
+        coord_2 = snr.ravel()
+        n_idx, s_idx, inside = self._locate(npulses.ravel(), stype)
+        inside &= _inside(self.meta["log_pfa"], coord_1) & _inside(
+            self.meta["snr"], coord_2
+        )
+
+        pd = np.full(inside.shape, np.nan)
+        pd[inside] = _inv_probit(
+            self._interpolate(
+                self.pd_table,
+                s_idx,
+                n_idx[inside],
+                self.meta["log_pfa"],
+                coord_1[inside],
+                self.meta["snr"],
+                coord_2[inside],
+            )
+        )
+        return pd.reshape(snr.shape), inside.reshape(snr.shape)
+
+
+def build_tables(
+    directory=DEFAULT_DIRECTORY,
+    stype=(
+        "Coherent",
+        "Real",
+        "Swerling 0",
+        "Swerling 1",
+        "Swerling 2",
+        "Swerling 3",
+        "Swerling 4",
+    ),
+    npulses=range(1, 65),
+    log_pfa=(-12, -1, 0.25),
+    probit_pd=(-2.4, 4.0, 0.1),
+    snr=(-20, 40, 0.25),
+):
+    """
+    Compute the tables and save them in ``directory``
+
+    The error bounds stored in the metadata are the largest differences
+    between the interpolation and the exact values over a 3 x 3 sample of
+    every cell, ``_ERROR_SAMPLES`` in both interpolated axes, times the
+    safety factor ``_ERROR_MARGIN``.
+
+    :param str directory:
+        Output directory, created if missing (default is ``roc/data``)
+    :param stype:
+        Signal types, ``Swerling 5`` is answered from ``Swerling 0``
+    :type stype: list or tuple
+    :param npulses:
+        Exact numbers of pulses covered (default is 1 to 64)
+    :type npulses: list or range
+    :param tuple log_pfa:
+        ``(start, stop, step)`` of the log10 Pfa grid
+    :param tuple probit_pd:
+        ``(start, stop, step)`` of the probit Pd grid of the SNR table,
+        the default covers Pd from about 0.008 to 0.99997
+    :param tuple snr:
+        ``(start, stop, step)`` of the SNR grid of the Pd table, in dB
+
+    :return: The saved tables, memory-mapped
+    :rtype: RocTables
+    """
+    # pylint: disable=import-outside-toplevel
+    from roc.tools import roc_pd_nd, roc_snr_nd
+
+    meta = {
+        "version": TABLE_VERSION,
+        "stype": list(stype),
+        "npulses": [int(n) for n in np.unique(npulses)],
+        "log_pfa": _grid(*log_pfa),
+        "probit_pd": _grid(*probit_pd),
+        "snr": _grid(*snr),
+    }
+    for grid in ("log_pfa", "probit_pd", "snr"):
+        if meta[grid]["count"] < 4:
+            raise ValueError(f"{grid} needs at least 4 grid points")
+
+    n_col = np.array(meta["npulses"])[:, np.newaxis, np.newaxis]
+    pfa = 10.0 ** _grid_points(meta["log_pfa"])[:, np.newaxis]
+    fractions = np.array(_ERROR_SAMPLES)
+    log_pfa_cells = _grid_points(meta["log_pfa"])[:-1]
+    probit_in = (
+        _grid_points(meta["probit_pd"])[:-1, np.newaxis] + probit_pd[2] * fractions
+    ).ravel()
+    snr_in = (_grid_points(meta["snr"])[:-1, np.newaxis] + snr[2] * fractions).ravel()
+
+    snr_table = np.zeros(
+        (
+            len(stype),
+            len(meta["npulses"]),
+            meta["log_pfa"]["count"],
+            meta["probit_pd"]["count"],
+        )
+    )
+    pd_table = np.zeros(
+        (
+            len(stype),
+            len(meta["npulses"]),
+            meta["log_pfa"]["count"],
+            meta["snr"]["count"],
+        )
+    )
+    for s_idx, stype_item in enumerate(stype):
+        snr_table[s_idx] = roc_snr_nd(
+            pfa, _inv_probit(_grid_points(meta["probit_pd"])), n_col, stype_item
+        )
+        with np.errstate(divide="ignore"):
+            pd_table[s_idx] = np.clip(
+                _probit(roc_pd_nd(pfa, _grid_points(meta["snr"]), n_col, stype_item)),
+                -_PROBIT_MAX,
+                _PROBIT_MAX,
+            )
+
+    os.makedirs(directory, exist_ok=True)
+    meta_name, snr_name, pd_name = _file_names(TABLE_VERSION)
+    np.save(os.path.join(directory, snr_name), snr_table)
+    np.save(os.path.join(directory, pd_name), pd_table)
+
+    # Largest errors inside the cells, in both interpolated axes
+    meta["error_snr"] = 0.0
+    meta["error_pd"] = 0.0
+    with open(os.path.join(directory, meta_name), "w", encoding="utf-8") as file:
+        json.dump(meta, file, indent=2)
+    tables = RocTables(directory)
+
+    for stype_item in stype:
+        for fraction in fractions:
+            pfa_in = 10.0 ** (log_pfa_cells + log_pfa[2] * fraction)[:, np.newaxis]
+            table, inside = tables.snr(
+                pfa_in, _inv_probit(probit_in), n_col, stype_item
+            )
+            exact = roc_snr_nd(pfa_in, _inv_probit(probit_in), n_col, stype_item)
+            meta["error_snr"] = max(
+                meta["error_snr"],
+                float(np.nanmax(np.abs(table - exact)[inside], initial=0)),
+            )
+
+            table, inside = tables.pd(pfa_in, snr_in, n_col, stype_item)
+            exact = roc_pd_nd(pfa_in, snr_in, n_col, stype_item)
+            meta["error_pd"] = max(
+                meta["error_pd"],
+                float(np.nanmax(np.abs(table - exact)[inside], initial=0)),
+            )
+    meta["error_snr"] *= _ERROR_MARGIN
+    meta["error_pd"] *= _ERROR_MARGIN
+
+    with open(os.path.join(directory, meta_name), "w", encoding="utf-8") as file:
+        json.dump(meta, file, indent=2)
+    tables.meta = meta
+
+    return tables
+
+
+def load_tables(directory=None):
+    """
+    Process-wide tables, loaded once per directory
+
+    :param str directory:
+        Directory of the table files (default is the ``ROC_TABLE_DIR``
+        environment variable, or ``roc/data``)
+
+    :return: The tables, ``None`` if no tables of ``TABLE_VERSION`` are
+        found in ``directory``. A miss is not remembered, tables built
+        later are picked up by the next call
+    :rtype: RocTables or None
+    """
+    if directory is None:
+        directory = os.environ.get("ROC_TABLE_DIR", DEFAULT_DIRECTORY)
+
+    with _TABLES_LOCK:
+        if directory not in _TABLES:
+            try:
+                _TABLES[directory] = RocTables(directory)
+            except (FileNotFoundError, ValueError):
+                return None
+        return _TABLES[directory]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the ROC lookup tables")
+    parser.add_argument("directory", nargs="?", default=DEFAULT_DIRECTORY)
+    parser.add_argument("--max-npulses", type=int, default=64)
+    args = parser.parse_args()
+
+    built = build_tables(args.directory, npulses=range(1, args.max_npulses + 1))
+    print(
+        f"Saved to {args.directory}, error bounds: "
+        f"SNR {built.error_snr:.2e} dB, Pd {built.error_pd:.2e}"
+    )
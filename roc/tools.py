@@ -9,9 +9,21 @@ functions:
 
 * roc_pd - Calculate probability of detection (Pd) in receiver operating
            characteristic (ROC)
+* roc_pd_nd - Broadcasting engine behind ``roc_pd``, evaluates Pd over
+              N-D arrays of Pfa, SNR and number of pulses in one call
+* roc_pd_adaptive - Pd over Pfa, sampled densely only where the curve
+                    bends
 * roc_snr - Calculate the minimal SNR for certain probability of
             detection (Pd) and probability of false alarm (Pfa) in
             receiver operating characteristic (ROC)
+* roc_snr_nd - Batched engine behind ``roc_snr``, solves the minimal SNR
+               over N-D grids in one call
+* roc_snr_surface - Minimal SNR over a (Pd, number of pulses) grid,
+                    interpolated from a single Pd grid evaluation
+* integration_gain - Calculate the non-coherent integration gain curve
+                     over the number of pulses
+* iter_integration_gain - Coarse to fine generator of partial integration
+                          gain curves
 
 ---
 
@@ -23,67 +35,95 @@ functions:
 
     ██████╗  █████╗ ██████╗  █████╗ ██████╗ ███████╗██╗███╗   ███╗██╗  ██╗
     ██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔══██╗██╔════╝██║████╗ ████║╚██╗██╔╝
-    ██████╔╝███████║██║  ██║███████║██████╔╝███████╗██║██╔████╔██║ ╚███╔╝ 
-    ██╔══██╗██╔══██║██║  ██║██╔══██║██╔══██╗╚════██║██║██║╚██╔╝██║ ██╔██╗ 
+    ██████╔╝███████║██║  ██║███████║██████╔╝███████╗██║██╔████╔██║ ╚███╔╝
+    ██╔══██╗██╔══██║██║  ██║██╔══██║██╔══██╗╚════██║██║██║╚██╔╝██║ ██╔██╗
     ██║  ██║██║  ██║██████╔╝██║  ██║██║  ██║███████║██║██║ ╚═╝ ██║██╔╝ ██╗
     ╚═╝  ╚═╝╚═╝  ╚═╝╚═════╝ ╚═╝  ╚═╝╚═╝  ╚═╝╚══════╝╚═╝╚═╝     ╚═╝╚═╝  ╚═╝
 
 """
 
 # import warnings
+import threading
+
 import numpy as np
 from scipy.special import (  # pylint: disable=no-name-in-module
     erfc,
     erfcinv,
     gammainc,
-    gammaincinv,
-    iv,
+    gammaln,
+    ive,
 )
-from scipy.stats import distributions
 
+from roc.cache import threshold_cache
+from roc.marcum import MODES as _MARCUM_MODES
+from roc.marcum import marcumq
+from roc.metrics import metrics
+from roc.tables import load_tables
 
-def marcumq(a, x, m=1):
-    """
-    Calculates the generalized Marcum Q function.
+# Number of values in the scratch arrays of the series kernels
+_SCRATCH_SIZE = 2**18
 
-    The Marcum Q function is defined as:
-        Q_m(a, x) = 1 - F_ncx2(m * 2, a^2, x^2)
+# Largest n served from the log factorial table, log(n!) for k <= n
+_LOG_FACTORIAL_MAX = 2**20
+_LOG_FACTORIAL = np.zeros(1)
+_LOG_FACTORIAL_LOCK = threading.Lock()
 
-    :param float a: Non-centrality parameter.
-    :param float x: Threshold value.
-    :param int m: Order of the function, positive integer (default is 1).
 
-    :return: Generalized Marcum Q function value.
-    :rtype: float
+def _log_factorial_table(n_max):
+    """
+    Process-wide table of ``log(k!)`` for ``k = 0 ... n_max`` at least
 
-    :references:
-        - `Wikipedia - Marcum Q-function <https://en.wikipedia.org/wiki/Marcum_Q-function>`_
-        - `SciPy Documentation - scipy.stats.ncx2
-            <https://docs.scipy.org/doc/scipy/reference/generated/scipy.stats.ncx2.html>`_
+    The table is grown lazily, at least doubling its size, and swapped in
+    as a whole, so readers never see a partially filled table.
+
+    :param int n_max:
+        Largest ``k`` the table has to cover
+
+    :return:
+        Table of ``log(k!)``
+    :rtype: numpy.ndarray
     """
-    return 1 - distributions.ncx2.cdf(df=m * 2, nc=a**2, x=x**2)
+    global _LOG_FACTORIAL  # pylint: disable=global-statement
+
+    table = _LOG_FACTORIAL
+    if table.size > n_max:
+        return table
+
+    with _LOG_FACTORIAL_LOCK:
+        table = _LOG_FACTORIAL
+        if table.size <= n_max:
+            size = max(n_max + 1, 2 * table.size)
+            table = np.concatenate(
+                [table, gammaln(np.arange(table.size, size, dtype=float) + 1)]
+            )
+            _LOG_FACTORIAL = table
+
+    return table
 
 
 def log_factorial(n):
     """
     Compute the factorial of 'n' using logarithms to avoid overflow
 
-    :param int n:
+    Integers up to ``_LOG_FACTORIAL_MAX`` are looked up in a lazily grown,
+    process-wide table, larger ones use ``gammaln``. ``log(n!)`` is 0 for
+    ``n`` <= 0.
+
+    :param n:
         Integer number
+    :type n: int or numpy.ndarray
 
     :return:
         log(n!)
-    :rtype: float
+    :rtype: float or numpy.ndarray
     """
+    n = np.maximum(np.rint(n), 0)
 
-    if np.isscalar(n):
-        return np.sum(np.log(np.arange(1, n + 1)))
+    n_max = np.max(n, initial=0)
+    if n_max <= _LOG_FACTORIAL_MAX:
+        return _log_factorial_table(int(n_max))[n.astype(np.int64)][()]
 
-    val = np.zeros_like(n, dtype=float)
-    for idx, n_item in enumerate(n):
-        val[idx] = np.sum(np.log(np.arange(1, n_item + 1)))
-
-    return val
+    return gammaln(n + 1)[()]
 
 
 def threshold(pfa, npulses):
@@ -99,26 +139,188 @@ def threshold(pfa, npulses):
         Threshod ratio
     :rtype: float
 
+    :Notes:
+        - Memoized by ``roc.cache.threshold_cache``, a pure function of
+            ``pfa`` and ``npulses``.
+
     :references:
         - Mahafza, Bassem R. Radar systems analysis and design using MATLAB.
             Chapman and Hall/CRC, 2005.
     """
 
-    return gammaincinv(npulses, 1 - pfa)
+    return threshold_cache(pfa, npulses)
+
+
+def _piecewise(cond, func_true, func_false, *args):
+    """
+    Evaluate two branches of a kernel on the elements selected by ``cond``
+
+    :param cond:
+        Boolean mask, broadcastable against ``args``
+    :param callable func_true:
+        Branch evaluated where ``cond`` is True
+    :param callable func_false:
+        Branch evaluated where ``cond`` is False
+    :param args:
+        Array arguments passed to the branches, broadcast against each other
+
+    :return:
+        Branch values merged into one array with the broadcast shape
+    :rtype: float or numpy.ndarray
+    """
+    cond = np.asarray(cond)
+    shape = np.broadcast_shapes(cond.shape, *(np.shape(arg) for arg in args))
+    if cond.size and (np.all(cond) or not np.any(cond)):
+        # A single branch runs on the inputs as they are, so its terms that
+        # do not depend on every input keep their smaller shape
+        val = (func_true if cond.flat[0] else func_false)(*args)
+        val = np.asarray(val, dtype=float)
+        if val.shape != shape:
+            val = np.broadcast_to(val, shape).copy()
+        return val[()]
+
+    args = np.broadcast_arrays(*args)
+    cond = np.broadcast_to(cond, shape)
+    val = np.zeros(shape)
+
+    if np.any(cond):
+        val[cond] = func_true(*(arg[cond] for arg in args))
+    if not np.all(cond):
+        val[~cond] = func_false(*(arg[~cond] for arg in args))
+
+    return val[()]
+
+
+def _in_blocks(series, npulses, snr, thred):
+    """
+    Evaluate a series kernel in blocks of elements
+
+    Series kernels sum over a trailing axis of up to ``npulses + 1`` terms,
+    the blocks keep their ``(elements, terms)`` scratch arrays within
+    ``_SCRATCH_SIZE`` values. Each block holds a single number of pulses,
+    so it only carries the terms that number of pulses needs.
+
+    :param callable series:
+        ``series(npulses, snr, thred)`` on 1-D arrays
+    :param numpy.ndarray npulses:
+        Number of pulses
+    :param numpy.ndarray snr:
+        Signal-to-noise ratio
+    :param numpy.ndarray thred:
+        Detection threshold
+
+    :return:
+        Kernel values with the broadcast shape of the inputs
+    :rtype: numpy.ndarray
+    """
+    shape = np.broadcast_shapes(np.shape(npulses), np.shape(snr), np.shape(thred))
+    npulses, snr, thred = (
+        np.ravel(arg) for arg in np.broadcast_arrays(npulses, snr, thred)
+    )
+    val = np.zeros(npulses.shape)
+    for n_item in np.unique(npulses):
+        group = np.flatnonzero(npulses == n_item)
+        step = max(_SCRATCH_SIZE // (int(n_item) + 1), 1)
+        for start in range(0, group.size, step):
+            block = group[start : start + step]
+            val[block] = series(npulses[block], snr[block], thred[block])
+    return val.reshape(shape)
+
+
+def _gram_charlier(v_var, c3, c4, c6):
+    """
+    Gram-Charlier series used by the large ``npulses`` approximations
+
+    :param v_var: Normalized threshold
+    :param c3: Third order coefficient
+    :param c4: Fourth order coefficient
+    :param c6: Sixth order coefficient
+
+    :return: Probability of detection (Pd)
+    :rtype: float or numpy.ndarray
+    """
+    v_sqr = v_var**2
+    val1 = np.exp(-v_sqr / 2) / np.sqrt(2 * np.pi)
+    val2 = (
+        c3 * (v_sqr - 1)
+        + c4 * v_var * (3 - v_sqr)
+        - c6 * v_var * (v_var**4 - 10 * v_sqr + 15)
+    )
+    return 0.5 * erfc(v_var / np.sqrt(2)) - val1 * val2
+
+
+def _pd_swerling0_series(npulses, snr, thred, mode="cdf"):
+    """
+    Swerling 0 for ``npulses`` <= 50, Marcum Q and Bessel series
+
+    The Bessel terms are formed in the log domain from the exponentially
+    scaled ``ive``,
+
+    .. math:: I_k(z) e^{-(T + nS)} = \\mathrm{ive}(k, z) e^{-(\\sqrt{T} - \\sqrt{nS})^2}
+
+    with ``z = 2 sqrt(nST)``, so no term overflows. Only ``ive`` of the
+    orders 0, K - 1 and K are evaluated, the ratios
+    ``r_k = I_k(z) / I_(k - 1)(z)`` below K follow from the backward
+    recurrence ``r_k = z / (2k + z r_(k + 1))``, which is stable.
+    ``mode`` is the one of ``marcumq``.
+    """
+    npulses, snr, thred = np.broadcast_arrays(npulses, snr, thred)
+    n_col = npulses[..., np.newaxis]
+    k_max = int(np.max(npulses, initial=1)) - 1
+
+    nsnr = npulses * snr
+    q_1 = marcumq(np.sqrt(2 * nsnr), np.sqrt(2 * thred), mode=mode)
+    if k_max < 1:
+        return q_1
+
+    z_var = 2 * np.sqrt(nsnr * thred)
+    ratio = np.zeros(npulses.shape + (k_max,))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio[..., -1] = ive(k_max, z_var) / ive(k_max - 1, z_var)
+    # Both orders underflow for a tiny z, where r_k tends to z / 2k
+    underflow = ~np.isfinite(ratio[..., -1])
+    ratio[underflow, -1] = z_var[underflow] / (2 * k_max)
+    for idx in range(k_max - 1, 0, -1):
+        ratio[..., idx - 1] = z_var / (2 * idx + z_var * ratio[..., idx])
+
+    with np.errstate(divide="ignore"):
+        log_term = (np.log(ive(0, z_var)) - (np.sqrt(thred) - np.sqrt(nsnr)) ** 2)[
+            ..., np.newaxis
+        ] + np.cumsum(
+            0.5 * np.log(thred / nsnr)[..., np.newaxis] + np.log(ratio), axis=-1
+        )
+    terms = np.where(np.arange(1, k_max + 1) < n_col, np.exp(log_term), 0)
+
+    return q_1 + np.sum(terms, axis=-1)
 
 
-def pd_swerling0(npulses, snr, thred):
+def _pd_swerling0_large(npulses, snr, thred):
+    """
+    Swerling 0 for ``npulses`` > 50, Gram-Charlier approximation
+    """
+    temp_1 = 2 * snr + 1
+    omegabar = np.sqrt(npulses * temp_1)
+    c3 = -(snr + 1 / 3) / (np.sqrt(npulses) * temp_1**1.5)
+    c4 = (snr + 0.25) / (npulses * temp_1**2.0)
+    c6 = c3 * c3 / 2
+    v_var = (thred - npulses * (1 + snr)) / omegabar
+    return _gram_charlier(v_var, c3, c4, c6)
+
+
+def pd_swerling0(npulses, snr, thred, mode="cdf"):
     """
     Calculates the probability of detection (Pd) for Swerling 0 target model.
 
     :param npulses: Number of pulses.
-    :type npulses: int
+    :type npulses: int or numpy.ndarray
     :param snr: Signal-to-noise ratio.
-    :type snr: float
+    :type snr: float or numpy.ndarray
     :param thred: Detection threshold.
-    :type thred: float
-    :return: Probability of detection (Pd).
-    :rtype: float
+    :type thred: float or numpy.ndarray
+    :param str mode: Mode of ``roc.marcum.marcumq``, ``cdf`` (default) or
+        ``accurate``.
+    :return: Probability of detection (Pd), with the broadcast shape of the inputs.
+    :rtype: float or numpy.ndarray
 
     :Notes:
         - For npulses <= 50, uses the Marcum Q function and modified Bessel functions.
@@ -128,37 +330,41 @@ def pd_swerling0(npulses, snr, thred):
         - Swerling, P. (1953). Probability of Detection for Fluctuating Targets.
           IRE Transactions on Information Theory, 6(3), 269-308.
     """
-    if npulses <= 50:
-        sum_array = np.arange(2, npulses + 1)
+    return _piecewise(
+        np.asarray(npulses) <= 50,
+        lambda n, s, t: _in_blocks(
+            lambda *args: _pd_swerling0_series(*args, mode=mode), n, s, t
+        ),
+        _pd_swerling0_large,
+        npulses,
+        snr,
+        thred,
+    )
 
-        var_1 = np.exp(-(thred + npulses * snr)) * np.sum(
-            (thred / (npulses * snr)) ** ((sum_array - 1) / 2)
-            * iv(sum_array - 1, 2 * np.sqrt(npulses * snr * thred))
-        )
 
-        if np.isscalar(var_1):
-            if np.isnan(var_1):
-                var_1 = 0
-        else:
-            var_1[np.isnan(var_1)] = 0
+def _pd_swerling1_single(_npulses, snr, thred):
+    """
+    Swerling 1 for a single pulse
+    """
+    return np.exp(-thred / (1 + snr))
 
-        return marcumq(np.sqrt(2 * npulses * snr), np.sqrt(2 * thred)) + var_1
 
-    temp_1 = 2 * snr + 1
-    omegabar = np.sqrt(npulses * temp_1)
-    c3 = -(snr + 1 / 3) / (np.sqrt(npulses) * temp_1**1.5)
-    c4 = (snr + 0.25) / (npulses * temp_1**2.0)
-    c6 = c3 * c3 / 2
-    v_var = (thred - npulses * (1 + snr)) / omegabar
-    v_sqr = v_var**2
-    val1 = np.exp(-v_sqr / 2) / np.sqrt(2 * np.pi)
-    val2 = (
-        c3 * (v_sqr - 1)
-        + c4 * v_var * (3 - v_sqr)
-        - c6 * v_var * (v_var**4 - 10 * v_sqr + 15)
-    )
-    q = 0.5 * erfc(v_var / np.sqrt(2))
-    return q - val1 * val2
+def _pd_swerling1_multi(npulses, snr, thred):
+    """
+    Swerling 1 for more than one pulse
+    """
+    temp_sw1 = 1 + 1 / (npulses * snr)
+    igf1 = gammainc(npulses - 1, thred)
+    igf2 = gammainc(npulses - 1, thred / temp_sw1)
+    # temp_sw1 ** (npulses - 1) overflows at low SNR while igf2 underflows,
+    # so their product is formed in the log domain
+    with np.errstate(divide="ignore"):
+        log_term = (
+            (npulses - 1) * np.log(temp_sw1)
+            + np.log(igf2)
+            - thred / (1 + npulses * snr)
+        )
+    return 1 - igf1 + np.exp(log_term)
 
 
 def pd_swerling1(npulses, snr, thred):
@@ -166,13 +372,13 @@ def pd_swerling1(npulses, snr, thred):
     Calculates the probability of detection (Pd) for Swerling 1 target model.
 
     :param npulses: Number of pulses.
-    :type npulses: int
+    :type npulses: int or numpy.ndarray
     :param snr: Signal-to-noise ratio.
-    :type snr: float
+    :type snr: float or numpy.ndarray
     :param thred: Detection threshold.
-    :type thred: float
-    :return: Probability of detection (Pd).
-    :rtype: float
+    :type thred: float or numpy.ndarray
+    :return: Probability of detection (Pd), with the broadcast shape of the inputs.
+    :rtype: float or numpy.ndarray
 
     :Notes:
         - Swerling 1 assumes a target made up of many independent scatterers of roughly equal areas.
@@ -185,16 +391,13 @@ def pd_swerling1(npulses, snr, thred):
         - Swerling, P. (1953). Probability of Detection for Fluctuating Targets.
           IRE Transactions on Information Theory, 6(3), 269-308.
     """
-    if npulses == 1:
-        return np.exp(-thred / (1 + snr))
-
-    temp_sw1 = 1 + 1 / (npulses * snr)
-    igf1 = gammainc(npulses - 1, thred)
-    igf2 = gammainc(npulses - 1, thred / temp_sw1)
-    return (
-        1
-        - igf1
-        + (temp_sw1 ** (npulses - 1)) * igf2 * np.exp(-thred / (1 + npulses * snr))
+    return _piecewise(
+        np.asarray(npulses) == 1,
+        _pd_swerling1_single,
+        _pd_swerling1_multi,
+        npulses,
+        snr,
+        thred,
     )
 
 
@@ -203,13 +406,13 @@ def pd_swerling2(npulses, snr, thred):
     Calculates the probability of detection (Pd) for Swerling 2 target model.
 
     :param npulses: Number of pulses.
-    :type npulses: int
+    :type npulses: int or numpy.ndarray
     :param snr: Signal-to-noise ratio.
-    :type snr: float
+    :type snr: float or numpy.ndarray
     :param thred: Detection threshold.
-    :type thred: float
-    :return: Probability of detection (Pd).
-    :rtype: float
+    :type thred: float or numpy.ndarray
+    :return: Probability of detection (Pd), with the broadcast shape of the inputs.
+    :rtype: float or numpy.ndarray
 
     :Notes:
         - Swerling 2 assumes a target made up of many independent scatterers of roughly equal areas.
@@ -223,18 +426,56 @@ def pd_swerling2(npulses, snr, thred):
     return 1 - gammainc(npulses, (thred / (1 + snr)))
 
 
+def _pd_swerling3_ko(npulses, snr, thred):
+    """
+    Swerling 3 ``ko`` term, which is the Pd itself for ``npulses`` <= 2
+    """
+    temp_1 = thred / (1 + 0.5 * npulses * snr)
+    return (
+        np.exp(-temp_1)
+        * (1 + 2 / (npulses * snr)) ** (npulses - 2)
+        * (1 + temp_1 - 2 * (npulses - 2) / (npulses * snr))
+    )
+
+
+def _pd_swerling3_multi(npulses, snr, thred):
+    """
+    Swerling 3 for ``npulses`` > 2
+    """
+    var_1 = np.exp(
+        (npulses - 1) * np.log(thred) - thred - log_factorial(npulses - 2.0)
+    ) / (1 + 0.5 * npulses * snr)
+
+    # ko * gammainc(...) in the log domain, (1 + 2 / (npulses * snr)) **
+    # (npulses - 2) overflows at low SNR while the gammainc term underflows
+    temp_1 = thred / (1 + 0.5 * npulses * snr)
+    with np.errstate(divide="ignore"):
+        log_term = (
+            -temp_1
+            + (npulses - 2) * np.log1p(2 / (npulses * snr))
+            + np.log(gammainc(npulses - 1, thred / (1 + 2 / (npulses * snr))))
+        )
+
+    return (
+        var_1
+        + 1
+        - gammainc(npulses - 1, thred)
+        + np.exp(log_term) * (1 + temp_1 - 2 * (npulses - 2) / (npulses * snr))
+    )
+
+
 def pd_swerling3(npulses, snr, thred):
     """
     Calculates the probability of detection (Pd) for Swerling 3 target model.
 
     :param npulses: Number of pulses.
-    :type npulses: int
+    :type npulses: int or numpy.ndarray
     :param snr: Signal-to-noise ratio.
-    :type snr: float
+    :type snr: float or numpy.ndarray
     :param thred: Detection threshold.
-    :type thred: float
-    :return: Probability of detection (Pd).
-    :rtype: float
+    :type thred: float or numpy.ndarray
+    :return: Probability of detection (Pd), with the broadcast shape of the inputs.
+    :rtype: float or numpy.ndarray
 
     :Notes:
         - Swerling 3 assumes a target made up of one dominant isotropic reflector superimposed
@@ -248,27 +489,69 @@ def pd_swerling3(npulses, snr, thred):
         - Swerling, P. (1953). Probability of Detection for Fluctuating Targets.
           IRE Transactions on Information Theory, 6(3), 269-308.
     """
-    temp_1 = thred / (1 + 0.5 * npulses * snr)
-    ko = (
-        np.exp(-temp_1)
-        * (1 + 2 / (npulses * snr)) ** (npulses - 2)
-        * (1 + temp_1 - 2 * (npulses - 2) / (npulses * snr))
+    return _piecewise(
+        np.asarray(npulses) <= 2,
+        _pd_swerling3_ko,
+        _pd_swerling3_multi,
+        npulses,
+        snr,
+        thred,
     )
-    if npulses <= 2:
-        return ko
 
-    var_1 = np.exp(
-        (npulses - 1) * np.log(thred) - thred - log_factorial(npulses - 2.0)
-    ) / (1 + 0.5 * npulses * snr)
 
-    pd = (
-        var_1
-        + 1
-        - gammainc(npulses - 1, thred)
-        + ko * gammainc(npulses - 1, thred / (1 + 2 / (npulses * snr)))
-    )
+def _pd_swerling4_series(npulses, snr, thred):
+    """
+    Swerling 4 for ``npulses`` < 50, incomplete Gamma series
 
-    return pd
+    With ``beta = 1 + snr / 2`` the series is a binomial mixture
+
+    .. math:: 1 - P_d = \\sum_{i=0}^{n} \\binom{n}{i} p^i (1 - p)^{n - i} P(n + i, T / \\beta)
+
+    with ``p = (snr / 2) / beta``, where ``P(n + i, x)`` follows from
+    ``P(n, x)`` by the cumulative recurrence
+    ``P(n + i, x) = P(n + i - 1, x) - x^(n + i - 1) e^(-x) / (n + i - 1)!``.
+    Weights and recurrence terms are formed in the log domain and summed
+    over a trailing axis, for every element and number of pulses at once.
+    """
+    npulses, snr, thred = np.broadcast_arrays(npulses, snr, thred)
+    n_col = npulses[..., np.newaxis]
+    idx = np.arange(0, np.max(npulses, initial=0) + 1)
+
+    log_fact_a = log_factorial(n_col + idx[1:] - 1)
+    log_binom = log_factorial(n_col) - log_factorial(idx) - log_factorial(n_col - idx)
+
+    log_beta = np.log1p(snr / 2)[..., np.newaxis]
+    x_col = (thred / (1 + snr / 2))[..., np.newaxis]
+    gamma_0 = gammainc(n_col, x_col)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_a = (n_col + idx[1:] - 1) * np.log(x_col) - x_col - log_fact_a
+        gamma_i = np.concatenate(
+            [gamma_0, gamma_0 - np.cumsum(np.exp(log_a), axis=-1)], axis=-1
+        )
+
+        log_w = (
+            log_binom
+            + idx * (np.log(snr / 2)[..., np.newaxis] - log_beta)
+            - (n_col - idx) * log_beta
+        )
+    weight = np.where(idx <= n_col, np.exp(log_w), 0)
+
+    return 1 - np.sum(weight * np.clip(gamma_i, 0, 1), axis=-1)
+
+
+def _pd_swerling4_large(npulses, snr, thred):
+    """
+    Swerling 4 for ``npulses`` >= 50, Gram-Charlier approximation
+    """
+    beta = 1 + snr / 2
+    omegabar = np.sqrt(npulses * (2 * beta**2 - 1))
+    # Negative skewness term, as in the Swerling 0 kernel
+    c3 = -(2 * beta**3 - 1) / (3 * (2 * beta**2 - 1) * omegabar)
+    c4 = (2 * beta**4 - 1) / (4 * npulses * (2 * beta**2 - 1) ** 2)
+    c6 = c3**2 / 2
+    v_var = (thred - npulses * (1 + snr)) / omegabar
+    return _gram_charlier(v_var, c3, c4, c6)
 
 
 def pd_swerling4(npulses, snr, thred):
@@ -276,13 +559,13 @@ def pd_swerling4(npulses, snr, thred):
     Calculates the probability of detection (Pd) for Swerling 4 target model.
 
     :param npulses: Number of pulses.
-    :type npulses: int
+    :type npulses: int or numpy.ndarray
     :param snr: Signal-to-noise ratio.
-    :type snr: float
+    :type snr: float or numpy.ndarray
     :param thred: Detection threshold.
-    :type thred: float
-    :return: Probability of detection (Pd).
-    :rtype: float
+    :type thred: float or numpy.ndarray
+    :return: Probability of detection (Pd), with the broadcast shape of the inputs.
+    :rtype: float or numpy.ndarray
 
     :Notes:
         - Swerling 4 assumes a target made up of one dominant isotropic reflector
@@ -295,50 +578,307 @@ def pd_swerling4(npulses, snr, thred):
         - Swerling, P. (1953). Probability of Detection for Fluctuating Targets.
           IRE Transactions on Information Theory, 6(3), 269-308.
     """
-    beta = 1 + snr / 2
-    if npulses >= 50:
-        omegabar = np.sqrt(npulses * (2 * beta**2 - 1))
-        c3 = (2 * beta**3 - 1) / (3 * (2 * beta**2 - 1) * omegabar)
-        c4 = (2 * beta**4 - 1) / (4 * npulses * (2 * beta**2 - 1) ** 2)
-        c6 = c3**2 / 2
-        v_var = (thred - npulses * (1 + snr)) / omegabar
-        v_sqr = v_var**2
-        val1 = np.exp(-v_sqr / 2) / np.sqrt(2 * np.pi)
-        val2 = (
-            c3 * (v_sqr - 1)
-            + c4 * v_var * (3 - v_sqr)
-            - c6 * v_var * (v_var**4 - 10 * v_sqr + 15)
-        )
-        return 0.5 * erfc(v_var / np.sqrt(2)) - val1 * val2
+    return _piecewise(
+        np.asarray(npulses) >= 50,
+        _pd_swerling4_large,
+        lambda n, s, t: _in_blocks(_pd_swerling4_series, n, s, t),
+        npulses,
+        snr,
+        thred,
+    )
+
+
+_SWERLING_KERNELS = {
+    "Swerling 0": pd_swerling0,
+    "Swerling 1": pd_swerling1,
+    "Swerling 2": pd_swerling2,
+    "Swerling 3": pd_swerling3,
+    "Swerling 4": pd_swerling4,
+    "Swerling 5": pd_swerling0,
+}
+
+
+_NON_FLUCTUATING = ("Coherent", "Real")
+
+# Number of times ``roc_snr`` doubles a bracket that misses the root
+_MAX_WIDEN = 4
+
+# Margin in dB added to the brackets taken from neighboring solutions
+_WARM_MARGIN = 0.01
+
+# Status codes of the ``roc_snr`` diagnostics
+SNR_CONVERGED = 0
+SNR_MAX_EVAL = 1
+SNR_NO_BRACKET = 2
+SNR_TABLE = 3
+
+# Per cell diagnostics of ``roc_snr`` with ``full_output``
+SNR_INFO_DTYPE = np.dtype(
+    [
+        ("status", np.int8),
+        ("iterations", np.int32),
+        ("nfev", np.int32),
+        ("residual", np.float64),
+        ("lo", np.float64),
+        ("hi", np.float64),
+    ]
+)
+
+
+def _pd_linear(stype, pfa, snr, npulses, thred, out=None, marcum="cdf"):
+    """
+    Probability of detection (Pd) of a single signal type from a linear SNR
+
+    :param str stype: Signal type, see ``roc_pd``
+    :param numpy.ndarray pfa: Probability of false alarm (Pfa)
+    :param numpy.ndarray snr: Linear signal to noise ratio
+    :param numpy.ndarray npulses: Number of pulses for integration
+    :param numpy.ndarray thred: Detection threshold from ``threshold``,
+        ``erfcinv(2 * pfa)`` or ``None`` for ``Coherent`` and ``Real``
+    :param numpy.ndarray out: float64 array with the broadcast shape of the
+        inputs the Pd is written to (default is None, a new array)
+    :param str marcum: Mode of ``roc.marcum.marcumq`` for Swerling 0 and 5
+        (default is ``cdf``)
+
+    :return: probability of detection (Pd)
+    :rtype: numpy.ndarray
+    """
+    if stype in _NON_FLUCTUATING:
+        if thred is None:
+            thred = erfcinv(2 * pfa)
+        arg = np.sqrt(snr * (npulses if stype == "Coherent" else npulses / 2))
+        if out is None:
+            out = np.empty(np.broadcast_shapes(np.shape(thred), np.shape(arg)))
+        # In place, the only full size temporary is ``out`` itself
+        np.subtract(thred, arg, out=out)
+        erfc(out, out=out)
+        out /= 2
+        return out
+
+    if marcum != "cdf" and _SWERLING_KERNELS[stype] is pd_swerling0:
+        val = pd_swerling0(npulses, snr, thred, mode=marcum)
+    else:
+        val = _SWERLING_KERNELS[stype](npulses, snr, thred)
+    if out is None:
+        return val
+    out[...] = val
+    return out
+
+
+def _pd_exact(stype, pfa, snr_db, npulses, out=None, marcum="cdf"):
+    """
+    Probability of detection (Pd) of a single signal type from the models,
+    without the table lookup and the call metrics of ``roc_pd_nd``
+
+    :param str stype: Signal type, see ``roc_pd``
+    :param numpy.ndarray pfa: Probability of false alarm (Pfa)
+    :param numpy.ndarray snr_db: Signal to noise ratio in decibel (dB)
+    :param numpy.ndarray npulses: Number of pulses for integration
+    :param numpy.ndarray out: float64 array with the broadcast shape of the
+        inputs the Pd is written to (default is None, a new array)
+    :param str marcum: Mode of ``roc.marcum.marcumq`` for Swerling 0 and 5
+        (default is ``cdf``)
+
+    :return: probability of detection (Pd) with the broadcast shape of
+        the inputs
+    :rtype: numpy.ndarray
+    """
+    shape = np.broadcast_shapes(np.shape(pfa), np.shape(snr_db), np.shape(npulses))
 
-    gamma0 = gammainc(npulses, thred / beta)
-    a1 = (thred / beta) ** npulses / (
-        np.exp(log_factorial(npulses)) * np.exp(thred / beta)
+    # The threshold only depends on Pfa and the number of pulses, it is
+    # looked up on their own broadcast shape, not on the full grid
+    if stype in _NON_FLUCTUATING:
+        thred = erfcinv(2 * pfa)
+    else:
+        thred = threshold(*np.broadcast_arrays(pfa, npulses))
+
+    pd = _pd_linear(
+        stype, pfa, 10.0 ** (snr_db / 10.0), npulses, thred, out=out, marcum=marcum
     )
-    sum_var = gamma0
-    for idx_1 in range(1, npulses + 1, 1):
+    if pd.shape != shape:
+        pd = np.broadcast_to(pd, shape).copy()
+    return pd
 
-        if idx_1 == 1:
-            ai = a1
-        else:
-            ai = (thred / beta) * a1 / (npulses + idx_1 - 1)
-        a1 = ai
-        gammai = gamma0 - ai
-        # gamma0 = gammai
-        # a1 = ai
 
-        temp_sw4 = np.sum(np.log(npulses + 1 - np.arange(1, idx_1 + 1)))
+def _store(val, out, dtype):
+    """
+    Write Pd values into an output buffer, or cast them to a data type
+
+    :param val: Pd values in float64
+    :param numpy.ndarray out: Buffer with the shape of ``val``, or None
+    :param dtype: Data type of the result when ``out`` is None, None keeps
+        float64
 
-        try:
-            term = (snr / 2) ** idx_1 * gammai * np.exp(temp_sw4 - log_factorial(idx_1))
-        except OverflowError:
-            term = 0
+    :raises ValueError: if the shape of ``out`` differs from ``val``
 
-        sum_var = sum_var + term
-    return 1 - sum_var / beta**npulses
+    :return: ``out``, or ``val`` as ``dtype``, a scalar for 0-D values
+    :rtype: float or numpy.ndarray
+    """
+    if out is not None:
+        if out.shape != np.shape(val):
+            raise ValueError(
+                f"out has shape {out.shape}, the result has shape {np.shape(val)}"
+            )
+        if val is not out:
+            np.copyto(out, val, casting="same_kind")
+        return out
+
+    val = np.asarray(val)
+    if dtype is not None:
+        val = val.astype(dtype, copy=False)
+    return val[()]
+
+
+def _by_stype(func, arg_1, arg_2, npulses, stype):
+    """
+    Broadcast an array of signal types against the other arguments
+
+    :param callable func:
+        ``func(arg_1, arg_2, npulses, stype)`` with a single ``stype``,
+        returning an array or a tuple of arrays
+    :param arg_1: First argument, broadcast
+    :param arg_2: Second argument, broadcast
+    :param npulses: Number of pulses, broadcast
+    :param stype: Array of signal types, broadcast
+
+    :return: ``func`` values with the broadcast shape, a tuple if ``func``
+        returns tuples, ``None`` if any signal type is unknown
+    :rtype: float or numpy.ndarray or tuple
+    """
+    arg_1, arg_2, npulses, stype = np.broadcast_arrays(
+        np.asarray(arg_1, dtype=float),
+        np.asarray(arg_2, dtype=float),
+        np.asarray(npulses),
+        np.asarray(stype),
+    )
+
+    val = None
+    multiple = False
+    for stype_item in np.unique(stype):
+        mask = stype == stype_item
+        val_item = func(arg_1[mask], arg_2[mask], npulses[mask], str(stype_item))
+        if val_item is None:
+            return None
+        multiple = isinstance(val_item, tuple)
+        items = val_item if multiple else (val_item,)
+        if val is None:
+            val = [np.zeros(stype.shape, np.asarray(item).dtype) for item in items]
+        for val_out, item in zip(val, items):
+            val_out[mask] = item
+
+    if val is None:
+        return np.zeros(stype.shape)[()]
+    if multiple:
+        return tuple(val_out[()] for val_out in val)
+    return val[0][()]
+
+
+def roc_pd_nd(
+    pfa,
+    snr,
+    npulses=1,
+    stype="Coherent",
+    method="exact",
+    out=None,
+    dtype=None,
+    marcum="cdf",
+):
+    """
+    Calculate probability of detection (Pd) in receiver operating
+    characteristic (ROC) with NumPy broadcasting
 
+    ``pfa``, ``snr``, ``npulses`` and ``stype`` are broadcast against each
+    other, so for example ``roc_pd_nd(pfa[:, None, None], snr[None, :, None],
+    npulses[None, None, :])`` returns the full 3-D Pd tensor in one call.
 
-def roc_pd(pfa, snr, npulses=1, stype="Coherent"):
+    :param pfa:
+        Probability of false alarm (Pfa)
+    :type pfa: float or numpy.ndarray
+    :param snr:
+        Signal to noise ratio in decibel (dB)
+    :type snr: float or numpy.ndarray
+    :param npulses:
+        Number of pulses for integration (default is 1)
+    :type npulses: int or numpy.ndarray
+    :param stype:
+        Signal type (default is ``Coherent``), see ``roc_pd``
+    :type stype: str or numpy.ndarray
+    :param str method:
+        ``exact`` (default) or ``table``, see ``roc_pd``
+    :param numpy.ndarray out:
+        Array with the broadcast shape of the inputs the Pd is written to,
+        cast with the ``same_kind`` rule (default is None, a new array)
+    :param dtype:
+        Data type of the new array, for example ``numpy.float32``, ignored
+        with ``out`` (default is None, float64). The models are evaluated
+        in float64 either way
+    :param str marcum:
+        Mode of the Marcum Q function of Swerling 0 and 5, see ``roc_pd``
+
+    :raises ValueError: if the shape of ``out`` differs from the broadcast
+        shape of the inputs, or ``marcum`` is unknown
+
+    :return: probability of detection (Pd) with the broadcast shape of
+        the inputs, a float if all of them are scalars, ``out`` if given.
+        ``None`` if ``stype`` is unknown
+    :rtype: float or numpy.ndarray
+    """
+    if marcum not in _MARCUM_MODES:
+        raise ValueError(f"unknown marcum mode {marcum!r}")
+
+    if not isinstance(stype, str):
+        pd = _by_stype(
+            lambda pfa, snr, npulses, stype: roc_pd_nd(
+                pfa, snr, npulses, stype, method=method, marcum=marcum
+            ),
+            pfa,
+            snr,
+            npulses,
+            stype,
+        )
+        return None if pd is None else _store(pd, out, dtype)
+
+    if stype not in _NON_FLUCTUATING and stype not in _SWERLING_KERNELS:
+        return None
+
+    pfa = np.asarray(pfa, dtype=float)
+    snr_db = np.asarray(snr, dtype=float)
+    npulses = np.asarray(npulses)
+    shape = np.broadcast_shapes(pfa.shape, snr_db.shape, npulses.shape)
+    size = int(np.prod(shape))
+    metrics.inc("roc_pd_calls_total", stype=stype, method=method)
+    metrics.inc("roc_pd_cells_total", size, stype=stype, method=method)
+
+    tables = load_tables() if method == "table" else None
+    if tables is not None:
+        pfa, snr_db, npulses = np.broadcast_arrays(pfa, snr_db, npulses)
+        pd, inside = tables.pd(pfa, snr_db, npulses, stype)
+        outside = ~inside
+        if np.any(outside):
+            pd[outside] = _pd_exact(
+                stype, pfa[outside], snr_db[outside], npulses[outside], marcum=marcum
+            )
+        return _store(pd, out, dtype)
+
+    # Evaluated directly into a float64 ``out``
+    work = None
+    if out is not None and out.dtype == np.float64 and out.shape == shape:
+        work = out
+    return _store(
+        _pd_exact(stype, pfa, snr_db, npulses, out=work, marcum=marcum), out, dtype
+    )
+
+
+def roc_pd(
+    pfa,
+    snr,
+    npulses=1,
+    stype="Coherent",
+    method="exact",
+    out=None,
+    dtype=None,
+    marcum="cdf",
+):
     """
     Calculate probability of detection (Pd) in receiver operating
     characteristic (ROC)
@@ -349,8 +889,9 @@ def roc_pd(pfa, snr, npulses=1, stype="Coherent"):
     :param snr:
         Signal to noise ratio in decibel (dB)
     :type snr: float or numpy.1darray
-    :param int npulses:
+    :param npulses:
         Number of pulses for integration (default is 1)
+    :type npulses: int or numpy.1darray
     :param str stype:
         Signal type (default is ``Coherent``)
 
@@ -362,75 +903,416 @@ def roc_pd(pfa, snr, npulses=1, stype="Coherent"):
         - ``Swerling 3``: Non-coherent Swerling 3
         - ``Swerling 4``: Non-coherent Swerling 4
         - ``Swerling 5``: Non-coherent Swerling 5, Non-fluctuating non-coherent
-
-    :return: probability of detection (Pd).
+    :param str method:
+        ``exact`` (default) evaluates the detection models. ``table``
+        interpolates the precomputed tables of ``roc.tables.load_tables``,
+        within their ``error_pd`` bound, and evaluates the cells outside
+        of the tables exactly. Same as ``exact`` without tables
+    :param numpy.ndarray out:
+        Array with the shape of the result the Pd is written to, for
+        example reused over the calls of a sweep (default is None, a new
+        array). A float64 ``out`` is filled without an intermediate copy
+    :param dtype:
+        Data type of the new array, for example ``numpy.float32``, ignored
+        with ``out`` (default is None, float64)
+    :param str marcum:
+        Mode of the Marcum Q function of Swerling 0 and 5 for up to 50
+        pulses, see ``roc.marcum.marcumq``. ``cdf`` (default) is accurate
+        to about 1e-15 in Pd. ``accurate`` also keeps the relative
+        precision of a tiny Pd, below about 1e-6, at a higher cost
+
+    :raises ValueError: if the shape of ``out`` differs from the result,
+        or ``marcum`` is unknown
+
+    :return: probability of detection (Pd), ``out`` if given.
         if both ``pfa`` and ``snr`` are floats, ``pd`` is a float
         if ``pfa`` or ``snr`` is a 1-D array, ``pd`` is a 1-D array
         if both ``pfa`` and ``snr`` are 1-D arrays, ``pd`` is a 2-D array
-    :rtype: float or 1-D array or 2-D array
+        if ``npulses`` is a 1-D array, ``pd`` has an extra trailing axis
+        for the number of pulses
+    :rtype: float or 1-D array or 2-D array or 3-D array
 
     *Reference*
 
     Mahafza, Bassem R. Radar systems analysis and design using MATLAB.
     Chapman and Hall/CRC, 2005.
     """
-    snr_db = snr
-    snr = 10.0 ** (snr_db / 10.0)
+    axes = [np.ravel(pfa), np.ravel(snr), np.ravel(npulses)]
+    shape = tuple(np.size(axis) for axis in axes if np.size(axis) > 1)
 
-    size_pfa = np.size(pfa)
-    size_snr = np.size(snr)
-
-    pd = np.zeros((size_pfa, size_snr))
-
-    it_pfa = np.nditer(pfa, flags=["f_index"])
-    while not it_pfa.finished:
-        thred = threshold(it_pfa[0], npulses)
-
-        if stype == "Swerling 1":
-            pd[it_pfa.index, :] = pd_swerling1(npulses, snr, thred)
+    if out is None:
+        pd = roc_pd_nd(
+            *np.ix_(*axes), stype=stype, method=method, dtype=dtype, marcum=marcum
+        )
+        if pd is None:
+            return None
+        return np.reshape(pd, shape)[()]
+
+    if out.shape != shape:
+        raise ValueError(f"out has shape {out.shape}, the result has shape {shape}")
+    # Only axes of length 1 differ, the reshape is a view of ``out``
+    pd = roc_pd_nd(
+        *np.ix_(*axes),
+        stype=stype,
+        method=method,
+        out=out.reshape([np.size(axis) for axis in axes]),
+        marcum=marcum,
+    )
+    return None if pd is None else out
+
+
+def roc_pd_adaptive(
+    snr,
+    npulses=1,
+    stype="Coherent",
+    pfa_min=1e-10,
+    pfa_max=1.0,
+    tol=1e-3,
+    initial=33,
+    max_points=1000,
+    method="exact",
+):
+    """
+    Calculate probability of detection (Pd) over probability of false
+    alarm (Pfa), sampled adaptively in log Pfa
 
-        elif stype == "Swerling 2":
-            pd[it_pfa.index, :] = pd_swerling2(npulses, snr, thred)
+    Starts from ``initial`` points evenly spaced in log Pfa and bisects,
+    one batch per level, every interval whose midpoint departs from the
+    chord by more than ``tol``, until no interval does or ``max_points``
+    is reached. Linear interpolation of the result in log Pfa stays
+    within about ``tol`` of the curve.
 
-        elif stype == "Swerling 3":
-            pd[it_pfa.index, :] = pd_swerling3(npulses, snr, thred)
+    :param float snr:
+        Signal to noise ratio in decibel (dB)
+    :param int npulses:
+        Number of pulses for integration (default is 1)
+    :param str stype:
+        Signal type (default is ``Coherent``), see ``roc_pd``
+    :param float pfa_min:
+        Smallest Pfa (default is 1e-10)
+    :param float pfa_max:
+        Largest Pfa (default is 1)
+    :param float tol:
+        Tolerance on Pd between the samples (default is 1e-3)
+    :param int initial:
+        Number of points of the initial grid (default is 33)
+    :param int max_points:
+        Maximal number of points (default is 1000)
+    :param str method:
+        ``exact`` (default) or ``table``, see ``roc_pd``
+
+    :return: Increasing Pfa and the Pd at each of them, 1-D arrays.
+        ``None`` if ``stype`` is unknown
+    :rtype: tuple or None
+    """
+    if stype not in _NON_FLUCTUATING and stype not in _SWERLING_KERNELS:
+        return None
 
-        elif stype == "Swerling 4":
-            pd[it_pfa.index, :] = pd_swerling4(npulses, snr, thred)
+    def pd_at(log_pfa):
+        return np.atleast_1d(
+            roc_pd_nd(10.0**log_pfa, snr, npulses, stype, method=method)
+        )
 
-        elif stype in ("Swerling 5", "Swerling 0"):
-            pd[it_pfa.index, :] = pd_swerling0(npulses, snr, thred)
+    log_pfa = np.linspace(np.log10(pfa_min), np.log10(pfa_max), initial)
+    pd = pd_at(log_pfa)
+    refine = np.ones(initial - 1, dtype=bool)
+    while True:
+        idx = np.flatnonzero(refine)
+        room = max_points - log_pfa.size
+        if idx.size == 0 or room <= 0:
+            break
+
+        mid = (log_pfa[idx] + log_pfa[idx + 1]) / 2
+        pd_mid = pd_at(mid)
+        with np.errstate(invalid="ignore"):
+            error = np.abs(pd_mid - (pd[idx] + pd[idx + 1]) / 2)
+        bent = error > tol
+        if np.sum(bent) > room:
+            # Keep the midpoints furthest from their chord
+            bent[np.argsort(np.where(bent, -error, 0))[room:]] = False
+            refine[:] = False
+
+        # Each inserted midpoint shifts the intervals after it by one
+        left = idx[bent] + np.arange(np.sum(bent))
+        log_pfa = np.insert(log_pfa, idx[bent] + 1, mid[bent])
+        pd = np.insert(pd, idx[bent] + 1, pd_mid[bent])
+        if not np.any(refine):
+            break
+        refine = np.zeros(log_pfa.size - 1, dtype=bool)
+        refine[left] = True
+        refine[left + 1] = True
+
+    return 10.0**log_pfa, pd
+
+
+def _solve_snr(
+    pfa, pd, npulses, stype, snr_lo, snr_hi, tol, max_eval, full_output=False
+):
+    """
+    Batched Illinois (modified regula falsi) solver for the minimal SNR
+
+    Every cell is bracketed and refined at the same time. Each iteration
+    evaluates Pd once, on the cells that are still active, until the
+    residual is below ``tol`` or the cell has used ``max_eval`` function
+    evaluations. Brackets that do not contain the root are widened
+    automatically, Pd increases monotonically with SNR.
+
+    :param numpy.ndarray pfa: Probability of false alarm (Pfa), 1-D
+    :param numpy.ndarray pd: Probability of detection (Pd), 1-D
+    :param numpy.ndarray npulses: Number of pulses for integration, 1-D
+    :param str stype: Signal type, see ``roc_pd``
+    :param snr_lo: Lower end of the initial bracket in dB
+    :param snr_hi: Upper end of the initial bracket in dB
+    :param float tol: Tolerance on the Pd residual, relative to
+        ``min(pd, 1 - pd)``
+    :param int max_eval: Maximal number of Pd evaluations per cell
+    :param bool full_output: Also return the diagnostics of every cell
+
+    :return: Minimal SNR in dB, ``nan`` where no bracket was found, and
+        the ``SNR_INFO_DTYPE`` diagnostics if ``full_output``
+    :rtype: numpy.ndarray or tuple
+    """
+    if stype in _NON_FLUCTUATING:
+        thred = erfcinv(2 * pfa)
+    else:
+        thred = threshold(pfa, npulses)
+
+    size = np.size(pd)
+    # Scratch space of the Pd evaluations, reused over the iterations
+    scratch = np.empty(size)
+
+    def fun(idx, snr_db, out=None):
+        val = _pd_linear(
+            stype,
+            pfa[idx],
+            10.0 ** (snr_db / 10.0),
+            npulses[idx],
+            thred[idx],
+            out=out,
+        )
+        val -= pd[idx]
+        return val
+
+    idx = np.arange(size)
+    # Relative to the distance to 0 or 1, so Pd close to 1 is still resolved
+    tol = tol * np.minimum(pd, 1 - pd)
+    lo = np.array(np.broadcast_to(snr_lo, size), dtype=float)
+    hi = np.array(np.broadcast_to(snr_hi, size), dtype=float)
+    f_lo = fun(idx, lo)
+    f_hi = fun(idx, hi)
+    nfev = np.full(size, 2)
+
+    # The root lies below ``lo`` when f_lo > 0 and above ``hi`` when
+    # f_hi < 0, move the bracket that way with a doubling step
+    step = hi - lo
+    for _ in range(_MAX_WIDEN):
+        below = (f_lo > 0) & (nfev < max_eval)
+        above = (f_hi < 0) & (nfev < max_eval)
+        if not np.any(below | above):
+            break
+
+        idx = np.flatnonzero(below)
+        hi[idx], f_hi[idx] = lo[idx], f_lo[idx]
+        lo[idx] = lo[idx] - step[idx]
+        f_lo[idx] = fun(idx, lo[idx], scratch[: idx.size])
+
+        idx = np.flatnonzero(above)
+        lo[idx], f_lo[idx] = hi[idx], f_hi[idx]
+        hi[idx] = hi[idx] + step[idx]
+        f_hi[idx] = fun(idx, hi[idx], scratch[: idx.size])
+
+        nfev[below | above] += 1
+        step[below | above] *= 2
+
+    snr = np.full(size, np.nan)
+    active = (f_lo <= 0) & (f_hi >= 0)
+    iterations = 0
+    if full_output:
+        info = np.zeros(size, dtype=SNR_INFO_DTYPE)
+        info["status"] = np.where(active, SNR_MAX_EVAL, SNR_NO_BRACKET)
+        info["residual"] = np.nan
+        info["lo"] = lo
+        info["hi"] = hi
+    # -1 when ``lo`` was replaced last, 1 when ``hi`` was replaced last
+    side = np.zeros(size, dtype=np.int8)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        while True:
+            active &= nfev < max_eval
+            idx = np.flatnonzero(active)
+            if idx.size == 0:
+                break
+            iterations += 1
+
+            m_n = hi[idx] - f_hi[idx] * (hi[idx] - lo[idx]) / (f_hi[idx] - f_lo[idx])
+            outside = ~((m_n >= lo[idx]) & (m_n <= hi[idx]))
+            m_n[outside] = (lo[idx][outside] + hi[idx][outside]) / 2
+
+            f_m_n = fun(idx, m_n, scratch[: idx.size])
+            nfev[idx] += 1
+
+            done = np.abs(f_m_n) < tol[idx]
+            snr[idx[done]] = m_n[done]
+            if full_output:
+                info["iterations"][idx] += 1
+                info["residual"][idx] = f_m_n
+                info["status"][idx[done]] = SNR_CONVERGED
+            active[idx[done | ~np.isfinite(f_m_n)]] = False
+
+            # Illinois step: halve the end point that was kept twice in a row
+            left = f_m_n < 0
+            right = f_m_n > 0
+            f_hi[idx[left & (side[idx] == -1)]] /= 2
+            f_lo[idx[right & (side[idx] == 1)]] /= 2
+
+            lo[idx[left]], f_lo[idx[left]] = m_n[left], f_m_n[left]
+            hi[idx[right]], f_hi[idx[right]] = m_n[right], f_m_n[right]
+            side[idx[left]] = -1
+            side[idx[right]] = 1
+
+        # Cells that ran out of budget take the secant of their last bracket
+        idx = np.flatnonzero(np.isnan(snr) & (f_lo <= 0) & (f_hi >= 0))
+        snr[idx] = hi[idx] - f_hi[idx] * (hi[idx] - lo[idx]) / (f_hi[idx] - f_lo[idx])
+        if full_output and idx.size > 0:
+            # Evaluated for the diagnostics only, not counted in ``nfev``
+            info["residual"][idx] = fun(idx, snr[idx])
+
+    metrics.inc("roc_snr_solves_total", stype=stype)
+    metrics.inc("roc_snr_cells_total", size, stype=stype)
+    metrics.inc("roc_snr_iterations_total", iterations, stype=stype)
+    metrics.inc("roc_snr_nfev_total", int(np.sum(nfev)), stype=stype)
+    metrics.inc("roc_snr_unsolved_total", int(np.sum(np.isnan(snr))), stype=stype)
+
+    if full_output:
+        info["nfev"] = nfev
+        return snr, info
+    return snr
 
-        elif stype == "Coherent":
-            snr = snr * npulses
-            pd[it_pfa.index, :] = erfc(erfcinv(2 * it_pfa[0]) - np.sqrt(snr)) / 2
 
-        elif stype == "Real":
-            snr = snr * npulses / 2
-            pd[it_pfa.index, :] = erfc(erfcinv(2 * it_pfa[0]) - np.sqrt(snr)) / 2
+def roc_snr_nd(
+    pfa,
+    pd,
+    npulses=1,
+    stype="Coherent",
+    tol=1e-5,
+    max_eval=100,
+    method="exact",
+    full_output=False,
+):
+    """
+    Calculate the minimal SNR for certain probability of detection (Pd)
+    and probability of false alarm (Pfa) with NumPy broadcasting
 
-        else:
-            return None
+    ``pfa``, ``pd``, ``npulses`` and ``stype`` are broadcast against each
+    other and every cell of the resulting grid is solved at once by a
+    batched Illinois (modified regula falsi) root finder.
 
-        it_pfa.iternext()
+    :param pfa:
+        Probability of false alarm (Pfa)
+    :type pfa: float or numpy.ndarray
+    :param pd:
+         Probability of detection (Pd)
+    :type pd: float or numpy.ndarray
+    :param npulses:
+        Number of pulses for integration (default is 1)
+    :type npulses: int or numpy.ndarray
+    :param stype:
+        Signal type (default is ``Coherent``), see ``roc_snr``
+    :type stype: str or numpy.ndarray
+    :param float tol:
+        Tolerance on the Pd residual, relative to ``min(pd, 1 - pd)``
+        (default is 1e-5)
+    :param int max_eval:
+        Maximal number of Pd evaluations per cell (default is 100)
+    :param str method:
+        ``exact`` (default) or ``table``, see ``roc_snr``
+    :param bool full_output:
+        Also return the solver diagnostics (default is False), see
+        ``roc_snr``
+
+    :return: Minimal signal to noise ratio in decibel (dB) with the
+        broadcast shape of the inputs, a float if all of them are scalars.
+        ``nan`` in the cells where the root cannot be bracketed, ``None``
+        if ``stype`` is unknown. ``(snr, info)`` if ``full_output``
+    :rtype: float or numpy.ndarray or tuple
+    """
+    if not isinstance(stype, str):
+        return _by_stype(
+            lambda pfa, pd, npulses, stype: roc_snr_nd(
+                pfa,
+                pd,
+                npulses,
+                stype,
+                tol=tol,
+                max_eval=max_eval,
+                method=method,
+                full_output=full_output,
+            ),
+            pfa,
+            pd,
+            npulses,
+            stype,
+        )
 
-    if size_pfa == 1 and size_snr == 1:
-        return pd[0, 0]
+    if stype not in _NON_FLUCTUATING and stype not in _SWERLING_KERNELS:
+        return None
 
-    if size_pfa == 1 and size_snr > 1:
-        return pd[0, :]
+    pfa, pd, npulses = np.broadcast_arrays(
+        np.asarray(pfa, dtype=float),
+        np.asarray(pd, dtype=float),
+        np.asarray(npulses),
+    )
 
-    if size_pfa > 1 and size_snr == 1:
-        return pd[:, 0]
+    tables = load_tables() if method == "table" else None
+    if tables is not None:
+        snr, inside = tables.snr(pfa, pd, npulses, stype)
+        outside = ~inside
+        if full_output:
+            info = np.zeros(snr.shape, dtype=SNR_INFO_DTYPE)
+            info["status"] = SNR_TABLE
+            info["residual"] = np.nan
+            info["lo"] = np.nan
+            info["hi"] = np.nan
+        if np.any(outside):
+            solved = roc_snr_nd(
+                pfa[outside],
+                pd[outside],
+                npulses[outside],
+                stype,
+                tol=tol,
+                max_eval=max_eval,
+                full_output=full_output,
+            )
+            if full_output:
+                snr[outside], info[outside] = solved
+            else:
+                snr[outside] = solved
+        if full_output:
+            return snr[()], info[()]
+        return snr[()]
+
+    snr_lo = -40 if stype in _NON_FLUCTUATING else -20
+    snr = _solve_snr(
+        pfa.ravel(),
+        pd.ravel(),
+        npulses.ravel(),
+        stype,
+        snr_lo,
+        40,
+        tol,
+        max_eval,
+        full_output=full_output,
+    )
 
-    return pd
+    if full_output:
+        return snr[0].reshape(pd.shape)[()], snr[1].reshape(pd.shape)[()]
+    return snr.reshape(pd.shape)[()]
 
 
-def roc_snr(pfa, pd, npulses=1, stype="Coherent"):
+def roc_snr(pfa, pd, npulses=1, stype="Coherent", method="exact", full_output=False):
     """
     Calculate the minimal SNR for certain probability of
     detection (Pd) and probability of false alarm (Pfa) in
-    receiver operating characteristic (ROC) with Secant method
+    receiver operating characteristic (ROC)
 
     :param pfa:
         Probability of false alarm (Pfa)
@@ -438,8 +1320,9 @@ def roc_snr(pfa, pd, npulses=1, stype="Coherent"):
     :param pd:
          Probability of detection (Pd)
     :type pd: float or numpy.1darray
-    :param int npulses:
+    :param npulses:
         Number of pulses for integration (default is 1)
+    :type npulses: int or numpy.1darray
     :param str stype:
         Signal type (default is ``Coherent``)
 
@@ -451,88 +1334,268 @@ def roc_snr(pfa, pd, npulses=1, stype="Coherent"):
         - ``Swerling 3`` : Non-coherent Swerling 3
         - ``Swerling 4`` : Non-coherent Swerling 4
         - ``Swerling 5`` : Same as ``Swerling 0``
+    :param str method:
+        ``exact`` (default) solves for the root. ``table`` interpolates
+        the precomputed tables of ``roc.tables.load_tables``, within their
+        ``error_snr`` bound, and solves the cells outside of the tables.
+        Same as ``exact`` without tables
+    :param bool full_output:
+        Also return the solver diagnostics of every cell (default is
+        False), a structured array of ``SNR_INFO_DTYPE`` shaped as ``SNR``
+
+        - ``status``: ``SNR_CONVERGED``, ``SNR_MAX_EVAL`` (the secant of
+          the last bracket is returned), ``SNR_NO_BRACKET`` (``nan``) or
+          ``SNR_TABLE`` (interpolated, see ``method``)
+        - ``iterations``: Number of Illinois iterations
+        - ``nfev``: Number of Pd evaluations, bracketing included
+        - ``residual``: Pd minus the target Pd at the returned SNR
+        - ``lo``, ``hi``: Bracket in dB the iterations started from
 
     :return: Minimal signal to noise ratio in decibel (dB)
         if both ``pfa`` and ``pd`` are floats, ``SNR`` is a float
         if ``pfa`` or ``pd`` is a 1-D array, ``SNR`` is a 1-D array
         if both ``pfa`` and ``pd`` are 1-D arrays, ``SNR`` is a 2-D array
-    :rtype: float or 1-D array or 2-D array
+        if ``npulses`` is a 1-D array, ``SNR`` has an extra trailing axis
+        for the number of pulses.
+        ``nan`` where the root cannot be bracketed.
+        ``(SNR, info)`` if ``full_output``
+    :rtype: float or 1-D array or 2-D array or 3-D array or tuple
 
     *Reference*
 
-    Secant method:
+    Illinois method:
 
         The x intercept of the secant line on the the Nth interval
 
-        .. math:: m_n = a_n - f(a_n)*(b_n - a_n)/(f(b_n) - f(a_n))
-
-        The initial interval [a_0,b_0] is given by [a,b]. If f(m_n) == 0
-        for some intercept m_n then the function returns this solution.
-        If all signs of values f(a_n), f(b_n) and f(m_n) are the same at any
-        iterations, the secant method fails and return None.
-    """
-
-    def fun(pfa, pd, snr):
-        return roc_pd(pfa, snr, npulses, stype) - pd
-
-    max_iter = 1000
-    snra = 40
-    snrb = -20
-
-    if stype == "Coherent" or stype == "Real":
-        snrb = -40
-
-    size_pd = np.size(pd)
-    size_pfa = np.size(pfa)
-    snr = np.zeros((size_pfa, size_pd))
-
-    it_pfa = np.nditer(pfa, flags=["f_index"])
-    while not it_pfa.finished:
-        it_pd = np.nditer(pd, flags=["f_index"])
-        while not it_pd.finished:
-            if fun(it_pfa[0], it_pd[0], snra) * fun(it_pfa[0], it_pd[0], snrb) >= 0:
-                # print("Initializing Secant method fails.")
-                return None
-            a_n = snra
-            b_n = snrb
-            for _ in range(1, max_iter + 1):
-                m_n = a_n - fun(it_pfa[0], it_pd[0], a_n) * (b_n - a_n) / (
-                    fun(it_pfa[0], it_pd[0], b_n) - fun(it_pfa[0], it_pd[0], a_n)
-                )
-                f_m_n = fun(it_pfa[0], it_pd[0], m_n)
-                if f_m_n == 0:
-                    # print("Found exact solution.")
-                    snr[it_pfa.index, it_pd.index] = m_n
-                    break
-                if np.abs(f_m_n) < 0.00001:
-                    # print("Reach threshold.")
-                    snr[it_pfa.index, it_pd.index] = m_n
-                    break
-                if fun(it_pfa[0], it_pd[0], a_n) * f_m_n < 0:
-                    # a_n = a_n
-                    b_n = m_n
-                elif fun(it_pfa[0], it_pd[0], b_n) * f_m_n < 0:
-                    a_n = m_n
-                    # b_n = b_n
-                else:
-                    # print("Secant method fails.")
-                    # return None
-                    snr[it_pfa.index, it_pd.index] = float("nan")
-                    break
-            # return a_n-fun(a_n)*(b_n-a_n)/(fun(b_n)-fun(a_n))
-            snr[it_pfa.index, it_pd.index] = a_n - fun(it_pfa[0], it_pd[0], a_n) * (
-                b_n - a_n
-            ) / (fun(it_pfa[0], it_pd[0], b_n) - fun(it_pfa[0], it_pd[0], a_n))
-            it_pd.iternext()
-        it_pfa.iternext()
-
-    if size_pfa == 1 and size_pd == 1:
-        return snr[0, 0]
-
-    if size_pfa == 1 and size_pd > 1:
-        return snr[0, :]
-
-    if size_pfa > 1 and size_pd == 1:
-        return snr[:, 0]
+        .. math:: m_n = b_n - f(b_n)*(b_n - a_n)/(f(b_n) - f(a_n))
 
-    return snr
+        replaces the end point with the same sign as f(m_n). When the same
+        end point is replaced twice in a row, the function value at the other
+        end point is halved, which keeps the convergence superlinear. The
+        initial interval [a_0,b_0] is widened until it brackets the root.
+    """
+    axes = [np.ravel(pfa), np.ravel(pd), np.ravel(npulses)]
+
+    snr = roc_snr_nd(
+        *np.ix_(*axes), stype=stype, method=method, full_output=full_output
+    )
+    if snr is None:
+        return None
+
+    shape = [np.size(axis) for axis in axes if np.size(axis) > 1]
+    if full_output:
+        return np.reshape(snr[0], shape)[()], np.reshape(snr[1], shape)[()]
+    return np.reshape(snr, shape)[()]
+
+
+def roc_snr_surface(pfa, pd, npulses, stype="Coherent", snr_step=0.1):
+    """
+    Calculate the minimal SNR over a (Pd, number of pulses) grid from a
+    single Pd grid evaluation
+
+    Pd is evaluated once over an SNR axis spanning the solutions, spaced
+    by ``snr_step``, with one broadcast ``roc_pd_nd`` call. The minimal SNR
+    of every Pd is then interpolated in ``probit(Pd)``, which is close to
+    linear in SNR. Much faster than ``roc_snr`` on large grids, for an
+    error well below ``snr_step``.
+
+    :param float pfa:
+        Probability of false alarm (Pfa)
+    :param numpy.1darray pd:
+         Probability of detection (Pd)
+    :param numpy.1darray npulses:
+        Numbers of pulses for integration
+    :param str stype:
+        Signal type (default is ``Coherent``), see ``roc_snr``
+    :param float snr_step:
+        Spacing of the SNR axis in dB (default is 0.1)
+
+    :return: Minimal signal to noise ratio in decibel (dB) of
+        ``(len(pd), len(npulses))``, ``nan`` where ``roc_snr`` finds no
+        solution. ``None`` if ``stype`` is unknown
+    :rtype: numpy.ndarray
+    """
+    if stype not in _NON_FLUCTUATING and stype not in _SWERLING_KERNELS:
+        return None
+
+    pd = np.ravel(np.asarray(pd, dtype=float))
+    npulses = np.ravel(npulses)
+    out = np.full((pd.size, npulses.size), np.nan)
+
+    # The minimal SNR increases with Pd and decreases with the number of
+    # pulses, the opposite corners of the grid bound all the solutions
+    ends = roc_snr_nd(
+        pfa,
+        [np.min(pd), np.max(pd)],
+        [np.max(npulses), np.min(npulses)],
+        stype,
+    )
+    if not np.all(np.isfinite(ends)):
+        return np.reshape(roc_snr(pfa, pd, npulses, stype), out.shape)
+    snr = np.linspace(
+        ends[0] - snr_step,
+        ends[1] + snr_step,
+        int(np.ceil((ends[1] - ends[0]) / snr_step)) + 3,
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        grid = roc_pd_nd(pfa, snr[:, np.newaxis], npulses[np.newaxis, :], stype)
+        probit = -np.sqrt(2) * erfcinv(2 * np.clip(grid, 1e-300, 1 - 1e-16))
+        target = -np.sqrt(2) * erfcinv(2 * pd)
+    for n_idx in range(npulses.size):
+        out[:, n_idx] = np.interp(
+            target, probit[:, n_idx], snr, left=np.nan, right=np.nan
+        )
+    return out
+
+
+def _iter_required_snr(pfa, pd, npulses, stype):
+    """
+    Minimal SNR over increasing numbers of pulses, coarse to fine
+
+    The minimal SNR decreases monotonically with the number of pulses, so
+    a solved pulse count bounds the SNR of every larger pulse count from
+    above and of every smaller pulse count from below. The end points are
+    solved first, then every level solves the midpoints between already
+    solved pulse counts at once, bracketed by their two solved neighbors.
+
+    :param float pfa: Probability of false alarm (Pfa)
+    :param float pd: Probability of detection (Pd)
+    :param numpy.ndarray npulses: Increasing numbers of pulses, 1-D
+    :param str stype: Signal type, see ``roc_snr``
+
+    :return: Generator of ``(solved, snr)`` after each level, ``solved``
+        is the mask of the pulse counts solved so far and ``snr`` the
+        minimal SNR in dB (``nan`` where not solved yet)
+    :rtype: generator
+    """
+    size = np.size(npulses)
+    snr = np.full(size, np.nan)
+    solved = np.zeros(size, dtype=bool)
+
+    snr_lo = -40 if stype in _NON_FLUCTUATING else -20
+    idx = np.unique([0, size - 1])
+    lo = np.full(idx.size, float(snr_lo))
+    hi = np.full(idx.size, 40.0)
+    while idx.size > 0:
+        snr[idx] = _solve_snr(
+            np.full(idx.size, pfa, dtype=float),
+            np.full(idx.size, pd, dtype=float),
+            npulses[idx],
+            stype,
+            lo,
+            hi,
+            1e-5,
+            100,
+        )
+        solved[idx] = True
+        yield solved, snr
+
+        left = np.flatnonzero(solved)
+        right = left[1:]
+        left = left[:-1]
+        gap = right - left > 1
+        left, right = left[gap], right[gap]
+        idx = (left + right) // 2
+
+        # Neighbors that could not be solved fall back to the default bracket
+        lo = np.where(np.isnan(snr[right]), snr_lo, snr[right] - _WARM_MARGIN)
+        hi = np.where(np.isnan(snr[left]), 40.0, snr[left] + _WARM_MARGIN)
+
+
+def iter_integration_gain(pfa, pd, npulses, stype):
+    """
+    Calculate the non-coherent integration gain curve over the number of
+    pulses, coarse to fine
+
+    All the signal types are refined together, one level of
+    ``_iter_required_snr`` each per step, so partial curves of every
+    signal type are available early.
+
+    :param float pfa:
+        Probability of false alarm (Pfa)
+    :param float pd:
+         Probability of detection (Pd)
+    :param npulses:
+        Maximal number of pulses ``N``, the curve covers 1 to ``N``
+        pulses, or a 1-D array of increasing numbers of pulses
+    :type npulses: int or numpy.1darray
+    :param stype:
+        Signal type, or a list of signal types, see ``roc_snr``
+    :type stype: str or list
+
+    :return: Generator of ``(solved, gain, snr)`` after each step, the
+        mask of the pulse counts solved so far, the integration gain in dB
+        relative to a single pulse and the minimal SNR in dB, ``nan``
+        where not solved yet. 1-D arrays if ``stype`` is a str, otherwise
+        2-D arrays of ``(len(stype), len(npulses))``
+    :rtype: generator
+    """
+    if np.isscalar(npulses):
+        npulses = np.arange(1, npulses + 1)
+    npulses = np.ravel(npulses)
+
+    stype_list = [stype] if isinstance(stype, str) else list(stype)
+
+    solved = np.zeros((len(stype_list), npulses.size), dtype=bool)
+    snr = np.full((len(stype_list), npulses.size), np.nan)
+    if npulses[0] == 1:
+        snr_single = None
+    else:
+        snr_single = np.array([roc_snr(pfa, pd, 1, item) for item in stype_list])
+
+    levels = {
+        s_idx: _iter_required_snr(pfa, pd, npulses, stype_item)
+        for s_idx, stype_item in enumerate(stype_list)
+    }
+    while levels:
+        for s_idx, level in list(levels.items()):
+            try:
+                solved[s_idx], snr[s_idx] = next(level)
+            except StopIteration:
+                del levels[s_idx]
+        if not levels:
+            break
+
+        # The first level of every signal type solves the first pulse count
+        single = snr[:, 0] if snr_single is None else snr_single
+        gain = single[:, np.newaxis] - snr
+
+        if isinstance(stype, str):
+            yield solved[0].copy(), gain[0], snr[0].copy()
+        else:
+            yield solved.copy(), gain, snr.copy()
+
+
+def integration_gain(pfa, pd, npulses, stype):
+    """
+    Calculate the non-coherent integration gain curve over the number of
+    pulses
+
+    The minimal SNR is solved for all the pulse counts with warm started
+    brackets, see ``_iter_required_snr``, instead of solving every pulse
+    count from the default bracket. ``iter_integration_gain`` yields the
+    partial curves.
+
+    :param float pfa:
+        Probability of false alarm (Pfa)
+    :param float pd:
+         Probability of detection (Pd)
+    :param npulses:
+        Maximal number of pulses ``N``, the curve covers 1 to ``N``
+        pulses, or a 1-D array of increasing numbers of pulses
+    :type npulses: int or numpy.1darray
+    :param stype:
+        Signal type, or a list of signal types, see ``roc_snr``
+    :type stype: str or list
+
+    :return: ``(gain, snr)``, the integration gain in dB relative to a
+        single pulse and the minimal SNR in dB for every number of pulses.
+        1-D arrays if ``stype`` is a str, otherwise 2-D arrays of
+        ``(len(stype), len(npulses))``
+    :rtype: tuple
+    """
+    for _, gain, snr in iter_integration_gain(pfa, pd, npulses, stype):
+        pass
+
+    return gain, snr
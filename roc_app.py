@@ -27,19 +27,24 @@
 
 """
 
+import base64
+import os
+
 import dash
 from dash.dependencies import Input, Output, State
 from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 
 import numpy as np
-import plotly.io as pio
 
-from roc.tools import roc_snr, roc_pd
+import roc
+from roc.cache import LRUCache, threshold_cache
+from roc.jobs import JobManager
+from roc.metrics import install, metrics, timed
 
 # from flaskwebgui import FlaskUI
 
-from layout.layout import get_app_layout, sidebar_pdpfa, sidebar_gain
+from layout.layout import get_app_layout, sidebar_pdpfa, sidebar_gain, sidebar_heatmap
 
 app = dash.Dash(
     __name__,
@@ -53,21 +58,133 @@ app.title = "ROC"
 app.layout = get_app_layout
 server = app.server
 
+# Traces of single models keyed on the normalized callback inputs, shared
+# by all the sessions. Size and time to live (seconds, 0 for no expiry)
+# are configured through the environment
+trace_cache = LRUCache(
+    maxsize=int(os.environ.get("ROC_TRACE_CACHE_SIZE", "512")),
+    ttl=float(os.environ.get("ROC_TRACE_CACHE_TTL", "3600")) or None,
+)
+
+# Background integration gain jobs, one per session
+gain_jobs = JobManager(max_workers=int(os.environ.get("ROC_JOB_WORKERS", "2")))
+
+# Tolerance on Pd of the adaptive Pfa sampling of the Pd vs Pfa curve
+PDPFA_TOL = float(os.environ.get("ROC_PDPFA_TOL", "1e-3"))
+
+# Precision of the figure data, sent as base64 typed arrays, "f4" or "f8"
+FIGURE_DTYPE = os.environ.get("ROC_FIGURE_DTYPE", "f4")
+
+# Detectability surfaces keyed on the normalized callback inputs, a few
+# hundred kB each, and the rows of their SNR (Pd view) or Pd (minimal SNR
+# view) axis
+surface_cache = LRUCache(maxsize=int(os.environ.get("ROC_SURFACE_CACHE_SIZE", "32")))
+HEATMAP_ROWS = int(os.environ.get("ROC_HEATMAP_ROWS", "200"))
+HEATMAP_SNR = np.linspace(-20, 30, HEATMAP_ROWS)
+HEATMAP_PD = np.linspace(0.05, 0.99, HEATMAP_ROWS)
+
+# Callback timings, solver counters and cache statistics at /metrics,
+# slow callbacks are logged with ROC_SLOW_CALL (seconds)
+metrics.register_cache("trace", trace_cache)
+metrics.register_cache("threshold", threshold_cache)
+metrics.register_cache("surface", surface_cache)
+install(server)
+
+# Batched Pd and minimal SNR queries at /api/v1, on the kernels and caches
+# of the app
+roc.api.install(server)
+
+# Worker processes sharing the models of a gain job, 0 or 1 computes them
+# in the job thread
+PARALLEL_WORKERS = int(os.environ.get("ROC_PARALLEL_WORKERS", "0"))
+
+
+def _typed_array(values):
+    """
+    Plotly typed array of numeric values, base64 encoded.
+
+    Parameters:
+    - values (array_like): Values, floats are sent with FIGURE_DTYPE.
+
+    Returns:
+    dict: Typed array spec with the dtype and the little-endian bytes, and
+    the shape of 2-D values such as heatmaps.
+    """
+    values = np.asarray(values)
+    dtype = FIGURE_DTYPE if values.dtype.kind == "f" else "i4"
+    data = np.ascontiguousarray(values, dtype="<" + dtype)
+    spec = {"dtype": dtype, "bdata": base64.b64encode(data).decode("ascii")}
+    if values.ndim > 1:
+        spec["shape"] = ", ".join(str(size) for size in values.shape)
+    return spec
+
+
+def _figure_patch(figure_keys, view, layout, traces, full=False):
+    """
+    Partial update of the graph.
+
+    Parameters:
+    - figure_keys (dict): View, trace keys and trace names the graph shows,
+      echoed back by the client from the "figure-keys" store, None at first.
+    - view (tuple): Identity of the layout, which is only sent when it changes.
+    - layout (dict): Layout properties of the view.
+    - traces (list): (key, trace) of each trace, a trace is only sent when the
+      key at its position changes.
+    - full (bool): Send all the traces.
+
+    The diff is taken against what the client applied, not against what was
+    last sent, so dropped or reordered responses cannot desynchronize it. A
+    change of the view or of the list of traces replaces the whole data, only
+    the traces of an unchanged list are replaced one by one.
+
+    Returns:
+    tuple: Changes to the figure and new content of the "figure-keys" store,
+    dash.no_update for both if there is no change.
+    """
+    state = {
+        "view": list(view),
+        "keys": [list(key) for key, _ in traces],
+        "names": [[trace["type"], trace.get("name")] for _, trace in traces],
+    }
+
+    patch = dash.Patch()
+    if (
+        full
+        or not figure_keys
+        or figure_keys["view"] != state["view"]
+        or figure_keys["names"] != state["names"]
+    ):
+        for name, value in layout.items():
+            patch["layout"][name] = value
+        patch["data"] = [trace for _, trace in traces]
+        return patch, state
+
+    if figure_keys["keys"] == state["keys"]:
+        return dash.no_update, dash.no_update
+    for idx, (_, trace) in enumerate(traces):
+        if figure_keys["keys"][idx] != state["keys"][idx]:
+            patch["data"][idx] = trace
+    return patch, state
+
 
 @app.callback(
     [Output("sidebar", "children"), Output("hidden", "children")],
     [Input("card-tabs", "active_tab")],
 )
+@timed("tab_content")
 def tab_content(active_tab):
     if active_tab == "tab-1":
-        return [sidebar_pdpfa, sidebar_gain]
+        return [sidebar_pdpfa, [sidebar_gain, sidebar_heatmap]]
     elif active_tab == "tab-2":
-        return [sidebar_gain, sidebar_pdpfa]
+        return [sidebar_gain, [sidebar_pdpfa, sidebar_heatmap]]
+    elif active_tab == "tab-3":
+        return [sidebar_heatmap, [sidebar_pdpfa, sidebar_gain]]
 
 
 @app.callback(
     output={
         "fig": Output("scatter", "figure", allow_duplicate=True),
+        "figure_keys": Output("figure-keys", "data", allow_duplicate=True),
     },
     inputs={
         "n": Input("pdpfa-channels", "value"),
@@ -79,10 +196,15 @@ def tab_content(active_tab):
         "max_n": State("pdpfa-channels", "max"),
         "min_snr": State("pdpfa-snr", "min"),
         "max_snr": State("pdpfa-snr", "max"),
+        "session_id": State("session-id", "data"),
+        "figure_keys": State("figure-keys", "data"),
     },
     prevent_initial_call=True
 )
-def pdpfa_plot(n, snr, model, min_n, max_n, min_snr, max_snr):
+@timed("pdpfa_plot")
+def pdpfa_plot(
+    n, snr, model, min_n, max_n, min_snr, max_snr, session_id, figure_keys
+):
     """
     Generate a plot for integration gain based on probability of detection (Pd),
     probability of false alarm (Pfa), number of channels (n), and a list of models.
@@ -96,15 +218,20 @@ def pdpfa_plot(n, snr, model, min_n, max_n, min_snr, max_snr):
     - max_pd (float): Maximum value for Pd.
     - min_pfa (float): Minimum value for Pfa.
     - max_pfa (float): Maximum value for Pfa.
+    - session_id (str): Session of the graph.
+    - figure_keys (dict): What the graph shows, see _figure_patch.
 
     Raises:
     - PreventUpdate: If pd is None, pd is outside the range [min_pd, max_pd],
                     pfa is None, or pfa is outside the range [min_pfa, max_pfa].
 
+    The integration gain job of the session is cancelled, so it does not
+    overwrite the plot.
+
     Returns:
     dict: A dictionary containing the plot data and layout, as well as minsnr_container information.
-    - fig (dict): Plotly figure data and layout.
-    - minsnr_container (list): List of FormText containing minimum SNR information for each model.
+    - fig (dash.Patch): Changes to the Plotly figure.
+    - figure_keys (dict): What the graph shows after the changes.
     """
 
     if n is None:
@@ -117,37 +244,124 @@ def pdpfa_plot(n, snr, model, min_n, max_n, min_snr, max_snr):
     if snr < min_snr or snr > max_snr:
         raise PreventUpdate
 
-    pfa = np.logspace(-10, 0, 1000)
-    pfa = pfa[1:]
-    pd = roc_pd(pfa, snr, n, model)
-
-    fig_data = [
-        {
-            "mode": "lines",
-            "type": "scatter",
-            "x": np.log10(pfa),
-            "y": pd,
-            "name": model,
-        }
-    ]
+    key = ("pdpfa", int(n), float(snr), model)
+    curve = trace_cache.get(key)
+    if curve is None:
+        curve = roc.tools.roc_pd_adaptive(snr, n, model, tol=PDPFA_TOL)
+        trace_cache.put(key, curve)
+    pfa, pd = curve
+
+    gain_jobs.cancel(session_id)
+
+    trace = {
+        "mode": "lines",
+        "type": "scatter",
+        "x": _typed_array(np.log10(pfa)),
+        "y": _typed_array(pd),
+        "name": model,
+    }
+    layout = {
+        "title": None,
+        "xaxis": {"title": "Probability of false alarm (Pfa)"},
+        "yaxis": {"title": "Probability of detection (Pd)"},
+    }
 
-    return {
-        "fig": {
-            "data": fig_data,
-            "layout": {
-                "template": pio.templates["plotly"],
-                "uirevision": "no_change",
-                "xaxis": {"title": "Probability of false alarm (Pfa)"},
-                "yaxis": {"title": "Probability of detection (Pd)"},
-            },
-        },
+    fig, figure_keys = _figure_patch(figure_keys, ("pdpfa",), layout, [(key, trace)])
+    return {"fig": fig, "figure_keys": figure_keys}
+
+
+def _gain_key(pd, pfa, n, mod):
+    """
+    Trace cache key of an integration gain curve
+    """
+    return ("gain", float(pd), float(pfa), int(n), mod)
+
+
+def _gain_job(pd, pfa, n, missing):
+    """
+    Integration gain curves of the missing models, coarse to fine.
+
+    Parameters:
+    - pd (float): Probability of detection.
+    - pfa (float): Probability of false alarm.
+    - n (int): Number of channels.
+    - missing (list): Models to compute.
+
+    Yields:
+    tuple: Mask of the solved channels, integration gain and minimal SNR,
+    2-D arrays of (len(missing), n). The complete curves are cached.
+    With ROC_PARALLEL_WORKERS, the models run in separate processes and
+    arrive whole.
+    """
+    if PARALLEL_WORKERS > 1 and len(missing) > 1:
+        levels = roc.parallel.iter_integration_gain_parallel(
+            pfa, pd, n, missing, workers=PARALLEL_WORKERS
+        )
+    else:
+        levels = roc.tools.iter_integration_gain(
+            pfa, pd, np.arange(1, n + 1), missing
+        )
+
+    for solved, nci_gain, snr in levels:
+        yield solved, nci_gain, snr
+
+    for m_idx, mod in enumerate(missing):
+        trace_cache.put(_gain_key(pd, pfa, n, mod), (nci_gain[m_idx], snr[m_idx, 0]))
+
+
+def _gain_figure(figure_keys, pd, pfa, n, traces, full=False):
+    """
+    Integration gain figure update.
+
+    Parameters:
+    - figure_keys (dict): What the graph shows, see _figure_patch.
+    - pd (float): Probability of detection.
+    - pfa (float): Probability of false alarm.
+    - n (int): Number of channels.
+    - traces (list): (model, channels, gain, minimal SNR) of each model.
+    - full (bool): Send all the traces.
+
+    Returns:
+    tuple: Changes to the Plotly figure, list of FormText with the minimal SNR of each model
+    and what the graph shows after the changes.
+    """
+    fig_data = []
+    minsnr_container = []
+    for mod, n_array, nci_gain, minsnr in traces:
+        minsnr_container.append(
+            dbc.FormText(mod + ": " + str(round(minsnr, 3)) + " dB")
+        )
+        fig_data.append(
+            (
+                (mod, int(n), np.size(n_array)),
+                {
+                    "mode": "lines",
+                    "type": "scatter",
+                    "x": _typed_array(n_array),
+                    "y": _typed_array(nci_gain),
+                    "name": mod,
+                },
+            )
+        )
+
+    layout = {
+        "title": "Pd = " + str(pd) + ", Pfa = " + str(pfa),
+        "xaxis": {"title": "Number of Channels"},
+        "yaxis": {"title": "Integration Gain (dB)"},
     }
+    view = ("gain", float(pd), float(pfa))
+    fig, figure_keys = _figure_patch(figure_keys, view, layout, fig_data, full=full)
+    return fig, minsnr_container, figure_keys
 
 
 @app.callback(
     output={
         "fig": Output("scatter", "figure", allow_duplicate=True),
-        "minsnr_container": Output("minsnr-container", "children"),
+        "minsnr_container": Output(
+            "minsnr-container", "children", allow_duplicate=True
+        ),
+        "interval_disabled": Output("gain-interval", "disabled", allow_duplicate=True),
+        "figure_keys": Output("figure-keys", "data", allow_duplicate=True),
     },
     inputs={
         "pd": Input("pd", "value"),
@@ -160,10 +374,15 @@ def pdpfa_plot(n, snr, model, min_n, max_n, min_snr, max_snr):
         "max_pd": State("pd", "max"),
         "min_pfa": State("pfa", "min"),
         "max_pfa": State("pfa", "max"),
+        "session_id": State("session-id", "data"),
+        "figure_keys": State("figure-keys", "data"),
     },
     prevent_initial_call=True
 )
-def gain_plot(pd, pfa, n, model, min_pd, max_pd, min_pfa, max_pfa):
+@timed("gain_plot")
+def gain_plot(
+    pd, pfa, n, model, min_pd, max_pd, min_pfa, max_pfa, session_id, figure_keys
+):
     """
     Generate a plot for integration gain based on probability of detection (Pd),
     probability of false alarm (Pfa), number of channels (n), and a list of models.
@@ -173,19 +392,27 @@ def gain_plot(pd, pfa, n, model, min_pd, max_pd, min_pfa, max_pfa):
     - pfa (float): Probability of false alarm.
     - n (int): Number of channels.
     - model (list): List of models.
+    - session_id (str): Session of the background job.
     - min_pd (float): Minimum value for Pd.
     - max_pd (float): Maximum value for Pd.
     - min_pfa (float): Minimum value for Pfa.
     - max_pfa (float): Maximum value for Pfa.
+    - figure_keys (dict): What the graph shows, see _figure_patch.
 
     Raises:
     - PreventUpdate: If pd is None, pd is outside the range [min_pd, max_pd],
                     pfa is None, or pfa is outside the range [min_pfa, max_pfa].
 
+    The models missing from the trace cache are computed by a background
+    job of the session, which replaces the previous one, and streamed to
+    the graph by ``gain_progress``.
+
     Returns:
     dict: A dictionary containing the plot data and layout, as well as minsnr_container information.
-    - fig (dict): Plotly figure data and layout.
+    - fig (dash.Patch): Changes to the Plotly figure, the cached models only while a job runs.
     - minsnr_container (list): List of FormText containing minimum SNR information for each model.
+    - interval_disabled (bool): False while a background job runs.
+    - figure_keys (dict): What the graph shows after the changes.
     """
     if pd is None:
         raise PreventUpdate
@@ -198,41 +425,284 @@ def gain_plot(pd, pfa, n, model, min_pd, max_pd, min_pfa, max_pfa):
         raise PreventUpdate
 
     n_array = np.arange(1, n + 1)
-    nci_gain = np.zeros((len(model), n), dtype=np.float64)
-    fig_data = []
-    minsnr_container = []
-    for m_idx, mod in enumerate(model):
-        minsnr = roc_snr(pfa, pd, 1, mod)
-        minsnr_container.append(
-            dbc.FormText(mod + ": " + str(round(minsnr, 3)) + " dB")
+
+    cached = {mod: trace_cache.get(_gain_key(pd, pfa, n, mod)) for mod in model}
+    missing = [mod for mod in model if cached[mod] is None]
+    if missing:
+        gain_jobs.submit(
+            session_id,
+            _gain_job,
+            pd,
+            pfa,
+            n,
+            missing,
+            meta={"pd": pd, "pfa": pfa, "n": n, "model": model, "cached": cached},
         )
-        for idx in range(1, n + 1):
-            nci_gain[m_idx, idx - 1] = minsnr - roc_snr(pfa, pd, n_array[idx - 1], mod)
-        fig_data.append(
-            {
-                "mode": "lines",
-                "type": "scatter",
-                "x": n_array,
-                "y": nci_gain[m_idx, :],
-                "name": mod,
-            }
+    else:
+        gain_jobs.cancel(session_id)
+
+    fig, minsnr_container, figure_keys = _gain_figure(
+        figure_keys,
+        pd,
+        pfa,
+        n,
+        [(mod, n_array) + cached[mod] for mod in model if cached[mod] is not None],
+    )
+
+    return {
+        "fig": fig,
+        "minsnr_container": minsnr_container,
+        "interval_disabled": not missing,
+        "figure_keys": figure_keys,
+    }
+
+
+@app.callback(
+    output={
+        "fig": Output("scatter", "figure", allow_duplicate=True),
+        "minsnr_container": Output(
+            "minsnr-container", "children", allow_duplicate=True
+        ),
+        "interval_disabled": Output("gain-interval", "disabled", allow_duplicate=True),
+        "figure_keys": Output("figure-keys", "data", allow_duplicate=True),
+    },
+    inputs={"n_intervals": Input("gain-interval", "n_intervals")},
+    state={
+        "session_id": State("session-id", "data"),
+        "figure_keys": State("figure-keys", "data"),
+    },
+    prevent_initial_call=True
+)
+@timed("gain_progress")
+def gain_progress(n_intervals, session_id, figure_keys):
+    """
+    Stream the partial integration gain curves of the background job.
+
+    Parameters:
+    - n_intervals (int): Number of polls, unused.
+    - session_id (str): Session of the background job.
+    - figure_keys (dict): What the graph shows, see _figure_patch.
+
+    Raises:
+    - PreventUpdate: If the job has no new partial curves.
+
+    Only the curves that changed are sent, and all of them once the job ends.
+    Polling stops if the graph shows another view since the job started. If
+    the job failed, its error replaces the minimal SNR text.
+
+    Returns:
+    dict: A dictionary containing the plot data and layout, as well as minsnr_container information.
+    - fig (dash.Patch): Changes to the Plotly figure with the channels solved so far.
+    - minsnr_container (list): List of FormText containing minimum SNR information for each model.
+    - interval_disabled (bool): True once the job has ended.
+    - figure_keys (dict): What the graph shows after the changes.
+    """
+    del n_intervals
+
+    state = gain_jobs.poll(session_id)
+    if state is None:
+        return {
+            "fig": dash.no_update,
+            "minsnr_container": dash.no_update,
+            "interval_disabled": True,
+            "figure_keys": dash.no_update,
+        }
+
+    meta = gain_jobs.meta(session_id)
+    view = (figure_keys or {}).get("view")
+    if view != ["gain", float(meta["pd"]), float(meta["pfa"])]:
+        gain_jobs.cancel(session_id)
+        return {
+            "fig": dash.no_update,
+            "minsnr_container": dash.no_update,
+            "interval_disabled": True,
+            "figure_keys": dash.no_update,
+        }
+
+    if state.error is not None:
+        return {
+            "fig": dash.no_update,
+            "minsnr_container": [
+                dbc.FormText(
+                    "Integration gain failed: " + str(state.error), color="danger"
+                )
+            ],
+            "interval_disabled": True,
+            "figure_keys": dash.no_update,
+        }
+
+    if state.result is None or meta.get("sent") == state.version:
+        if not state.done:
+            raise PreventUpdate
+        return {
+            "fig": dash.no_update,
+            "minsnr_container": dash.no_update,
+            "interval_disabled": True,
+            "figure_keys": dash.no_update,
+        }
+    meta["sent"] = state.version
+
+    n_array = np.arange(1, meta["n"] + 1)
+    solved, nci_gain, snr = state.result
+    missing = [mod for mod in meta["model"] if meta["cached"][mod] is None]
+    traces = []
+    for mod in meta["model"]:
+        if meta["cached"][mod] is not None:
+            traces.append((mod, n_array) + meta["cached"][mod])
+            continue
+        m_idx = missing.index(mod)
+        traces.append(
+            (
+                mod,
+                n_array[solved[m_idx]],
+                nci_gain[m_idx, solved[m_idx]],
+                snr[m_idx, 0],
+            )
         )
 
+    fig, minsnr_container, figure_keys = _gain_figure(
+        figure_keys, meta["pd"], meta["pfa"], meta["n"], traces, full=state.done
+    )
+
     return {
-        "fig": {
-            "data": fig_data,
-            "layout": {
-                "template": pio.templates["plotly"],
-                "uirevision": "no_change",
-                "title": "Pd = " + str(pd) + ", Pfa = " + str(pfa),
-                "xaxis": {"title": "Number of Channels"},
-                "yaxis": {"title": "Integration Gain (dB)"},
-            },
-        },
+        "fig": fig,
         "minsnr_container": minsnr_container,
+        "interval_disabled": state.done,
+        "figure_keys": figure_keys,
     }
 
 
+@app.callback(
+    output={
+        "fig": Output("scatter", "figure", allow_duplicate=True),
+        "figure_keys": Output("figure-keys", "data", allow_duplicate=True),
+    },
+    inputs={
+        "quantity": Input("heatmap-quantity", "value"),
+        "pfa": Input("heatmap-pfa", "value"),
+        "model": Input("heatmap-integration", "value"),
+        "n": Input("heatmap-channels", "value"),
+    },
+    state={
+        "colorscale": State("heatmap-colorscale", "value"),
+        "min_pfa": State("heatmap-pfa", "min"),
+        "max_pfa": State("heatmap-pfa", "max"),
+        "session_id": State("session-id", "data"),
+        "figure_keys": State("figure-keys", "data"),
+    },
+    prevent_initial_call=True
+)
+@timed("heatmap_plot")
+def heatmap_plot(
+    quantity, pfa, model, n, colorscale, min_pfa, max_pfa, session_id, figure_keys
+):
+    """
+    Generate a heatmap of the probability of detection (Pd) over SNR and
+    number of channels, or of the minimal SNR over Pd and number of channels.
+
+    Parameters:
+    - quantity (str): "pd" or "snr".
+    - pfa (float): Probability of false alarm.
+    - model (str): Target model.
+    - n (int): Maximal number of channels.
+    - colorscale (str): Color scale of the heatmap.
+    - min_pfa (float): Minimum value for Pfa.
+    - max_pfa (float): Maximum value for Pfa.
+    - session_id (str): Session of the graph.
+    - figure_keys (dict): What the graph shows, see _figure_patch.
+
+    Raises:
+    - PreventUpdate: If pfa is None or outside the range [min_pfa, max_pfa].
+
+    The surface is computed as one grid evaluation, the minimal SNR is
+    interpolated from a Pd grid by ``roc_snr_surface``. The integration gain
+    job of the session is cancelled, so it does not overwrite the plot.
+
+    Returns:
+    dict: A dictionary containing the plot data and layout.
+    - fig (dash.Patch): Changes to the Plotly figure.
+    - figure_keys (dict): What the graph shows after the changes.
+    """
+    if pfa is None:
+        raise PreventUpdate
+    if pfa < min_pfa or pfa > max_pfa:
+        raise PreventUpdate
+
+    n_array = np.arange(1, n + 1)
+    key = ("heatmap", quantity, float(pfa), int(n), model)
+    surface = surface_cache.get(key)
+    if surface is None:
+        if quantity == "snr":
+            surface = roc.tools.roc_snr_surface(pfa, HEATMAP_PD, n_array, model)
+        else:
+            surface = roc.tools.roc_pd(
+                pfa, HEATMAP_SNR, n_array, model, dtype=np.float32
+            )
+        surface = np.reshape(surface, (HEATMAP_ROWS, n_array.size))
+        surface_cache.put(key, surface)
+
+    gain_jobs.cancel(session_id)
+
+    trace = {
+        "type": "heatmap",
+        "x": _typed_array(n_array),
+        "y": _typed_array(HEATMAP_PD if quantity == "snr" else HEATMAP_SNR),
+        "z": _typed_array(surface),
+        "colorscale": colorscale,
+        "name": model,
+    }
+    if quantity == "snr":
+        trace["colorbar"] = {"title": {"text": "Minimal SNR (dB)"}}
+        y_title = "Probability of detection (Pd)"
+    else:
+        trace.update(zmin=0, zmax=1, colorbar={"title": {"text": "Pd"}})
+        y_title = "SNR (dB)"
+    layout = {
+        "title": model + ", Pfa = " + str(pfa),
+        "xaxis": {"title": "Number of Channels"},
+        "yaxis": {"title": y_title},
+    }
+    view = ("heatmap", quantity, float(pfa), model)
+
+    fig, figure_keys = _figure_patch(figure_keys, view, layout, [(key, trace)])
+    return {"fig": fig, "figure_keys": figure_keys}
+
+
+@app.callback(
+    output={
+        "fig": Output("scatter", "figure", allow_duplicate=True),
+    },
+    inputs={"colorscale": Input("heatmap-colorscale", "value")},
+    state={"figure_keys": State("figure-keys", "data")},
+    prevent_initial_call=True
+)
+@timed("heatmap_colorscale")
+def heatmap_colorscale(colorscale, figure_keys):
+    """
+    Change the color scale of the heatmap without sending its data again.
+
+    Parameters:
+    - colorscale (str): Color scale of the heatmap.
+    - figure_keys (dict): What the graph shows, see _figure_patch.
+
+    Raises:
+    - PreventUpdate: If the graph does not show a heatmap.
+
+    Returns:
+    dict: A dictionary containing the plot data.
+    - fig (dash.Patch): New color scale of the heatmap.
+    """
+    view = (figure_keys or {}).get("view")
+    if view is None or view[0] != "heatmap":
+        raise PreventUpdate
+
+    patch = dash.Patch()
+    patch["data"][0]["colorscale"] = colorscale
+    return {"fig": patch}
+
+
 if __name__ == "__main__":
+    if os.environ.get("ROC_PREWARM", "1") != "0":
+        roc.prewarm()
     app.run_server(debug=True, threaded=True, processes=1, host="0.0.0.0")
     # FlaskUI(app=server, server="flask", port=61134, profile_dir="roc_app").run()
@@ -7,7 +7,7 @@ a = Analysis(['roc_app.py'],
              pathex=['./roc_app'],
              binaries=[],
              datas=[('./assets', 'assets'), ('./assets/fonts/bootstrap-icons.woff', "assets/fonts"), ('./assets/fonts/bootstrap-icons.woff2', "assets/fonts")],
-             hiddenimports=[],
+             hiddenimports=['roc.tools', 'roc.parallel', 'roc.marcum', 'roc.tables'],
              hookspath=[],
              runtime_hooks=[],
              excludes=[],
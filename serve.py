@@ -0,0 +1,253 @@
+"""
+Production server of the ROC app
+
+Runs ``roc_app.server`` under waitress, with gzip (or brotli, if the
+``brotli`` package is installed) compression of the responses and
+caching headers on ``/assets``. The kernels are imported and warmed up
+in the background once the server listens. SIGTERM and SIGINT stop accepting
+connections, let the running requests finish and cancel the background
+jobs. Every option defaults to its ``ROC_*`` environment variable::
+
+    python serve.py --port 8050 --threads 8
+
+    Copyright (C) 2023 - PRESENT  Zhengyu Peng
+    E-mail: zpeng.me@gmail.com
+    Website: https://zpeng.me
+
+    `                      `
+    -:.                  -#:
+    -//:.              -###:
+    -////:.          -#####:
+    -/:.://:.      -###++##:
+    ..   `://:-  -###+. :##:
+           `:/+####+.   :##:
+    .::::::::/+###.     :##:
+    .////-----+##:    `:###:
+     `-//:.   :##:  `:###/.
+       `-//:. :##:`:###/.
+         `-//:+######/.
+           `-/+####/.
+             `+##+.
+              :##:
+              :##:
+              :##:
+              :##:
+              :##:
+               .+:
+
+"""
+
+import argparse
+import gzip
+import logging
+import os
+import signal
+import sys
+
+from flask import request
+from waitress import create_server
+
+import roc
+from roc.cache import LRUCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger("roc.serve")
+
+# Responses worth compressing, the figures are JSON
+COMPRESSIBLE = {
+    "application/json",
+    "application/javascript",
+    "text/css",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+    "image/svg+xml",
+}
+
+
+def _encode(data, encoding, level):
+    """
+    Compress a response body
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def enable_compression(server, min_size=1024, level=6, maxsize=256):
+    """
+    Compress the responses of a Flask server
+
+    Brotli is preferred when the client accepts it and the ``brotli``
+    package is installed, gzip otherwise. Bodies of responses with an
+    ETag, the static files, are compressed once and cached.
+
+    :param flask.Flask server: Flask server
+    :param int min_size: Smallest body compressed, in bytes (default is 1024)
+    :param int level: Compression level (default is 6)
+    :param int maxsize: Number of compressed static files kept (default is 256)
+    """
+    encodings = ["br", "gzip"] if brotli is not None else ["gzip"]
+    compressed = LRUCache(maxsize)
+
+    @server.after_request
+    def compress(response):
+        if (
+            response.status_code != 200
+            or response.mimetype not in COMPRESSIBLE
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+
+        response.direct_passthrough = False
+        if response.content_length is not None and response.content_length < min_size:
+            return response
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        etag, _ = response.get_etag()
+        key = (request.path, etag, encoding)
+        body = compressed.get(key) if etag else None
+        if body is None:
+            body = _encode(data, encoding, level)
+            if etag:
+                compressed.put(key, body)
+        if etag:
+            # Still matches the conditional requests of the plain body
+            response.set_etag(etag, weak=True)
+
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+
+def enable_asset_caching(server, prefix="/assets/", max_age=86400):
+    """
+    Caching headers on the static assets of a Flask server
+
+    Dash links the assets with a ``?m=<modification time>`` query, those
+    URLs change with the file and are cached for a year.
+
+    :param flask.Flask server: Flask server
+    :param str prefix: URL prefix of the assets (default is ``/assets/``)
+    :param int max_age: Lifetime in seconds of the assets requested without
+        the ``m`` query, the fonts loaded by the style sheets for example
+        (default is 86400)
+    """
+
+    @server.after_request
+    def cache_assets(response):
+        if request.path.startswith(prefix) and response.status_code in (200, 304):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            if "m" in request.args:
+                response.cache_control.max_age = 31536000
+                response.cache_control.immutable = True
+            else:
+                response.cache_control.max_age = max_age
+        return response
+
+
+def main():
+    """
+    Command line entry point
+    """
+    parser = argparse.ArgumentParser(description="Production server of the ROC app")
+    parser.add_argument("--host", default=os.environ.get("ROC_HOST", "0.0.0.0"))
+    parser.add_argument(
+        "--port", type=int, default=int(os.environ.get("ROC_PORT", "8050"))
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=int(os.environ.get("ROC_THREADS", "8")),
+        help="request threads (default 8)",
+    )
+    parser.add_argument(
+        "--connection-limit",
+        type=int,
+        default=int(os.environ.get("ROC_CONNECTION_LIMIT", "100")),
+        help="open connections before new ones are refused (default 100)",
+    )
+    parser.add_argument(
+        "--channel-timeout",
+        type=int,
+        default=int(os.environ.get("ROC_CHANNEL_TIMEOUT", "120")),
+        help="seconds an inactive connection is kept open (default 120)",
+    )
+    parser.add_argument(
+        "--asset-max-age",
+        type=int,
+        default=int(os.environ.get("ROC_ASSET_MAX_AGE", "86400")),
+        help="lifetime in seconds of the unversioned assets (default 86400)",
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        default=int(os.environ.get("ROC_COMPRESS_LEVEL", "6")),
+        help="compression level, 0 to disable (default 6)",
+    )
+    parser.add_argument(
+        "--no-prewarm",
+        dest="prewarm",
+        action="store_false",
+        default=os.environ.get("ROC_PREWARM", "1") != "0",
+        help="do not warm up the kernels in the background",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    # pylint: disable=import-outside-toplevel
+    from roc_app import gain_jobs, server
+
+    if args.compress_level > 0:
+        enable_compression(server, level=args.compress_level)
+    enable_asset_caching(server, max_age=args.asset_max_age)
+
+    wsgi = create_server(
+        server,
+        host=args.host,
+        port=args.port,
+        threads=args.threads,
+        connection_limit=args.connection_limit,
+        channel_timeout=args.channel_timeout,
+        ident="roc",
+    )
+
+    def stop(signum, frame):
+        del frame
+        logger.info("Received signal %d, shutting down", signum)
+        # Ends the waitress loop, which waits for the running requests
+        raise SystemExit(0)
+
+    # The socket listens from here on, requests queue while the kernels load
+    if args.prewarm:
+        roc.prewarm()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info(
+        "Serving on http://%s:%d with %d threads", args.host, args.port, args.threads
+    )
+    try:
+        wsgi.run()
+    finally:
+        gain_jobs.shutdown(wait=False)
+        if "roc.parallel" in sys.modules:
+            roc.parallel.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Tests of the threshold cache
+
+---
+
+- Copyright (C) 2018 - PRESENT  radarsimx.com
+- E-mail: info@radarsimx.com
+- Website: https://radarsimx.com
+
+"""
+
+import numpy as np
+from scipy.special import gammaincinv  # pylint: disable=no-name-in-module
+
+from roc.cache import ThresholdCache, threshold_cache
+from roc.tools import roc_pd, roc_snr
+
+
+def test_roc_pd_hits_threshold_cache():
+    """
+    Repeated ``roc_pd`` calls over arrays are answered from the cache
+    """
+    pfa = np.logspace(-8, -2, 50)
+    threshold_cache.clear()
+    first = roc_pd(pfa, np.linspace(0, 20, 10), [1, 10], "Swerling 1")
+    misses = threshold_cache.cache_info().misses
+    assert misses == 100
+
+    for _ in range(4):
+        np.testing.assert_array_equal(
+            roc_pd(pfa, np.linspace(0, 20, 10), [1, 10], "Swerling 1"), first
+        )
+    info = threshold_cache.cache_info()
+    assert info.hits == 400
+    assert info.misses == misses
+
+    roc_snr(pfa[:3], 0.9, 10, "Swerling 1")
+    assert threshold_cache.cache_info().hits > info.hits
+
+
+def test_threshold_cache_values_and_eviction():
+    """
+    Cached thresholds match ``gammaincinv`` and the store stays bounded
+    """
+    cache = ThresholdCache(maxsize=8)
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        pfa = rng.choice(np.logspace(-10, -1, 12), 6)
+        npulses = rng.choice([1, 2, 5, 64], 6)
+        np.testing.assert_allclose(
+            cache(pfa, npulses), gammaincinv(npulses, 1 - pfa), rtol=1e-12
+        )
+        assert cache.cache_info().currsize <= 8
+
+    assert cache(1e-6, 4) == gammaincinv(4, 1 - 1e-6)
+    assert np.isnan(cache(np.array([np.nan]), np.array([4]))[0])